@@ -1,15 +1,33 @@
 #!/usr/bin/env python3
 """
-Bible Theme Tagger for Galatians, Ephesians, Philippians, Colossians
+Bible Theme Tagger - rule-based theme tagging for any set of books
 Assigns 1-3 relevant biblical themes to verses based on content analysis.
+
+Usage:
+    python3 Bible_Theme_Tagger.py                          # Galatians-Colossians
+    python3 Bible_Theme_Tagger.py --books Romans James     # specific books
+    python3 Bible_Theme_Tagger.py --all --workers 8        # whole database
+    python3 Bible_Theme_Tagger.py --all --rules rules.json # extra book rules
 """
 
-import sqlite3
+import argparse
 import json
+import os
 import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+from theme_postings import build_theme_postings
 
 # Database path
-DB_PATH = '/Users/kcdacre8tor/thereal-everyday-christian/assets/bible.db'
+DB_PATH = 'assets/bible.db'
+
+# Books tagged when no --books/--all is given
+DEFAULT_BOOKS = ['Galatians', 'Ephesians', 'Philippians', 'Colossians']
 
 # Available themes
 THEMES = [
@@ -18,153 +36,309 @@ THEMES = [
     "holiness", "wisdom", "guidance", "strength", "thanksgiving", "prayer"
 ]
 
+# Theme detection patterns (prioritized by specificity)
+THEME_PATTERNS = {
+    "faith": [r'\bfaith\b', r'\bbeliev', r'\btrust\b'],
+    "love": [r'\blove\b', r'\bloved\b', r'\bloving\b', r'\bcharity\b'],
+    "grace": [r'\bgrace\b', r'\bgracious\b'],
+    "hope": [r'\bhope\b', r'\bhopeful\b'],
+    "peace": [r'\bpeace\b', r'\bpeaceful\b', r'\breconcil'],
+    "joy": [r'\bjoy\b', r'\bjoying\b', r'\brejoic'],
+    "freedom": [r'\bfree\b', r'\bfreedom\b', r'\bliberty\b', r'\bdeliver'],
+    "mercy": [r'\bmercy\b', r'\bmerciful\b', r'\bcompassion'],
+    # "one body" only consumes "one" so "body" stays visible to other patterns
+    "unity": [r'\bunity\b', r'\bunited\b', r'\bone(?= body\b)', r'\btogether\b', r'\bknit'],
+    "humility": [r'\bhumbl', r'\blowly\b', r'\bmeek\b', r'\bservant\b'],
+    "perseverance": [r'\bendur', r'\bpersever', r'\bsteadfast\b', r'\bpatien'],
+    "spiritual warfare": [r'\barmor\b', r'\bwarfare\b', r'\bbattle\b', r'\bstruggle\b', r'\bprincipalities\b', r'\bpowers\b', r'\bdarkness\b'],
+    "righteousness": [r'\bright', r'\bjust\b', r'\bjustice\b', r'\bholy\b'],
+    "holiness": [r'\bholy\b', r'\bholiness\b', r'\bsaint\b', r'\bsanctif'],
+    "wisdom": [r'\bwisdom\b', r'\bwise\b', r'\bunderstand'],
+    "guidance": [r'\bguide\b', r'\blead\b', r'\bdirect', r'\bwalk\b', r'\bpath\b'],
+    "strength": [r'\bstrength\b', r'\bstrong\b', r'\bpower\b', r'\bmight\b'],
+    "thanksgiving": [r'\bthank', r'\bgrateful\b', r'\bgratitude\b'],
+    "prayer": [r'\bpray\b', r'\bpraying\b', r'\bprayer\b', r'\bintercession\b']
+}
+
+# Context cues used by the book-specific refinements in analyze_verse()
+CONTEXT_PATTERNS = {
+    "law": [r'\blaw\b', r'\bcircumcis'],
+    "spirit": [r'\bspirit\b'],
+    "church_body": [r'\bchurch\b', r'\bbody\b'],
+    "rejoicing": [r'\bjoy\b', r'\brejoic'],
+    "christ_fullness": [r'\bchrist\b(?=.*\ball\b)', r'\bfullness\b'],
+}
+
+
+class ThemeMatcher:
+    """
+    Multi-pattern matcher that scores every theme in one pass over the text.
+
+    All patterns are compiled into a single alternation with one named group
+    per distinct pattern, so a verse is scanned once instead of once per
+    pattern. Every pattern starts with \\b, so the alternation is anchored on
+    word starts and bucketed by first letter; at each word only the patterns
+    that can possibly match are tried. A pattern shared by several themes
+    (e.g. "holy") is matched once and credited to each of them. Each theme's
+    count is the number of its distinct patterns found, matching the old
+    per-pattern re.search scoring.
+    """
+
+    def __init__(self, patterns_by_name):
+        self.names = list(patterns_by_name)
+        self._owners = []  # group index -> names that own the pattern
+        group_index = {}
+        buckets = {}  # first letter -> named-group alternatives
+
+        for name, patterns in patterns_by_name.items():
+            for pattern in patterns:
+                if not pattern.startswith(r'\b'):
+                    raise ValueError(f"Theme pattern must start at a word boundary: {pattern}")
+                if pattern not in group_index:
+                    group_index[pattern] = len(self._owners)
+                    body = pattern[2:]
+                    buckets.setdefault(body[0], []).append(f'(?P<p{len(self._owners)}>{body})')
+                    self._owners.append([])
+                self._owners[group_index[pattern]].append(name)
+
+        self._regex = re.compile(r'\b(?:' + '|'.join(
+            f'(?={re.escape(letter)})(?:' + '|'.join(alternatives) + ')'
+            for letter, alternatives in buckets.items()
+        ) + ')')
+
+    def hit_counts(self, text_lower):
+        """Return {name: distinct patterns matched} for every name with a hit."""
+        seen = set()
+        for match in self._regex.finditer(text_lower):
+            seen.add(int(match.lastgroup[1:]))
+
+        counts = {}
+        for index in seen:
+            for name in self._owners[index]:
+                counts[name] = counts.get(name, 0) + 1
+
+        # Keep THEME_PATTERNS order so ties sort the same way as before
+        return {name: counts[name] for name in self.names if name in counts}
+
+
+# Book-specific refinements: book -> [(context cue, theme, action)]
+#   "append":  add the theme if it is missing and there is room (max 3)
+#   "promote": add the theme, replacing the top theme if the list is full
+# New books only need a row here (plus a cue in CONTEXT_PATTERNS), or a
+# --rules JSON file with the same "book_rules"/"context_patterns" shape.
+BOOK_RULES = {
+    "Galatians": [("law", "freedom", "append"), ("spirit", "holiness", "append")],
+    "Ephesians": [("church_body", "unity", "append")],
+    "Philippians": [("rejoicing", "joy", "promote")],
+    "Colossians": [("christ_fullness", "holiness", "append")],
+}
+
+MATCHER = ThemeMatcher({**THEME_PATTERNS, **CONTEXT_PATTERNS})
+
+
+def load_rule_table(rules_path):
+    """Merge book rules and context cues from a JSON file into the rule tables."""
+    global MATCHER
+
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+
+    CONTEXT_PATTERNS.update(rules.get('context_patterns', {}))
+    for book, book_rules in rules.get('book_rules', {}).items():
+        BOOK_RULES[book] = [tuple(rule) for rule in book_rules]
+
+    for book_rules in BOOK_RULES.values():
+        for cue, theme, action in book_rules:
+            if cue not in CONTEXT_PATTERNS:
+                raise ValueError(f"Unknown context cue in book rules: {cue}")
+            if action not in ('append', 'promote'):
+                raise ValueError(f"Unknown book rule action: {action}")
+
+    MATCHER = ThemeMatcher({**THEME_PATTERNS, **CONTEXT_PATTERNS})
+
+
 def analyze_verse(reference, text):
     """
     Analyze verse text and assign 1-3 relevant themes.
     Returns a JSON array of theme strings.
     """
-    text_lower = text.lower()
-    assigned_themes = []
-
-    # Theme detection patterns (prioritized by specificity)
-    theme_patterns = {
-        "faith": [r'\bfaith\b', r'\bbeliev', r'\btrust\b'],
-        "love": [r'\blove\b', r'\bloved\b', r'\bloving\b', r'\bcharity\b'],
-        "grace": [r'\bgrace\b', r'\bgracious\b'],
-        "hope": [r'\bhope\b', r'\bhopeful\b'],
-        "peace": [r'\bpeace\b', r'\bpeaceful\b', r'\breconcil'],
-        "joy": [r'\bjoy\b', r'\bjoying\b', r'\brejoic'],
-        "freedom": [r'\bfree\b', r'\bfreedom\b', r'\bliberty\b', r'\bdeliver'],
-        "mercy": [r'\bmercy\b', r'\bmerciful\b', r'\bcompassion'],
-        "unity": [r'\bunity\b', r'\bunited\b', r'\bone body\b', r'\btogether\b', r'\bknit'],
-        "humility": [r'\bhumbl', r'\blowly\b', r'\bmeek\b', r'\bservant\b'],
-        "perseverance": [r'\bendur', r'\bpersever', r'\bsteadfast\b', r'\bpatien'],
-        "spiritual warfare": [r'\barmor\b', r'\bwarfare\b', r'\bbattle\b', r'\bstruggle\b', r'\bprincipalities\b', r'\bpowers\b', r'\bdarkness\b'],
-        "righteousness": [r'\bright', r'\bjust\b', r'\bjustice\b', r'\bholy\b'],
-        "holiness": [r'\bholy\b', r'\bholiness\b', r'\bsaint\b', r'\bsanctif'],
-        "wisdom": [r'\bwisdom\b', r'\bwise\b', r'\bunderstand'],
-        "guidance": [r'\bguide\b', r'\blead\b', r'\bdirect', r'\bwalk\b', r'\bpath\b'],
-        "strength": [r'\bstrength\b', r'\bstrong\b', r'\bpower\b', r'\bmight\b'],
-        "thanksgiving": [r'\bthank', r'\bgrateful\b', r'\bgratitude\b'],
-        "prayer": [r'\bpray\b', r'\bpraying\b', r'\bprayer\b', r'\bintercession\b']
-    }
+    hits = MATCHER.hit_counts(text.lower())
 
     # Score each theme based on pattern matches
-    theme_scores = {}
-    for theme, patterns in theme_patterns.items():
-        score = sum(1 for pattern in patterns if re.search(pattern, text_lower))
-        if score > 0:
-            theme_scores[theme] = score
+    theme_scores = {theme: score for theme, score in hits.items() if theme in THEME_PATTERNS}
 
     # Sort by score and take top 3
     sorted_themes = sorted(theme_scores.items(), key=lambda x: x[1], reverse=True)
     assigned_themes = [theme for theme, score in sorted_themes[:3]]
 
-    # Context-based refinements for specific books/chapters
-    if "Galatians" in reference:
-        if any(re.search(pattern, text_lower) for pattern in [r'\blaw\b', r'\bcircumcis']):
-            if "freedom" not in assigned_themes and len(assigned_themes) < 3:
-                assigned_themes.append("freedom")
-        if re.search(r'\bspirit\b', text_lower) and "holiness" not in assigned_themes and len(assigned_themes) < 3:
-            assigned_themes.append("holiness")
-
-    if "Ephesians" in reference:
-        if re.search(r'\bchurch\b|\bbody\b', text_lower) and "unity" not in assigned_themes and len(assigned_themes) < 3:
-            assigned_themes.append("unity")
-
-    if "Philippians" in reference:
-        if any(re.search(pattern, text_lower) for pattern in [r'\bjoy\b', r'\brejoic']) and "joy" not in assigned_themes:
-            if len(assigned_themes) < 3:
-                assigned_themes.append("joy")
-            elif "joy" not in assigned_themes:
-                assigned_themes[0] = "joy"
-
-    if "Colossians" in reference:
-        if re.search(r'\bchrist\b.*\ball\b|\bfullness\b', text_lower) and len(assigned_themes) < 3:
-            if "holiness" not in assigned_themes:
-                assigned_themes.append("holiness")
+    # Context-based refinements for specific books
+    book = reference.rsplit(' ', 1)[0]
+    for cue, theme, action in BOOK_RULES.get(book, []):
+        if cue not in hits or theme in assigned_themes:
+            continue
+        if len(assigned_themes) < 3:
+            assigned_themes.append(theme)
+        elif action == 'promote':
+            assigned_themes[0] = theme
 
     # Return top 3 themes (or fewer if less were found)
     return assigned_themes[:3]
 
-def main():
-    print("Starting Bible Theme Tagger...")
-    print(f"Database: {DB_PATH}")
 
-    # Connect to database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def _init_worker(rules_path):
+    """Load the same rule table in each worker process."""
+    if rules_path:
+        load_rule_table(rules_path)
 
-    # Get verses to tag
-    query = """
-        SELECT id, reference, text
-        FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
-        AND (themes IS NULL OR LENGTH(themes) <= 2)
+
+def tag_book(db_path, book, retag=False, text_column='text'):
     """
+    Tag one book's verses. Runs in a worker process with a read-only
+    connection and returns (book, [(themes_json, verse_id), ...]) for the
+    single writer in the parent to apply.
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+
+    query = f"SELECT id, reference, {text_column} FROM verses WHERE book = ?"
+    if not retag:
+        query += " AND (themes IS NULL OR LENGTH(themes) <= 2)"
+
+    rows = conn.execute(query, (book,)).fetchall()
+    conn.close()
+
+    return book, [(json.dumps(analyze_verse(reference, text)), verse_id)
+                  for verse_id, reference, text in rows]
+
+
+def get_books(conn, books=None):
+    """Return the requested books that exist in the database, in canonical order."""
+    cursor = conn.execute("SELECT book FROM verses GROUP BY book ORDER BY MIN(id)")
+    available = [row[0] for row in cursor.fetchall()]
+
+    if books is None:
+        return available
 
-    cursor.execute(query)
-    verses = cursor.fetchall()
+    missing = [book for book in books if book not in available]
+    if missing:
+        print(f"⚠️  Books not found in database: {', '.join(missing)}")
 
-    print(f"Found {len(verses)} verses to tag")
+    return [book for book in available if book in books]
+
+
+def tag_books(db_path, books, workers=None, retag=False, rules_path=None):
+    """
+    Shard tagging by book across a process pool and stream each book's
+    results into one writer connection with executemany().
+    Returns the number of verses updated.
+    """
+    conn = sqlite3.connect(db_path)
+    books = get_books(conn, books)
+
+    if not books:
+        print("No books to tag")
+        conn.close()
+        return 0
+
+    # Strong's markup in raw text ("|strong=...") would match \bstrong\b on every
+    # verse, so score clean_text wherever clean_bible_verses.py has filled it
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(verses)")]
+    text_column = 'COALESCE(clean_text, text)' if 'clean_text' in columns else 'text'
+
+    workers = min(workers or os.cpu_count() or 1, len(books))
+    print(f"Tagging {len(books)} books with {workers} workers...")
 
-    # Process in batches of 50
-    batch_size = 50
     total_updated = 0
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rules_path,)) as executor:
+        futures = [executor.submit(tag_book, db_path, book, retag, text_column) for book in books]
 
-    for i in range(0, len(verses), batch_size):
-        batch = verses[i:i+batch_size]
-        print(f"\nProcessing batch {i//batch_size + 1} ({len(batch)} verses)...")
+        for future in as_completed(futures):
+            book, updates = future.result()
 
-        for verse_id, reference, text in batch:
-            # Analyze and assign themes
-            themes = analyze_verse(reference, text)
-            themes_json = json.dumps(themes)
+            conn.executemany("UPDATE verses SET themes = ? WHERE id = ?", updates)
+            conn.commit()
+            total_updated += len(updates)
 
-            # Update database
-            cursor.execute(
-                "UPDATE verses SET themes = ? WHERE id = ?",
-                (themes_json, verse_id)
-            )
-            total_updated += 1
+            elapsed = time.time() - start_time
+            rate = total_updated / elapsed if elapsed > 0 else 0
+            print(f"  ✓ {book}: {len(updates)} verses | "
+                  f"{total_updated} total | {rate:,.0f} verses/sec")
 
-            if total_updated % 50 == 0:
-                print(f"  Updated {total_updated} verses...")
+    conn.close()
 
-        # Commit after each batch
-        conn.commit()
-        print(f"  Batch committed ({total_updated} total)")
+    elapsed = time.time() - start_time
+    rate = total_updated / elapsed if elapsed > 0 else 0
+    print(f"\nTagged {total_updated} verses in {elapsed:.2f}s ({rate:,.0f} verses/sec)")
 
-    # Final commit
-    conn.commit()
+    return total_updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based Bible theme tagger")
+    parser.add_argument('--db', default=DB_PATH, help=f"Database path (default: {DB_PATH})")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument('--books', nargs='+', help="Books to tag (default: Galatians-Colossians)")
+    scope.add_argument('--all', action='store_true', help="Tag every book in the database")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--retag', action='store_true',
+                        help="Re-tag verses that already have themes")
+    parser.add_argument('--rules', help="JSON file with extra book_rules/context_patterns")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    if args.rules:
+        load_rule_table(args.rules)
+
+    books = None if args.all else (args.books or DEFAULT_BOOKS)
+
+    print("Starting Bible Theme Tagger...")
+    print(f"Database: {args.db}")
+
+    total_updated = tag_books(args.db, books, workers=args.workers,
+                              retag=args.retag, rules_path=args.rules)
 
     # Verify results
-    cursor.execute("""
+    conn = sqlite3.connect(args.db)
+    cursor = conn.cursor()
+    books = get_books(conn, books)
+    placeholders = ','.join('?' * len(books))
+
+    cursor.execute(f"""
         SELECT COUNT(*)
         FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
+        WHERE book IN ({placeholders})
         AND themes IS NOT NULL
         AND LENGTH(themes) > 2
-    """
-    )
+    """, books)
     tagged_count = cursor.fetchone()[0]
 
+    # Keep the random/ranked theme lookup table in step with the new tags
+    postings = build_theme_postings(conn)
+    conn.commit()
+
     print(f"\n{'='*50}")
     print(f"COMPLETE!")
     print(f"Total verses updated: {total_updated}")
     print(f"Total verses with themes: {tagged_count}")
+    print(f"Theme postings: {postings['postings']}")
     print(f"{'='*50}")
 
     # Show sample results
     print("\nSample tagged verses:")
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT reference, themes
         FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
+        WHERE book IN ({placeholders})
         AND themes IS NOT NULL
         ORDER BY RANDOM()
         LIMIT 5
-    """)
+    """, books)
 
     for ref, themes in cursor.fetchall():
         print(f"  {ref}: {themes}")
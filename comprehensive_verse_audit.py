@@ -2,44 +2,238 @@
 """
 Comprehensive audit of Spanish devotional Bible verses against RVR1909 database.
 This script performs a thorough character-by-character comparison.
+
+Every reference in every devotional file is collected first and resolved
+in one query, so the comparison itself runs entirely in memory.
+
+With --incremental, per-file SHA-256 hashes and per-entry results are kept
+in a small SQLite cache. Only files whose content, or the database rows they
+reference, changed since the last run are re-audited; the rest are merged
+into the report from the cache.
+
+Usage:
+    python3 comprehensive_verse_audit.py                  # Spanish vs RVR1909
+    python3 comprehensive_verse_audit.py --lang en        # English vs WEB
+    python3 comprehensive_verse_audit.py --incremental    # re-check changed files only
 """
 
+import argparse
+import hashlib
 import json
 import sqlite3
 import os
-import re
+import sys
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-
-# Spanish book name mappings to database format
-BOOK_MAPPINGS = {
-    'génesis': 'Génesis', 'éxodo': 'Éxodo', 'levítico': 'Levítico',
-    'números': 'Números', 'deuteronomio': 'Deuteronomio', 'josué': 'Josué',
-    'jueces': 'Jueces', 'rut': 'Rut', '1 samuel': '1 Samuel', '2 samuel': '2 Samuel',
-    '1 reyes': '1 Reyes', '2 reyes': '2 Reyes', '1 crónicas': '1 Crónicas',
-    '2 crónicas': '2 Crónicas', 'esdras': 'Esdras', 'nehemías': 'Nehemías',
-    'ester': 'Ester', 'job': 'Job', 'salmos': 'Salmos', 'salmo': 'Salmos',
-    'proverbios': 'Proverbios', 'eclesiastés': 'Eclesiastés',
-    'cantares': 'Cantares', 'isaías': 'Isaías', 'jeremías': 'Jeremías',
-    'lamentaciones': 'Lamentaciones', 'ezequiel': 'Ezequiel', 'daniel': 'Daniel',
-    'oseas': 'Oseas', 'joel': 'Joel', 'amós': 'Amós', 'abdías': 'Abdías',
-    'jonás': 'Jonás', 'miqueas': 'Miqueas', 'nahúm': 'Nahúm', 'habacuc': 'Habacuc',
-    'sofonías': 'Sofonías', 'hageo': 'Hageo', 'zacarías': 'Zacarías',
-    'malaquías': 'Malaquías', 'mateo': 'Mateo', 'marcos': 'Marcos', 'lucas': 'Lucas',
-    'juan': 'Juan', 'hechos': 'Hechos', 'romanos': 'Romanos', '1 corintios': '1 Corintios',
-    '2 corintios': '2 Corintios', 'gálatas': 'Gálatas', 'efesios': 'Efesios',
-    'filipenses': 'Filipenses', 'colosenses': 'Colosenses', '1 tesalonicenses': '1 Tesalonicenses',
-    '2 tesalonicenses': '2 Tesalonicenses', '1 timoteo': '1 Timoteo', '2 timoteo': '2 Timoteo',
-    'tito': 'Tito', 'filemón': 'Filemón', 'hebreos': 'Hebreos', 'santiago': 'Santiago',
-    '1 pedro': '1 Pedro', '2 pedro': '2 Pedro', '1 juan': '1 Juan', '2 juan': '2 Juan',
-    '3 juan': '3 Juan', 'judas': 'Judas', 'apocalipsis': 'Apocalipsis'
+from typing import Dict, Iterable, List, Tuple, Optional
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+from bible_references import book_name, parse_reference, split_vid
+from verse_diagnostics import SUGGEST_BELOW, diagnose, render_diff, suggest_reference
+from verse_ids import PassageFetcher, verse_text_sql
+
+# Per-language defaults: (database, devotionals directory)
+LANGUAGES = {
+    'es': ('assets/spanish_bible_rvr1909.db', 'assets/devotionals/es'),
+    'en': ('assets/bible.db', 'assets/devotionals/en'),
 }
 
+CACHE_PATH = 'verse_audit_cache.db'
+
+# The default language keeps the tracked verse_audit_report.json; other
+# languages get their own file so they don't overwrite it
+DEFAULT_LANGUAGE = 'es'
+REPORT_PATH = 'verse_audit_report.json'
+LANGUAGE_REPORT_PATH = 'verse_audit_report.{language}.json'
+
+# Bump when the shape or meaning of cached per-entry results changes
+CACHE_VERSION = 3
+
+# Chapters on either side searched for a better reference
+NEARBY_CHAPTERS = 1
+
+VerseKey = Tuple[str, int, int]
+
+def hash_verse_texts(keys: Iterable[VerseKey], verse_texts: Dict[VerseKey, str]) -> str:
+    """Fingerprint the database rows a file references (missing rows included)."""
+    digest = hashlib.sha256()
+    for book, chapter, verse in sorted(set(keys)):
+        digest.update(f"{book}\0{chapter}\0{verse}\0{verse_texts.get((book, chapter, verse), '')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+class VerseResolver:
+    """
+    Resolve many (book, chapter, verse) keys with one query.
+
+    Keys are staged into a temp table and joined against verses, instead of
+    issuing one SELECT per reference. Texts come from verse_text_sql(), so
+    WEB verses are compared without their Strong's markup.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.text_sql = verse_text_sql(conn)
+
+    def resolve(self, keys: Iterable[VerseKey]) -> Dict[VerseKey, str]:
+        """Return {(book, chapter, verse): text} for every key found in the database."""
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS wanted_verses (
+                book TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                verse_number INTEGER NOT NULL,
+                PRIMARY KEY (book, chapter, verse_number)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("DELETE FROM temp.wanted_verses")
+        cursor.executemany("INSERT INTO temp.wanted_verses VALUES (?, ?, ?)", keys)
+
+        cursor.execute(f"""
+            SELECT v.book, v.chapter, v.verse_number, {self.text_sql}
+            FROM temp.wanted_verses w
+            JOIN verses v
+              ON v.book = w.book AND v.chapter = w.chapter AND v.verse_number = w.verse_number
+        """)
+        found = {(book, chapter, verse): text for book, chapter, verse, text in cursor.fetchall()}
+
+        cursor.execute("DELETE FROM temp.wanted_verses")
+        return found
+
+class AuditCache:
+    """
+    SQLite cache of audit results for --incremental runs.
+
+    audit_files holds each file's SHA-256 and a fingerprint of the database
+    rows it references; audit_entries holds every verse check's result with
+    its parsed key, so a file can be re-validated against the database
+    without re-reading its JSON.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS audit_files;
+                DROP TABLE IF EXISTS audit_entries;
+                DROP TABLE IF EXISTS audit_databases;
+            """)
+            self.conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS audit_files (
+                language TEXT NOT NULL,
+                path TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                devotionals_count INTEGER NOT NULL,
+                db_hash TEXT NOT NULL,
+                PRIMARY KEY (language, path)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS audit_entries (
+                language TEXT NOT NULL,
+                path TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                book TEXT,
+                chapter INTEGER,
+                verse INTEGER,
+                result TEXT NOT NULL,
+                PRIMARY KEY (language, path, position)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS audit_databases (
+                language TEXT PRIMARY KEY,
+                db_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+        """)
+
+    def files(self, language: str) -> Dict[str, Tuple[str, int, str]]:
+        """Return {path: (sha256, devotionals_count, db_hash)} for a language."""
+        rows = self.conn.execute(
+            "SELECT path, sha256, devotionals_count, db_hash FROM audit_files WHERE language = ?",
+            (language,)
+        )
+        return {path: (sha, count, db_hash) for path, sha, count, db_hash in rows}
+
+    def entry_keys(self, language: str, path: str) -> List[VerseKey]:
+        """Parsed verse keys referenced by a cached file."""
+        return [tuple(row) for row in self.conn.execute(
+            "SELECT book, chapter, verse FROM audit_entries "
+            "WHERE language = ? AND path = ? AND book IS NOT NULL",
+            (language, path)
+        )]
+
+    def file_results(self, language: str, path: str, devotionals_count: int) -> Dict:
+        """Rebuild a file's audit results from its cached entries."""
+        details = [json.loads(result) for (result,) in self.conn.execute(
+            "SELECT result FROM audit_entries WHERE language = ? AND path = ? ORDER BY position",
+            (language, path)
+        )]
+        statuses = [detail['status'] for detail in details]
+        return {
+            'file': Path(path).name,
+            'devotionals_count': devotionals_count,
+            'verses_checked': len(details),
+            'matches': statuses.count('match'),
+            'mismatches': statuses.count('mismatch'),
+            'errors': len(details) - statuses.count('match') - statuses.count('mismatch'),
+            'details': details
+        }
+
+    def store_file(self, language: str, path: str, sha256: str, db_hash: str,
+                   file_results: Dict, keys: List[Optional[VerseKey]]):
+        """Replace a file's cached hash and per-entry results."""
+        self.conn.execute("DELETE FROM audit_entries WHERE language = ? AND path = ?", (language, path))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO audit_files VALUES (?, ?, ?, ?, ?)",
+            (language, path, sha256, file_results['devotionals_count'], db_hash)
+        )
+        self.conn.executemany(
+            "INSERT INTO audit_entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(language, path, position, *(key or (None, None, None)),
+              json.dumps(detail, ensure_ascii=False))
+             for position, (detail, key) in enumerate(zip(file_results['details'], keys))]
+        )
+
+    def forget_missing(self, language: str, paths: Iterable[str]):
+        """Drop cached files that no longer exist."""
+        stale = set(self.files(language)) - set(paths)
+        for path in stale:
+            self.conn.execute("DELETE FROM audit_files WHERE language = ? AND path = ?", (language, path))
+            self.conn.execute("DELETE FROM audit_entries WHERE language = ? AND path = ?", (language, path))
+
+    def database_unchanged(self, language: str, db_path: str) -> bool:
+        """True if the database file has the same path, size and mtime as last run."""
+        stat = os.stat(db_path)
+        row = self.conn.execute(
+            "SELECT db_path, size, mtime_ns FROM audit_databases WHERE language = ?", (language,)
+        ).fetchone()
+        return row == (db_path, stat.st_size, stat.st_mtime_ns)
+
+    def record_database(self, language: str, db_path: str):
+        stat = os.stat(db_path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO audit_databases VALUES (?, ?, ?, ?)",
+            (language, db_path, stat.st_size, stat.st_mtime_ns)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
 class VerseAuditor:
-    def __init__(self, db_path: str, devotionals_dir: str):
+    def __init__(self, db_path: str, devotionals_dir: str, language: str = DEFAULT_LANGUAGE):
         self.db_path = db_path
         self.devotionals_dir = devotionals_dir
+        self.language = language
         self.conn = None
+        self.fetcher = None
+        self.verse_texts: Dict[VerseKey, str] = {}
         self.mismatches = []
         self.matches = []
         self.errors = []
@@ -48,6 +242,7 @@ class VerseAuditor:
         """Connect to RVR1909 database."""
         self.conn = sqlite3.connect(self.db_path)
         self.conn.row_factory = sqlite3.Row
+        self.fetcher = PassageFetcher(self.conn)
 
     def close_db(self):
         """Close database connection."""
@@ -60,38 +255,40 @@ class VerseAuditor:
         Handles simple references like "Salmos 107:1"
         Returns None for complex references like "Mateo 2:1-2, 9-10"
         """
-        # Clean up reference
-        reference = reference.strip()
-
-        # Pattern: Book Chapter:Verse (e.g., "Salmos 107:1")
-        pattern = r'^([0-9]?\s*[A-Za-zá-úÁ-Ú]+)\s+(\d+):(\d+)$'
-        match = re.match(pattern, reference)
-
-        if not match:
+        parsed = parse_reference(reference.strip())
+        if not parsed or not parsed.is_single_verse:
             return None
 
-        book_raw, chapter, verse = match.groups()
-        book_normalized = self._normalize_book_name(book_raw)
-
-        if not book_normalized:
-            return None
+        book_id, chapter, verse = split_vid(parsed.ranges[0][0])
+        return (book_name(book_id, self.language), chapter, verse)
 
-        return (book_normalized, int(chapter), int(verse))
+    def preload_verses(self, devotional_files: Dict[Path, List[Dict]]):
+        """Resolve every parseable reference in all files with a single query."""
+        keys = set()
+        for devotionals in devotional_files.values():
+            for devotional in devotionals:
+                for field in ('openingScripture', 'keyVerseSpotlight'):
+                    if field in devotional:
+                        parsed = self.parse_reference(devotional[field].get('reference', ''))
+                        if parsed:
+                            keys.add(parsed)
 
-    def _normalize_book_name(self, book_raw: str) -> Optional[str]:
-        """Normalize book name to database format."""
-        book_lower = book_raw.strip().lower()
-        return BOOK_MAPPINGS.get(book_lower)
+        self.verse_texts = VerseResolver(self.conn).resolve(keys)
+        print(f"🔎 Resolved {len(self.verse_texts)}/{len(keys)} distinct references in one query")
 
     def get_verse_from_db(self, book: str, chapter: int, verse: int) -> Optional[str]:
-        """Retrieve verse text from RVR1909 database."""
+        """Retrieve verse text, from the preloaded references when available."""
+        key = (book, chapter, verse)
+        if key in self.verse_texts:
+            return self.verse_texts[key]
+
         cursor = self.conn.cursor()
         cursor.execute(
-            "SELECT text FROM verses WHERE book = ? AND chapter = ? AND verse_number = ?",
+            f"SELECT {self.fetcher.text_sql} FROM verses WHERE book = ? AND chapter = ? AND verse_number = ?",
             (book, chapter, verse)
         )
         row = cursor.fetchone()
-        return row['text'] if row else None
+        return row[0] if row else None
 
     def compare_verses(self, devotional_text: str, db_text: str) -> bool:
         """
@@ -104,10 +301,27 @@ class VerseAuditor:
 
         return dev_normalized == db_normalized
 
-    def audit_devotional_file(self, file_path: Path) -> Dict:
+    def diagnose_mismatch(self, devotional_text: str, db_text: str, book: str, chapter: int) -> Dict:
+        """
+        Classify a mismatch (accents, punctuation, fragment, ...) with a
+        character diff, and suggest a nearby reference when similarity is low.
+        """
+        diagnosis = diagnose(devotional_text, db_text)
+
+        if diagnosis['category'] != 'placeholder' and diagnosis['similarity'] < SUGGEST_BELOW:
+            chapters = {c: self.fetcher.chapter(book, c)
+                        for c in range(max(1, chapter - NEARBY_CHAPTERS), chapter + NEARBY_CHAPTERS + 1)}
+            suggestion = suggest_reference(devotional_text, book, chapters, diagnosis['similarity'])
+            if suggestion:
+                diagnosis['suggestion'] = suggestion
+
+        return diagnosis
+
+    def audit_devotional_file(self, file_path: Path, devotionals: Optional[List[Dict]] = None) -> Dict:
         """Audit all verses in a single devotional file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            devotionals = json.load(f)
+        if devotionals is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                devotionals = json.load(f)
 
         file_results = {
             'file': file_path.name,
@@ -208,11 +422,16 @@ class VerseAuditor:
                 'reference': reference,
                 'status': 'mismatch',
                 'devotional_text': devotional_text,
-                'database_text': db_text
+                'database_text': db_text,
+                'diagnosis': self.diagnose_mismatch(devotional_text, db_text, book, chapter)
             }
 
-    def run_full_audit(self) -> Dict:
-        """Run complete audit on all devotional files."""
+    def run_full_audit(self, cache: Optional[AuditCache] = None) -> Dict:
+        """
+        Run complete audit on all devotional files.
+        With a cache, files whose content and referenced database rows are
+        unchanged since the last run are merged in from the cache.
+        """
         self.connect_db()
 
         results = {
@@ -224,11 +443,34 @@ class VerseAuditor:
             'files': []
         }
 
-        devotional_files = sorted(Path(self.devotionals_dir).glob('*.json'))
+        contents = {}
+        for file_path in sorted(Path(self.devotionals_dir).glob('*.json')):
+            with open(file_path, 'rb') as f:
+                contents[file_path] = f.read()
+        hashes = {file_path: hashlib.sha256(data).hexdigest() for file_path, data in contents.items()}
+
+        cached_results = self._load_cached_results(cache, hashes) if cache else {}
+
+        devotional_files = {file_path: json.loads(data)
+                            for file_path, data in contents.items() if file_path not in cached_results}
+
+        if devotional_files:
+            self.preload_verses(devotional_files)
+        if cache:
+            print(f"♻️  Reused {len(cached_results)}/{len(contents)} files from cache")
 
-        for file_path in devotional_files:
-            print(f"\n📖 Auditing: {file_path.name}")
-            file_results = self.audit_devotional_file(file_path)
+        for file_path in contents:
+            if file_path in cached_results:
+                file_results = cached_results[file_path]
+            else:
+                print(f"\n📖 Auditing: {file_path.name}")
+                file_results = self.audit_devotional_file(file_path, devotional_files[file_path])
+
+                if cache:
+                    keys = [self.parse_reference(detail['reference']) for detail in file_results['details']]
+                    db_hash = hash_verse_texts((key for key in keys if key), self.verse_texts)
+                    cache.store_file(self.language, str(file_path), hashes[file_path], db_hash,
+                                     file_results, keys)
 
             results['files'].append(file_results)
             results['total_files'] += 1
@@ -237,15 +479,46 @@ class VerseAuditor:
             results['total_mismatches'] += file_results['mismatches']
             results['total_errors'] += file_results['errors']
 
-            print(f"  ✅ Matches: {file_results['matches']}")
-            print(f"  ❌ Mismatches: {file_results['mismatches']}")
-            print(f"  ⚠️  Errors: {file_results['errors']}")
+            if file_path not in cached_results:
+                print(f"  ✅ Matches: {file_results['matches']}")
+                print(f"  ❌ Mismatches: {file_results['mismatches']}")
+                print(f"  ⚠️  Errors: {file_results['errors']}")
+
+        if cache:
+            cache.forget_missing(self.language, (str(file_path) for file_path in contents))
+            cache.record_database(self.language, self.db_path)
+            cache.commit()
 
         self.close_db()
         return results
 
-    def generate_report(self, results: Dict, output_file: str = 'verse_audit_report.json'):
+    def _load_cached_results(self, cache: AuditCache, hashes: Dict[Path, str]) -> Dict[Path, Dict]:
+        """Cached results for files whose content and referenced rows are unchanged."""
+        cached = cache.files(self.language)
+        unchanged = {file_path: cached[str(file_path)] for file_path, sha in hashes.items()
+                     if str(file_path) in cached and cached[str(file_path)][0] == sha}
+
+        if unchanged and not cache.database_unchanged(self.language, self.db_path):
+            # The database changed: re-fingerprint the rows each file references
+            # with one query, and only keep files whose rows hash the same
+            file_keys = {file_path: cache.entry_keys(self.language, str(file_path))
+                         for file_path in unchanged}
+            verse_texts = VerseResolver(self.conn).resolve(
+                key for keys in file_keys.values() for key in keys
+            )
+            for file_path, keys in file_keys.items():
+                db_hash = hash_verse_texts(keys, verse_texts)
+                if db_hash != unchanged[file_path][2]:
+                    del unchanged[file_path]
+
+        return {file_path: cache.file_results(self.language, str(file_path), count)
+                for file_path, (_, count, _) in unchanged.items()}
+
+    def generate_report(self, results: Dict, output_file: Optional[str] = None):
         """Generate detailed audit report."""
+        if output_file is None:
+            output_file = REPORT_PATH if self.language == DEFAULT_LANGUAGE \
+                else LANGUAGE_REPORT_PATH.format(language=self.language)
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
 
@@ -259,6 +532,17 @@ class VerseAuditor:
         print(f"⚠️  Errors (unparseable): {results['total_errors']}")
         print(f"\nMatch Rate: {results['total_matches'] / results['total_verses'] * 100:.1f}%")
 
+        mismatches = [detail for file_result in results['files']
+                      for detail in file_result['details'] if detail['status'] == 'mismatch']
+        categories = {}
+        for detail in mismatches:
+            category = detail.get('diagnosis', {}).get('category', 'unknown')
+            categories[category] = categories.get(category, 0) + 1
+        if categories:
+            print("\nMismatches by kind: " +
+                  ", ".join(f"{category} {count}" for category, count in
+                            sorted(categories.items(), key=lambda item: -item[1])))
+
         # Show all mismatches
         if results['total_mismatches'] > 0:
             print("\n" + "="*70)
@@ -273,12 +557,36 @@ class VerseAuditor:
                         print(f"   Devotional: {detail['devotional_text'][:150]}")
                         print(f"   Database:   {detail['database_text'][:150]}")
 
+                        diagnosis = detail.get('diagnosis')
+                        if diagnosis:
+                            print(f"   Kind:       {diagnosis['category']} "
+                                  f"(similarity {diagnosis['similarity']})")
+                            if diagnosis.get('diff'):
+                                diff = render_diff(detail['devotional_text'], detail['database_text'])
+                                print(f"   Diff:       {diff[:150]}")
+                            if diagnosis.get('suggestion'):
+                                suggestion = diagnosis['suggestion']
+                                print(f"   Suggested:  {suggestion['reference']} "
+                                      f"(similarity {suggestion['similarity']})")
+
         print(f"\n💾 Full report saved to: {output_file}")
         print("="*70)
 
 def main():
-    db_path = 'assets/spanish_bible_rvr1909.db'
-    devotionals_dir = 'assets/devotionals/es'
+    parser = argparse.ArgumentParser(description="Audit devotional verses against the Bible database")
+    parser.add_argument('--lang', choices=sorted(LANGUAGES), default=DEFAULT_LANGUAGE,
+                        help=f"Devotional language to audit (default: {DEFAULT_LANGUAGE})")
+    parser.add_argument('--db', help="Override the Bible database path")
+    parser.add_argument('--devotionals', help="Override the devotionals directory")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-audit files whose content or referenced verses changed")
+    parser.add_argument('--cache', default=CACHE_PATH,
+                        help=f"Cache for --incremental (default: {CACHE_PATH})")
+    args = parser.parse_args()
+
+    default_db, default_dir = LANGUAGES[args.lang]
+    db_path = args.db or default_db
+    devotionals_dir = args.devotionals or default_dir
 
     if not os.path.exists(db_path):
         print(f"❌ Database not found: {db_path}")
@@ -288,9 +596,13 @@ def main():
         print(f"❌ Devotionals directory not found: {devotionals_dir}")
         return
 
-    auditor = VerseAuditor(db_path, devotionals_dir)
-    results = auditor.run_full_audit()
+    cache = AuditCache(args.cache) if args.incremental else None
+    auditor = VerseAuditor(db_path, devotionals_dir, args.lang)
+    results = auditor.run_full_audit(cache)
     auditor.generate_report(results)
 
+    if cache:
+        cache.close()
+
 if __name__ == '__main__':
     main()
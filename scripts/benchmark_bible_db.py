@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Benchmark a Bible database under the app's real query shapes and gate on
+query plans.
+
+Shapes are taken from the Dart services and run against whichever schema
+the file has: the compiled app schema (bible_verses) or the builder schema
+(verses) of assets/bible.db:
+
+    fts search       UnifiedVerseService.searchVerses: MATCH + snippet() + rank
+    loader copy      BibleLoaderService's full copy of a builder asset (builder schema only)
+    chapter          BibleChapterService.getChapter
+    reference        one verse by book/chapter/verse
+    theme search     UnifiedVerseService.searchByTheme (themes LIKE, a known scan)
+    theme pick       theme_postings random pick, when the table exists
+    chapter blob     chapter_blobs point read, when the table exists
+    daily verse      todaysVerseProvider: daily_verse_schedule by (month, day, language)
+
+Each shape is timed warm (one open connection) and cold (a new connection
+per run, with the file dropped from the OS page cache where
+posix_fadvise is available), and reported as p50/p95.
+
+The plan gate runs EXPLAIN QUERY PLAN for every shape and fails when an
+indexed shape scans a table, or when a shape scans a table that it only
+searched in the snapshot (--snapshot, written with --update-snapshot).
+Tables under SMALL_TABLE_ROWS rows are exempt; the planner rightly scans them.
+
+Usage:
+    python3 benchmark_bible_db.py                              # ../assets/bible.db
+    python3 benchmark_bible_db.py --db ../assets/app_bible.db --update-snapshot
+    python3 benchmark_bible_db.py --db ../assets/app_bible.db --plans-only
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DB_PATH = "../assets/bible.db"
+
+WARM_RUNS = 50
+COLD_RUNS = 10
+
+# A SCAN of a table smaller than this is not treated as a regression
+SMALL_TABLE_ROWS = 100
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE)')
+WORD_PATTERN = re.compile(r'\w{4,}')
+ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)', re.IGNORECASE)
+SQL_KEYWORDS = {'ON', 'WHERE', 'JOIN', 'ORDER', 'LIMIT', 'GROUP', 'USING', 'INNER', 'LEFT', 'CROSS'}
+
+
+class Shape(NamedTuple):
+    name: str
+    sql: str
+    params: Tuple
+    indexed: bool  # must not scan a table
+
+
+def table_names(conn: sqlite3.Connection) -> set:
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def fts_module(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+    match = re.search(r'USING\s+(\w+)', row[0], re.IGNORECASE) if row else None
+    return match.group(1).lower() if match else None
+
+
+def common_word(conn: sqlite3.Connection, sql: str) -> str:
+    """Most frequent 4+ letter word in a sample of verse texts, as an FTS term."""
+    words = Counter(word.lower() for (text,) in conn.execute(sql) for word in WORD_PATTERN.findall(text or ''))
+    return words.most_common(1)[0][0] if words else 'god'
+
+
+def theme_name(conn: sqlite3.Connection, tables: set, language: str) -> str:
+    if 'theme_counts' in tables:
+        row = conn.execute(
+            "SELECT name FROM theme_counts WHERE language = ? ORDER BY count DESC LIMIT 1", (language,)
+        ).fetchone()
+        if row:
+            return row[0]
+    return 'hope'
+
+
+def fts_shape(conn: sqlite3.Connection, fts: str, content: str, columns: str, term: str) -> Shape:
+    """searchVerses as the app writes it; FTS4 has no rank and a different snippet()."""
+    if fts_module(conn, fts) == 'fts5':
+        snippet, order = f"snippet({fts}, 0, '<mark>', '</mark>', '...', 32), rank", 'rank, RANDOM()'
+    else:
+        snippet, order = f"snippet({fts}, '<mark>', '</mark>', '...', -1, 32)", 'RANDOM()'
+    return Shape('fts search', f'''
+        SELECT {columns}, {snippet}
+        FROM {fts} JOIN {content} v ON {fts}.rowid = v.id
+        WHERE {fts} MATCH ?
+        ORDER BY {order}
+        LIMIT 20
+    ''', (term,), True)
+
+
+def app_shapes(conn: sqlite3.Connection) -> List[Shape]:
+    """Shapes for the compiled app schema (compile_app_bible_db.py)."""
+    tables = table_names(conn)
+    version, language, book, chapter, verse = conn.execute(
+        "SELECT version, language, book, chapter, verse FROM bible_verses ORDER BY id LIMIT 1"
+    ).fetchone()
+    columns = 'v.id, v.book, v.chapter, v.verse, v.text, v.version, v.language, v.themes, v.category, v.reference'
+    shapes = [
+        fts_shape(conn, 'bible_verses_fts', 'bible_verses', columns,
+                  common_word(conn, "SELECT text FROM bible_verses ORDER BY id LIMIT 500")),
+        Shape('chapter', '''
+            SELECT * FROM bible_verses
+            WHERE book = ? AND chapter = ? AND version = ? AND language = ?
+            ORDER BY verse ASC
+        ''', (book, chapter, version, language), True),
+        Shape('reference', '''
+            SELECT * FROM bible_verses
+            WHERE book = ? AND chapter = ? AND verse = ? AND version = ? AND language = ?
+        ''', (book, chapter, verse, version, language), True),
+    ]
+
+    theme = theme_name(conn, tables, language)
+    shapes.append(Shape('theme search', f'''
+        SELECT {columns.replace('v.', '')} FROM bible_verses
+        WHERE themes LIKE ? OR category LIKE ? OR text LIKE ?
+        ORDER BY RANDOM()
+        LIMIT 20
+    ''', (f'%"{theme}"%', f'%{theme}%', f'%{theme}%'), False))
+
+    if 'theme_postings' in tables:
+        from theme_postings import RANDOM_PICK_SQL
+        shapes.append(Shape('theme pick', RANDOM_PICK_SQL, (theme, language), True))
+
+    if 'chapter_blobs' in tables:
+        row = conn.execute("SELECT book_id, chapter, translation FROM chapter_blobs LIMIT 1").fetchone()
+        shapes.append(Shape('chapter blob', '''
+            SELECT payload FROM chapter_blobs WHERE book_id = ? AND chapter = ? AND translation = ?
+        ''', row, True))
+
+    if 'daily_verse_schedule' in tables:
+        month, day = conn.execute("SELECT month, day FROM daily_verse_schedule LIMIT 1").fetchone() or (1, 1)
+        shapes.append(Shape('daily verse', '''
+            SELECT v.book || ' ' || v.chapter || ':' || v.verse as reference, v.text
+            FROM daily_verse_schedule s
+            JOIN bible_verses v ON s.verse_id = v.id
+            WHERE s.month = ? AND s.day = ? AND v.language = ?
+            LIMIT 1
+        ''', (month, day, language), True))
+
+    return shapes
+
+
+def builder_shapes(conn: sqlite3.Connection) -> List[Shape]:
+    """Shapes for the builder schema (create_web_bible_db.py, the shipped asset)."""
+    tables = table_names(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    text = 'clean_text' if 'clean_text' in columns else 'text'
+    translation, book, chapter, verse = conn.execute(
+        "SELECT translation, book, chapter, verse_number FROM verses ORDER BY id LIMIT 1"
+    ).fetchone()
+
+    # BibleLoaderService copies the whole asset into bible_verses
+    shapes = [Shape('loader copy', f'''
+        SELECT translation, book, chapter, verse_number, {text} FROM verses WHERE translation = ?
+    ''', (translation,), False)]
+    if 'verses_fts' in tables:
+        shapes.append(fts_shape(conn, 'verses_fts', 'verses', f'v.id, v.book, v.chapter, v.verse_number, v.{text}',
+                                common_word(conn, f"SELECT {text} FROM verses ORDER BY id LIMIT 500")))
+    shapes += [
+        Shape('chapter', f'''
+            SELECT verse_number, {text} FROM verses WHERE book = ? AND chapter = ? ORDER BY verse_number
+        ''', (book, chapter), True),
+        Shape('reference', f'''
+            SELECT {text} FROM verses WHERE book = ? AND chapter = ? AND verse_number = ?
+        ''', (book, chapter, verse), True),
+    ]
+    if 'reference' in columns:
+        shapes.append(Shape('reference string', f"SELECT {text} FROM verses WHERE reference = ?",
+                            (f"{book} {chapter}:{verse}",), True))
+
+    theme = theme_name(conn, tables, 'en')
+    if 'themes' in columns:
+        shapes.append(Shape('theme search', f'''
+            SELECT id, reference, {text} FROM verses WHERE themes LIKE ? ORDER BY RANDOM() LIMIT 20
+        ''', (f'%"{theme}"%',), False))
+    if 'theme_postings' in tables:
+        from theme_postings import RANDOM_PICK_SQL
+        shapes.append(Shape('theme pick', RANDOM_PICK_SQL, (theme, 'en'), True))
+
+    if 'daily_verse_schedule' in tables:
+        month, day = conn.execute("SELECT month, day FROM daily_verse_schedule LIMIT 1").fetchone() or (1, 1)
+        shapes.append(Shape('daily verse', f'''
+            SELECT v.book, v.chapter, v.verse_number, v.{text}
+            FROM daily_verse_schedule s JOIN verses v ON s.verse_id = v.id
+            WHERE s.month = ? AND s.day = ?
+            LIMIT 1
+        ''', (month, day), True))
+
+    return shapes
+
+
+def query_shapes(conn: sqlite3.Connection) -> List[Shape]:
+    return app_shapes(conn) if 'bible_verses' in table_names(conn) else builder_shapes(conn)
+
+
+def capture_plans(db_path: str) -> Dict[str, List[str]]:
+    """{shape name: EXPLAIN QUERY PLAN detail lines}."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    plans = {shape.name: [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {shape.sql}', shape.params)]
+             for shape in query_shapes(conn)}
+    conn.close()
+    return plans
+
+
+def scanned_tables(conn: sqlite3.Connection, sql: str, plan: List[str]) -> List[str]:
+    """Tables a plan scans, ignoring FTS virtual tables and tables under SMALL_TABLE_ROWS."""
+    known = table_names(conn)
+    # Plans name tables by their alias (SCAN s), so map aliases back for the size check
+    aliases = {alias: table for table, alias in ALIAS_PATTERN.findall(sql)
+               if table in known and alias.upper() not in SQL_KEYWORDS}
+
+    scans = []
+    for line in plan:
+        match = SCAN_PATTERN.match(line)
+        if not match:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table not in known or conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] >= SMALL_TABLE_ROWS:
+            scans.append(table)
+    return scans
+
+
+def plan_regressions(db_path: str, baseline: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    """
+    Problems with the query plans of db_path: indexed shapes that scan, and
+    shapes that scan a table they didn't scan in `baseline`.
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    shapes = {shape.name: shape for shape in query_shapes(conn)}
+    plans = capture_plans(db_path)
+
+    problems = []
+    for name, plan in plans.items():
+        scans = scanned_tables(conn, shapes[name].sql, plan)
+        if shapes[name].indexed and scans:
+            problems.append(f"{name}: scans {', '.join(scans)} ({' / '.join(plan)})")
+        elif baseline and name in baseline:
+            before = set(scanned_tables(conn, shapes[name].sql, baseline[name]))
+            new_scans = [table for table in scans if table not in before]
+            if new_scans:
+                problems.append(f"{name}: now scans {', '.join(new_scans)} (was: {' / '.join(baseline[name])})")
+    conn.close()
+    return problems
+
+
+def snapshot_path_for(db_path: str) -> str:
+    return f"{os.path.splitext(db_path)[0]}.query_plans.json"
+
+
+def load_snapshot(db_path: str, snapshot_path: Optional[str] = None) -> Optional[Dict[str, List[str]]]:
+    """The saved plans for db_path, or None when no snapshot exists."""
+    path = snapshot_path or snapshot_path_for(db_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def evict_from_page_cache(db_path: str) -> bool:
+    """Ask the OS to drop the file's cached pages; False where unsupported."""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    fd = os.open(db_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def run_benchmark(db_path: str, warm_runs: int = WARM_RUNS, cold_runs: int = COLD_RUNS) -> Dict[str, Dict]:
+    """{shape: {'rows', 'warm': [ms], 'cold': [ms]}} for every query shape."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    shapes = query_shapes(conn)
+
+    results = {}
+    for shape in shapes:
+        rows = len(conn.execute(shape.sql, shape.params).fetchall())
+        warm = []
+        for _ in range(warm_runs):
+            start_time = time.perf_counter()
+            conn.execute(shape.sql, shape.params).fetchall()
+            warm.append((time.perf_counter() - start_time) * 1000)
+        results[shape.name] = {'rows': rows, 'warm': warm, 'cold': []}
+    conn.close()
+
+    # Cold: new connection (empty SQLite cache, schema re-read) and OS cache dropped
+    for shape in shapes:
+        for _ in range(cold_runs):
+            evict_from_page_cache(db_path)
+            start_time = time.perf_counter()
+            cold_conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+            cold_conn.execute(shape.sql, shape.params).fetchall()
+            results[shape.name]['cold'].append((time.perf_counter() - start_time) * 1000)
+            cold_conn.close()
+
+    return results
+
+
+def print_results(results: Dict[str, Dict], plans: Dict[str, List[str]]):
+    print(f"\n   {'shape':16} {'rows':>5} {'warm p50':>10} {'warm p95':>10} {'cold p50':>10} {'cold p95':>10}")
+    for name, result in results.items():
+        timings = [percentile(result[mode], fraction) for mode in ('warm', 'cold') for fraction in (0.5, 0.95)]
+        print(f"   {name:16} {result['rows']:>5} " + ' '.join(f"{ms:>7.3f} ms" for ms in timings))
+
+    print("\n🧭 Query plans:")
+    for name, plan in plans.items():
+        print(f"   {name}")
+        for line in plan:
+            print(f"      {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a Bible database and gate on query plans")
+    parser.add_argument('--db', default=DB_PATH, help=f"Database to benchmark (default: {DB_PATH})")
+    parser.add_argument('--runs', type=int, default=WARM_RUNS, help=f"Warm runs per shape (default: {WARM_RUNS})")
+    parser.add_argument('--cold-runs', type=int, default=COLD_RUNS,
+                        help=f"Cold runs per shape (default: {COLD_RUNS})")
+    parser.add_argument('--snapshot', help="Plan snapshot JSON (default: <db>.query_plans.json)")
+    parser.add_argument('--update-snapshot', action='store_true', help="Write the current plans as the snapshot")
+    parser.add_argument('--plans-only', action='store_true', help="Only run the plan gate, no timings")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    snapshot_path = args.snapshot or snapshot_path_for(args.db)
+    baseline = None if args.update_snapshot else load_snapshot(args.db, snapshot_path)
+
+    plans = capture_plans(args.db)
+
+    if not args.plans_only:
+        print(f"⏱️  Benchmarking {args.db} ({args.runs} warm / {args.cold_runs} cold runs per shape)")
+        if not hasattr(os, 'posix_fadvise'):
+            print("  ⚠️  posix_fadvise unavailable: cold runs only start with an empty SQLite cache")
+        print_results(run_benchmark(args.db, args.runs, args.cold_runs), plans)
+
+    problems = plan_regressions(args.db, baseline)
+
+    # Plans that changed without scanning (e.g. a different index) are worth a look, not a failure
+    for name, plan in plans.items():
+        if baseline and name in baseline and baseline[name] != plan \
+                and not any(problem.startswith(f"{name}:") for problem in problems):
+            print(f"\n  ⚠️  {name} plan changed:")
+            print(f"      was: {' / '.join(baseline[name])}")
+            print(f"      now: {' / '.join(plan)}")
+
+    if args.update_snapshot:
+        with open(snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(plans, f, indent=2, ensure_ascii=False)
+        print(f"\n📸 Wrote plan snapshot to {snapshot_path}")
+
+    if problems:
+        print("\n❌ Query plan regressions:")
+        for problem in problems:
+            print(f"   - {problem}")
+        sys.exit(1)
+
+    print(f"\n✅ {len(plans)} query plans OK" + (f" (compared with {snapshot_path})" if baseline else ""))
+
+
+if __name__ == '__main__':
+    main()
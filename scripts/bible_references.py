@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Shared Bible reference parser for the audit, update and build scripts.
+
+Parses references such as "John 3:16", "Mateo 2:1-2, 9-10",
+"John 3:16-4:2", "Salmo 23", "Judas 3" or "1 Cor 13:4-7; 14:1" using the
+English, Spanish and abbreviated book names from assets/data/bible_books.json,
+and returns them as ranges of canonical integer verse ids:
+
+    vid = book_id * 1_000_000 + chapter * 1_000 + verse     (BBCCCVVV)
+
+Parsed results are memoized, so re-parsing the same reference is free.
+
+Usage:
+    python3 bible_references.py "John 3:16-4:2" "Salmos 23"
+"""
+
+import json
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BOOKS_PATH = Path(__file__).resolve().parent.parent / 'assets/data/bible_books.json'
+
+with open(BOOKS_PATH, 'r', encoding='utf-8') as f:
+    BOOKS = json.load(f)['books']
+
+BOOKS_BY_ID = {book['id']: book for book in BOOKS}
+
+# Common names that are not in bible_books.json
+BOOK_ALIASES = {
+    'psalm': 19, 'salmo': 19,
+    'song of songs': 22, 'cantar de los cantares': 22,
+    'phil': 50, 'fil': 50,
+    'revelations': 66,
+}
+
+# Highest verse number a whole-chapter reference can span
+MAX_VERSE = 999
+
+VerseRange = Tuple[int, int]
+
+
+class ParsedReference(NamedTuple):
+    """A parsed reference: one book and its inclusive verse-id ranges."""
+    book_id: int
+    ranges: Tuple[VerseRange, ...]
+
+    @property
+    def is_single_verse(self) -> bool:
+        return len(self.ranges) == 1 and self.ranges[0][0] == self.ranges[0][1]
+
+    @property
+    def is_single_chapter(self) -> bool:
+        chapters = {split_vid(vid)[1] for vid_range in self.ranges for vid in vid_range}
+        return len(chapters) == 1
+
+    def chapter_verses(self) -> Optional[Tuple[int, List[int]]]:
+        """Return (chapter, [verse, ...]) if every range sits in one chapter, else None."""
+        if not self.is_single_chapter:
+            return None
+
+        chapter = split_vid(self.ranges[0][0])[1]
+        verses = []
+        for start, end in self.ranges:
+            verses.extend(range(split_vid(start)[2], split_vid(end)[2] + 1))
+        return chapter, verses
+
+
+def make_vid(book_id: int, chapter: int, verse: int) -> int:
+    """Pack a (book, chapter, verse) triple into a BBCCCVVV integer."""
+    return book_id * 1_000_000 + chapter * 1_000 + verse
+
+
+def split_vid(vid: int) -> Tuple[int, int, int]:
+    """Unpack a BBCCCVVV integer into (book_id, chapter, verse)."""
+    return vid // 1_000_000, vid // 1_000 % 1_000, vid % 1_000
+
+
+def normalize_name(name: str) -> str:
+    """Case-, accent-, period- and spacing-insensitive key for a book name."""
+    decomposed = unicodedata.normalize('NFKD', name.lower())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    stripped = re.sub(r'^([1-3])(?=[a-z])', r'\1 ', stripped.replace('.', ''))
+    return ' '.join(stripped.split())
+
+
+def _build_book_index() -> Dict[str, int]:
+    """Map every accepted book-name key to its book id."""
+    index = {}
+
+    # Unique prefixes (3+ letters) of full names: "gen", "rom", "1 cor"
+    prefixes: Dict[str, set] = {}
+    for book in BOOKS:
+        for name in (book['englishName'], book['spanishName']):
+            key = normalize_name(name)
+            for length in range(3, len(key)):
+                prefixes.setdefault(key[:length], set()).add(book['id'])
+    index.update({prefix: next(iter(ids)) for prefix, ids in prefixes.items() if len(ids) == 1})
+
+    # The app's own abbreviations ("Ge", "1Co", "Jh")
+    index.update({normalize_name(book['abbreviation']): book['id'] for book in BOOKS})
+
+    # Full names and aliases always win
+    index.update({normalize_name(name): book_id for name, book_id in BOOK_ALIASES.items()})
+    for book in BOOKS:
+        index[normalize_name(book['englishName'])] = book['id']
+        index[normalize_name(book['spanishName'])] = book['id']
+
+    return index
+
+
+BOOK_INDEX = _build_book_index()
+
+REFERENCE_PATTERN = re.compile(r'''
+    ^\s*
+    (?P<book>(?:[1-3]\s*)?[^\W\d][^\d]*?)   # "John", "1 Juan", "Song of Solomon", "1Co"
+    \.?\s*
+    (?P<passage>\d[\d\s:,;.\-–—]*?)
+    \s*$
+''', re.VERBOSE)
+
+SEGMENT_PATTERN = re.compile(r'''
+    ^(?:(?P<chapter>\d+)\s*[:.]\s*)?(?P<start>\d+)
+    (?:\s*[-–—]\s*(?:(?P<end_chapter>\d+)\s*[:.]\s*)?(?P<end>\d+))?$
+''', re.VERBOSE)
+
+
+def lookup_book(name: str) -> Optional[int]:
+    """Return the book id for an English, Spanish or abbreviated name."""
+    return BOOK_INDEX.get(normalize_name(name))
+
+
+def book_name(book_id: int, language: str = 'en') -> str:
+    """Database book name for a book id: English (WEB) or Spanish (RVR1909)."""
+    book = BOOKS_BY_ID[book_id]
+    return book['spanishName'] if language == 'es' else book['englishName']
+
+
+def _parse_passage(book_id: int, passage: str) -> Optional[Tuple[VerseRange, ...]]:
+    chapter_count = BOOKS_BY_ID[book_id]['chapters']
+    ranges = []
+    chapter = None
+
+    # Segments: "3:16", "16-18", "16-4:2"; ';' starts a new chapter context.
+    # In one-chapter books a bare number is a verse: "Jude 3" is Jude 1:3.
+    for group in re.split(r'\s*;\s*', passage.strip(' ,;')):
+        verse_context = None
+        if chapter_count == 1:
+            chapter = verse_context = 1
+        for segment in re.split(r'\s*,\s*', group):
+            match = SEGMENT_PATTERN.match(segment)
+            if not match:
+                return None
+
+            start, end = int(match.group('start')), match.group('end')
+            end_chapter = match.group('end_chapter')
+
+            if match.group('chapter'):
+                chapter = verse_context = int(match.group('chapter'))
+            elif verse_context is None:
+                # No chapter:verse yet in this group - whole chapter(s)
+                if end_chapter:
+                    return None
+                first, last = start, int(end) if end else start
+                if not 1 <= first <= last <= chapter_count:
+                    return None
+                ranges.append((make_vid(book_id, first, 1), make_vid(book_id, last, MAX_VERSE)))
+                chapter = last
+                continue
+
+            last_chapter = int(end_chapter) if end_chapter else chapter
+            last_verse = int(end) if end else start
+
+            if not 1 <= chapter <= last_chapter <= chapter_count:
+                return None
+            if start < 1 or last_verse < 1 or last_verse > MAX_VERSE or start > MAX_VERSE:
+                return None
+
+            first_vid = make_vid(book_id, chapter, start)
+            last_vid = make_vid(book_id, last_chapter, last_verse)
+            if last_vid < first_vid:
+                return None
+
+            ranges.append((first_vid, last_vid))
+            chapter = verse_context = last_chapter
+
+    return tuple(ranges) if ranges else None
+
+
+@lru_cache(maxsize=8192)
+def parse_reference(reference: str) -> Optional[ParsedReference]:
+    """
+    Parse a reference into a ParsedReference of inclusive verse-id ranges.
+    Returns None if the book is unknown or the passage is malformed.
+    """
+    match = REFERENCE_PATTERN.match(reference)
+    if not match:
+        return None
+
+    book_id = lookup_book(match.group('book'))
+    if book_id is None:
+        return None
+
+    ranges = _parse_passage(book_id, match.group('passage'))
+    if ranges is None:
+        return None
+
+    return ParsedReference(book_id, ranges)
+
+
+def format_vid(vid: int, language: str = 'en') -> str:
+    """Human-readable reference for a verse id, e.g. 43003016 -> "John 3:16"."""
+    book_id, chapter, verse = split_vid(vid)
+    return f"{book_name(book_id, language)} {chapter}:{verse}"
+
+
+def main():
+    for reference in sys.argv[1:]:
+        parsed = parse_reference(reference)
+        if not parsed:
+            print(f"❌ {reference}: could not parse")
+            continue
+
+        ranges = ', '.join(f"{start}-{end}" if start != end else str(start)
+                           for start, end in parsed.ranges)
+        print(f"✅ {reference} -> {book_name(parsed.book_id)} [{ranges}]")
+
+
+if __name__ == '__main__':
+    main()
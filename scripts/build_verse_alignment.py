@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Build the WEB <-> RVR1909 verse alignment artifact.
+
+Both Bible databases are read once and joined on the canonical verse id
+(vid = book_id * 10^6 + chapter * 10^3 + verse, see bible_references.py)
+into a single SQLite file:
+
+    verse_alignment(vid, book_id, chapter, verse, en_text, es_text, flags)
+    chapter_versification(book_id, chapter, en_verses, es_verses, flags)
+
+`flags` marks versification differences so bilingual lookups can tell a
+missing verse from a numbering shift:
+
+    1  MISSING_EN         verse exists only in RVR1909
+    2  MISSING_ES         verse exists only in WEB
+    4  COUNT_DIFFERS      the chapter has a different verse count per translation
+    8  PSALM_TITLE        Psalm whose count differs by 1-2 (superscription numbered as a verse)
+
+Usage:
+    python3 build_verse_alignment.py
+    python3 build_verse_alignment.py --web ../assets/bible.db \\
+        --rvr ../assets/spanish_bible_rvr1909.db --output ../assets/verse_alignment.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bible_references import lookup_book, make_vid, split_vid
+from verse_ids import verse_text_sql
+
+WEB_DB_PATH = "../assets/bible.db"
+RVR_DB_PATH = "../assets/spanish_bible_rvr1909.db"
+OUTPUT_PATH = "../assets/verse_alignment.db"
+
+PSALMS_BOOK_ID = 19
+
+MISSING_EN = 1
+MISSING_ES = 2
+COUNT_DIFFERS = 4
+PSALM_TITLE = 8
+
+FLAG_NAMES = {
+    MISSING_EN: 'missing_en',
+    MISSING_ES: 'missing_es',
+    COUNT_DIFFERS: 'count_differs',
+    PSALM_TITLE: 'psalm_title',
+}
+
+
+def read_verses(db_path: str) -> Tuple[Dict[int, str], List[str]]:
+    """
+    Return ({vid: text}, unmapped_books) for one Bible database, reading
+    clean_text where it exists (WEB's text column keeps Strong's markup).
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+
+    book_ids: Dict[str, Optional[int]] = {}
+    verses = {}
+    for book, chapter, verse, text in conn.execute(
+        f"SELECT book, chapter, verse_number, {verse_text_sql(conn)} FROM verses"
+    ):
+        if book not in book_ids:
+            book_ids[book] = lookup_book(book)
+        book_id = book_ids[book]
+        if book_id is not None:
+            verses[make_vid(book_id, chapter, verse)] = text
+
+    conn.close()
+    return verses, sorted(book for book, book_id in book_ids.items() if book_id is None)
+
+
+def chapter_flags(book_id: int, en_count: int, es_count: int) -> int:
+    """Versification flags for a chapter from its per-translation verse counts."""
+    if en_count == es_count:
+        return 0
+
+    flags = COUNT_DIFFERS
+    if book_id == PSALMS_BOOK_ID and en_count and es_count and abs(en_count - es_count) <= 2:
+        flags |= PSALM_TITLE
+    return flags
+
+
+def align(en_verses: Dict[int, str], es_verses: Dict[int, str]):
+    """Yield verse rows and chapter rows for the alignment tables."""
+    counts: Dict[Tuple[int, int], List[int]] = {}
+    for index, verses in ((0, en_verses), (1, es_verses)):
+        for vid in verses:
+            book_id, chapter, _ = split_vid(vid)
+            counts.setdefault((book_id, chapter), [0, 0])[index] += 1
+
+    chapters = {key: chapter_flags(key[0], en_count, es_count)
+                for key, (en_count, es_count) in counts.items()}
+
+    verse_rows = []
+    for vid in sorted(en_verses.keys() | es_verses.keys()):
+        book_id, chapter, verse = split_vid(vid)
+        en_text, es_text = en_verses.get(vid), es_verses.get(vid)
+
+        flags = chapters[(book_id, chapter)]
+        if en_text is None:
+            flags |= MISSING_EN
+        if es_text is None:
+            flags |= MISSING_ES
+
+        verse_rows.append((vid, book_id, chapter, verse, en_text, es_text, flags))
+
+    chapter_rows = [(book_id, chapter, en_count, es_count, chapters[(book_id, chapter)])
+                    for (book_id, chapter), (en_count, es_count) in sorted(counts.items())]
+    return verse_rows, chapter_rows
+
+
+def write_alignment(output_path: str, verse_rows, chapter_rows, sources: Dict[str, str]):
+    """Write the alignment tables to a fresh, vacuumed SQLite file."""
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    conn = sqlite3.connect(output_path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    conn.execute('BEGIN')
+    conn.execute('''
+        CREATE TABLE verse_alignment (
+            vid INTEGER PRIMARY KEY,
+            book_id INTEGER NOT NULL,
+            chapter INTEGER NOT NULL,
+            verse INTEGER NOT NULL,
+            en_text TEXT,
+            es_text TEXT,
+            flags INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE chapter_versification (
+            book_id INTEGER NOT NULL,
+            chapter INTEGER NOT NULL,
+            en_verses INTEGER NOT NULL,
+            es_verses INTEGER NOT NULL,
+            flags INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (book_id, chapter)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE TABLE alignment_metadata (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+
+    conn.executemany('INSERT INTO verse_alignment VALUES (?, ?, ?, ?, ?, ?, ?)', verse_rows)
+    conn.executemany('INSERT INTO chapter_versification VALUES (?, ?, ?, ?, ?)', chapter_rows)
+    conn.executemany('INSERT INTO alignment_metadata VALUES (?, ?)', sorted(sources.items()))
+    conn.execute('COMMIT')
+
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def aligned_range(conn: sqlite3.Connection, start_vid: int, end_vid: int) -> List[Tuple[int, Optional[str], Optional[str], int]]:
+    """Return [(vid, en_text, es_text, flags), ...] for a vid range of the artifact."""
+    return conn.execute(
+        "SELECT vid, en_text, es_text, flags FROM verse_alignment WHERE vid BETWEEN ? AND ? ORDER BY vid",
+        (start_vid, end_vid)
+    ).fetchall()
+
+
+def describe_flags(flags: int) -> List[str]:
+    return [name for bit, name in FLAG_NAMES.items() if flags & bit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the WEB/RVR1909 verse alignment artifact")
+    parser.add_argument('--web', default=WEB_DB_PATH, help=f"WEB database (default: {WEB_DB_PATH})")
+    parser.add_argument('--rvr', default=RVR_DB_PATH, help=f"RVR1909 database (default: {RVR_DB_PATH})")
+    parser.add_argument('--output', default=OUTPUT_PATH, help=f"Output file (default: {OUTPUT_PATH})")
+    args = parser.parse_args()
+
+    for path in (args.web, args.rvr):
+        if not os.path.exists(path):
+            print(f"❌ Database not found: {path}")
+            sys.exit(1)
+
+    start_time = time.time()
+
+    print(f"📖 Reading WEB verses from {args.web}...")
+    en_verses, en_unmapped = read_verses(args.web)
+    print(f"📖 Reading RVR1909 verses from {args.rvr}...")
+    es_verses, es_unmapped = read_verses(args.rvr)
+
+    for label, unmapped in (('WEB', en_unmapped), ('RVR1909', es_unmapped)):
+        if unmapped:
+            print(f"  ⚠️  Unmapped {label} books: {', '.join(unmapped)}")
+
+    print("🔗 Aligning by verse id...")
+    verse_rows, chapter_rows = align(en_verses, es_verses)
+
+    write_alignment(args.output, verse_rows, chapter_rows, {
+        'web_source': os.path.basename(args.web),
+        'rvr_source': os.path.basename(args.rvr),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'verse_count': str(len(verse_rows)),
+    })
+
+    both = sum(1 for row in verse_rows if row[4] is not None and row[5] is not None)
+    flagged_chapters = [row for row in chapter_rows if row[4]]
+    psalm_titles = sum(1 for row in chapter_rows if row[4] & PSALM_TITLE)
+
+    print(f"\n✅ Aligned {len(verse_rows)} verse ids in {time.time() - start_time:.2f}s")
+    print(f"   - In both translations: {both}")
+    print(f"   - WEB only: {sum(1 for row in verse_rows if row[5] is None)}")
+    print(f"   - RVR1909 only: {sum(1 for row in verse_rows if row[4] is None)}")
+    print(f"   - Chapters with versification differences: {len(flagged_chapters)} "
+          f"({psalm_titles} Psalm superscriptions)")
+    print(f"📍 Location: {args.output}")
+    print(f"💾 Size: {os.path.getsize(args.output) / (1024 * 1024):.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
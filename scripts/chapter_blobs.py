@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+One-row-per-chapter verse payloads for single-read chapter rendering.
+
+BibleChapterService loads a chapter as one bible_verses row per verse
+(176 rows for Psalm 119). chapter_blobs stores each chapter of each
+translation as a single BLOB, so opening a chapter is one primary-key read:
+
+    chapter_blobs(book_id, chapter, translation, payload)
+        PRIMARY KEY (book_id, chapter, translation) WITHOUT ROWID
+
+book_id is the bible_books.json id (1-66). The payload format is
+CHAPTER_BLOB_SPEC below; it is printed by compile_app_bible_db.py and
+stored in asset_metadata under 'chapter_blob_format'.
+"""
+
+import sqlite3
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+FORMAT_VERSION = 1
+
+# Largest verse text a u16 length can describe
+MAX_TEXT_BYTES = 0xFFFF
+
+CHAPTER_BLOB_SPEC = f"""\
+chapter_blobs.payload, format {FORMAT_VERSION} (all integers little-endian, unsigned):
+
+  offset  size    field
+  0       1       format version (= {FORMAT_VERSION})
+  1       2       n, number of verses in the chapter
+  3       4 * n   directory: n entries of (u16 verse number, u16 text length in bytes)
+  3+4n    ...     verse texts, UTF-8, concatenated in directory order, no separators
+
+Decoding: read n, walk the directory keeping a running byte offset that
+starts at 3 + 4n; verse i's text is payload[offset, offset + length_i).
+Entries are in ascending verse order. Verse numbers may skip when a
+translation omits a verse."""
+
+HEADER = struct.Struct('<BH')
+ENTRY = struct.Struct('<HH')
+
+
+def encode_chapter(verses: Iterable[Tuple[int, str]]) -> bytes:
+    """Encode [(verse_number, text), ...] (ascending) as a format-1 payload."""
+    directory = bytearray()
+    texts = bytearray()
+    count = 0
+    for verse, text in verses:
+        encoded = text.encode('utf-8')
+        if len(encoded) > MAX_TEXT_BYTES:
+            raise ValueError(f"Verse {verse} is {len(encoded)} bytes; the format allows {MAX_TEXT_BYTES}")
+        directory += ENTRY.pack(verse, len(encoded))
+        texts += encoded
+        count += 1
+    return HEADER.pack(FORMAT_VERSION, count) + bytes(directory) + bytes(texts)
+
+
+def decode_chapter(payload: bytes) -> List[Tuple[int, str]]:
+    """Reference decoder: payload -> [(verse_number, text), ...]."""
+    version, count = HEADER.unpack_from(payload, 0)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported chapter blob format {version}")
+
+    verses = []
+    offset = HEADER.size + ENTRY.size * count
+    for index in range(count):
+        verse, length = ENTRY.unpack_from(payload, HEADER.size + ENTRY.size * index)
+        verses.append((verse, payload[offset:offset + length].decode('utf-8')))
+        offset += length
+    return verses
+
+
+def create_chapter_blob_table(conn: sqlite3.Connection):
+    conn.execute('DROP TABLE IF EXISTS chapter_blobs')
+    conn.execute('''
+        CREATE TABLE chapter_blobs (
+            book_id INTEGER NOT NULL,
+            chapter INTEGER NOT NULL,
+            translation TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (book_id, chapter, translation)
+        ) WITHOUT ROWID
+    ''')
+
+
+def build_chapter_blobs(conn: sqlite3.Connection, verses: Iterable[Tuple[int, int, str, int, str]]) -> Dict:
+    """
+    Write chapter_blobs from (book_id, chapter, translation, verse, text)
+    rows, which may arrive in any order.
+    """
+    chapters: Dict[Tuple[int, int, str], List[Tuple[int, str]]] = {}
+    for book_id, chapter, translation, verse, text in verses:
+        chapters.setdefault((book_id, chapter, translation), []).append((verse, text))
+
+    create_chapter_blob_table(conn)
+    rows = []
+    for key, chapter_verses in sorted(chapters.items()):
+        chapter_verses.sort()
+        rows.append((*key, encode_chapter(chapter_verses)))
+    conn.executemany('INSERT INTO chapter_blobs VALUES (?, ?, ?, ?)', rows)
+
+    return {
+        'chapters': len(rows),
+        'bytes': sum(len(row[3]) for row in rows),
+        'largest': max(((len(row[3]), row[:3]) for row in rows), default=(0, None)),
+    }
+
+
+def read_chapter(conn: sqlite3.Connection, book_id: int, chapter: int, translation: str) -> List[Tuple[int, str]]:
+    """[(verse_number, text), ...] for one chapter, or [] if it isn't stored."""
+    row = conn.execute(
+        'SELECT payload FROM chapter_blobs WHERE book_id = ? AND chapter = ? AND translation = ?',
+        (book_id, chapter, translation)
+    ).fetchone()
+    return decode_chapter(row[0]) if row else []
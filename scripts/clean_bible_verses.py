@@ -5,9 +5,29 @@ Removes Strong's numbers and footnotes from WEB Bible database
 Creates clean_text column for training data
 """
 
-import sqlite3
+import argparse
 import re
+import sqlite3
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+# Rows handed to each clean_batch() call (and each worker process)
+BATCH_SIZE = 2000
+
+# Every markup form we strip, as one alternation so each verse is scanned
+# once. Order matters: footnotes swallow any word markers inside them, and
+# Hebrew/Greek word spans are dropped whole before bare word markers.
+MARKUP_PATTERN = re.compile(r'''
+      \s*\+\s*\d+:\d+\s+(?:\\?\+wh?\*?|[^+])*   # footnote: "+ 1:1 note..." up to next + or end
+    | \\?\+wh\s+\S+?\s*\\?\+wh\*              # original-language word: \+wh אֱלֹהִים\+wh*
+    | \\?\+w\*                                # closing word marker: \+w*
+    | \\?\+w\s*                               # opening word marker: \+w
+    | \|strong="[^"]*"                         # Strong's number: |strong="G1063"
+    | \\[a-z]+\*?                             # any other USFM marker
+    | [*+]                                     # standalone asterisks and pluses
+''', re.VERBOSE)
 
 def clean_verse_text(text):
     """
@@ -20,29 +40,12 @@ def clean_verse_text(text):
     if not text:
         return ''
 
-    # Remove all \+w markers (opening and closing)
-    text = re.sub(r'\\\+w\s*', '', text)
-    text = re.sub(r'\\\+w\*', '', text)
-
-    # Remove remaining +w markers without backslash
-    text = re.sub(r'\+w\s*', '', text)
-    text = re.sub(r'\+w\*', '', text)
-
-    # Remove Strong's numbers
-    text = re.sub(r'\|strong="[HG]\d+"', '', text)
+    # Single pass over the markup, then collapse whitespace
+    return ' '.join(MARKUP_PATTERN.sub('', text).split())
 
-    # Remove footnotes: + N:NN text
-    text = re.sub(r'\s*\+\s*\d+:\d+\s+[^+]*(?=\+|$)', '', text)
-
-    # Remove standalone asterisks and pluses
-    text = re.sub(r'\*', '', text)
-    text = re.sub(r'\+', '', text)
-
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-
-    return text
+def clean_batch(rows: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """Clean a batch of (id, text) rows. Top-level so worker processes can pickle it."""
+    return [(verse_id, clean_verse_text(text)) for verse_id, text in rows]
 
 def add_clean_text_column(db_path):
     """Add clean_text column to verses table"""
@@ -69,8 +72,15 @@ def add_clean_text_column(db_path):
     finally:
         conn.close()
 
-def clean_all_verses(db_path):
-    """Clean all verses in the database"""
+def clean_all_verses(db_path, workers=1):
+    """
+    Clean all verses in the database.
+
+    Rows are cleaned in batches (across `workers` processes when > 1),
+    staged into a temp table with executemany(), and applied with a single
+    UPDATE ... FROM join. Only rows whose clean_text actually changes are
+    written, so re-runs don't churn the FTS triggers.
+    """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
@@ -80,23 +90,44 @@ def clean_all_verses(db_path):
         cursor.execute("SELECT id, text FROM verses")
         verses = cursor.fetchall()
 
-        print(f"Cleaning {len(verses)} verses...")
-        cleaned_count = 0
+        print(f"Cleaning {len(verses)} verses with {workers} worker(s)...")
+        start_time = time.time()
+
+        batches = [verses[i:i + BATCH_SIZE] for i in range(0, len(verses), BATCH_SIZE)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                cleaned_batches = list(executor.map(clean_batch, batches))
+        else:
+            cleaned_batches = [clean_batch(batch) for batch in batches]
 
-        for verse_id, text in verses:
-            clean_text = clean_verse_text(text)
-            cursor.execute(
-                "UPDATE verses SET clean_text = ? WHERE id = ?",
-                (clean_text, verse_id)
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS cleaned_verses (
+                id INTEGER PRIMARY KEY,
+                clean_text TEXT NOT NULL
             )
-            cleaned_count += 1
+        """)
+        cursor.execute("DELETE FROM temp.cleaned_verses")
 
-            if cleaned_count % 1000 == 0:
-                print(f"  Cleaned {cleaned_count}/{len(verses)}...")
-                conn.commit()
+        for batch in cleaned_batches:
+            cursor.executemany(
+                "INSERT INTO temp.cleaned_verses (id, clean_text) VALUES (?, ?)",
+                batch
+            )
+
+        cursor.execute("""
+            UPDATE verses
+            SET clean_text = c.clean_text
+            FROM temp.cleaned_verses AS c
+            WHERE verses.id = c.id
+            AND verses.clean_text IS NOT c.clean_text
+        """)
+        changed_count = cursor.rowcount
 
+        cursor.execute("DROP TABLE temp.cleaned_verses")
         conn.commit()
-        print(f"✓ Cleaned {cleaned_count} verses")
+
+        elapsed = time.time() - start_time
+        print(f"✓ Cleaned {len(verses)} verses ({changed_count} changed) in {elapsed:.2f}s")
 
         return True
     except Exception as e:
@@ -142,7 +173,13 @@ def verify_cleaning(db_path):
     print("\n" + "="*60)
 
 def main():
-    db_path = "../assets/bible.db"
+    parser = argparse.ArgumentParser(description="Create clean_text for a Bible database")
+    parser.add_argument('db_path', nargs='?', default="../assets/bible.db",
+                        help="Database to clean (default: ../assets/bible.db)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Clean batches across N processes (useful for multi-translation DBs)")
+    args = parser.parse_args()
+    db_path = args.db_path
 
     print("WEB Bible Verse Cleaner")
     print("="*60)
@@ -154,7 +191,7 @@ def main():
         sys.exit(1)
 
     # Step 2: Clean all verses
-    if not clean_all_verses(db_path):
+    if not clean_all_verses(db_path, workers=args.workers):
         print("\n✗ Failed to clean verses. Exiting.")
         sys.exit(1)
 
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Compile the Bible asset databases into the app's own schema.
+
+bible.db and spanish_bible_rvr1909.db use the builder schema
+(verses(translation, verse_number, clean_text, ...)), so on first launch
+BibleLoaderService copies both into bible_verses row by row, the FTS
+triggers index every row one at a time, and the Spanish daily schedule is
+matched through a 66-way CASE on book names.
+
+This script does that work at build time and writes one database that
+matches lib/core/database/database_helper.dart exactly:
+
+    bible_verses             + idx_bible_version, idx_bible_book_chapter, idx_bible_search
+    bible_verses_fts         external content, built with 'rebuild' + 'optimize'
+    bible_verses_ai/ad/au    the app's sync triggers
+    daily_verse_schedule     en from bible.db's schedule, es matched by verse id
+    theme_postings           dense-ranked theme -> bible_verses.id (theme_postings.py)
+    chapter_blobs            one payload per chapter and translation (chapter_blobs.py)
+    asset_metadata           build details, including the chapter blob format spec
+
+followed by ANALYZE and VACUUM, then the benchmark_bible_db.py plan gate. Row ids are assigned in (language, vid)
+order so a chapter is a contiguous id range.
+
+The app creates bible_verses_fts with FTS5 on iOS and FTS4 on Android,
+so the FTS module is chosen with --fts (one asset per platform).
+
+Usage:
+    python3 compile_app_bible_db.py
+    python3 compile_app_bible_db.py --fts fts5 --output ../assets/app_bible_ios.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from benchmark_bible_db import load_snapshot, plan_regressions
+from bible_references import lookup_book, make_vid, split_vid
+from chapter_blobs import CHAPTER_BLOB_SPEC, build_chapter_blobs, decode_chapter
+from theme_postings import build_theme_postings
+
+WEB_DB_PATH = "../assets/bible.db"
+RVR_DB_PATH = "../assets/spanish_bible_rvr1909.db"
+OUTPUT_PATH = "../assets/app_bible.db"
+
+# (language, version, text column the app copies) per source database
+SOURCES = {
+    'en': ('WEB', 'clean_text'),
+    'es': ('RVR1909', 'text'),
+}
+
+FTS_MODULES = ('fts4', 'fts5')
+
+# Copied from database_helper.dart _onCreate (schema v20)
+APP_SCHEMA = '''
+    CREATE TABLE bible_verses (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      version TEXT NOT NULL,
+      book TEXT NOT NULL,
+      chapter INTEGER NOT NULL,
+      verse INTEGER NOT NULL,
+      text TEXT NOT NULL,
+      language TEXT NOT NULL,
+      themes TEXT,
+      category TEXT,
+      reference TEXT
+    );
+
+    CREATE TABLE daily_verse_schedule (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      month INTEGER NOT NULL,
+      day INTEGER NOT NULL,
+      verse_id INTEGER NOT NULL,
+      language TEXT DEFAULT 'en',
+      FOREIGN KEY (verse_id) REFERENCES bible_verses (id),
+      UNIQUE(month, day, language)
+    );
+'''
+
+APP_INDEXES = '''
+    CREATE INDEX idx_bible_version ON bible_verses(version);
+    CREATE INDEX idx_bible_book_chapter ON bible_verses(book, chapter);
+    CREATE INDEX idx_bible_search ON bible_verses(book, chapter, verse);
+    CREATE INDEX idx_daily_verse_schedule_date_lang ON daily_verse_schedule(month, day, language);
+'''
+
+APP_FTS_TRIGGERS = '''
+    CREATE TRIGGER bible_verses_ai AFTER INSERT ON bible_verses BEGIN
+      INSERT INTO bible_verses_fts(rowid, book, chapter, verse, text)
+      VALUES (new.id, new.book, new.chapter, new.verse, new.text);
+    END;
+
+    CREATE TRIGGER bible_verses_ad AFTER DELETE ON bible_verses BEGIN
+      DELETE FROM bible_verses_fts WHERE rowid = old.id;
+    END;
+
+    CREATE TRIGGER bible_verses_au AFTER UPDATE ON bible_verses BEGIN
+      DELETE FROM bible_verses_fts WHERE rowid = old.id;
+      INSERT INTO bible_verses_fts(rowid, book, chapter, verse, text)
+      VALUES (new.id, new.book, new.chapter, new.verse, new.text);
+    END;
+'''
+
+# (vid, version, book, chapter, verse, text, themes, reference)
+VerseRow = Tuple[int, str, str, int, int, str, Optional[str], str]
+
+
+def read_source(db_path: str, language: str) -> Tuple[List[VerseRow], Dict[int, int], List[str]]:
+    """
+    Read one builder database in vid order.
+
+    Returns (rows, {source verses.id: vid}, unmapped_books).
+    """
+    version, text_column = SOURCES[language]
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    if text_column not in columns:
+        text_column = 'text'
+    themes_column = 'themes' if 'themes' in columns else 'NULL'
+
+    book_ids: Dict[str, Optional[int]] = {}
+    rows = []
+    source_vids = {}
+    for verse_id, book, chapter, verse, text, themes in conn.execute(f'''
+        SELECT id, book, chapter, verse_number, {text_column}, {themes_column}
+        FROM verses WHERE translation = ?
+    ''', (version,)):
+        if book not in book_ids:
+            book_ids[book] = lookup_book(book)
+        book_id = book_ids[book]
+        if book_id is None:
+            continue
+        vid = make_vid(book_id, chapter, verse)
+        source_vids[verse_id] = vid
+        rows.append((vid, version, book, chapter, verse, text, themes, f"{book} {chapter}:{verse}"))
+
+    conn.close()
+    rows.sort()
+    return rows, source_vids, sorted(book for book, book_id in book_ids.items() if book_id is None)
+
+
+def read_schedule(db_path: str, source_vids: Dict[int, int]) -> Tuple[List[Tuple[int, int, int]], int]:
+    """Return ([(month, day, vid), ...], unresolved) from bible.db's daily_verse_schedule."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    has_schedule = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_verse_schedule'"
+    ).fetchone()
+    rows = conn.execute(
+        "SELECT month, day, verse_id FROM daily_verse_schedule ORDER BY month, day"
+    ).fetchall() if has_schedule else []
+    conn.close()
+
+    schedule = [(month, day, source_vids[verse_id]) for month, day, verse_id in rows if verse_id in source_vids]
+    return schedule, len(rows) - len(schedule)
+
+
+def compile_database(output_path: str, sources: Dict[str, List[VerseRow]],
+                     schedule: List[Tuple[int, int, int]], fts: str) -> Dict:
+    """Write the app-schema database and return build statistics."""
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    conn = sqlite3.connect(output_path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    # executescript() commits first, so scripts run between the bulk transactions
+    conn.executescript(APP_SCHEMA)
+    conn.execute('BEGIN')
+
+    # Insert without indexes or triggers; both are built once afterwards
+    ids: Dict[Tuple[str, int], int] = {}
+    next_id = 1
+    for language, rows in sources.items():
+        batch = []
+        for vid, version, book, chapter, verse, text, themes, reference in rows:
+            ids[(language, vid)] = next_id
+            batch.append((next_id, version, book, chapter, verse, text, language, themes, reference))
+            next_id += 1
+        conn.executemany('''
+            INSERT INTO bible_verses (id, version, book, chapter, verse, text, language, themes, reference)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+
+    # Spanish days use the same verse as the English day, matched by vid
+    schedule_rows = []
+    for language in sources:
+        schedule_rows.extend((month, day, ids[(language, vid)], language)
+                             for month, day, vid in schedule if (language, vid) in ids)
+    conn.executemany(
+        'INSERT INTO daily_verse_schedule (month, day, verse_id, language) VALUES (?, ?, ?, ?)',
+        schedule_rows
+    )
+    postings = build_theme_postings(conn)
+    blobs = build_chapter_blobs(conn, (
+        (split_vid(vid)[0], chapter, version, verse, text)
+        for rows in sources.values()
+        for vid, version, book, chapter, verse, text, themes, reference in rows
+    ))
+
+    conn.execute('CREATE TABLE asset_metadata (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+    conn.executemany('INSERT INTO asset_metadata VALUES (?, ?)', [
+        ('built_at', time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ('chapter_blob_format', CHAPTER_BLOB_SPEC),
+        ('fts_module', fts),
+    ])
+    conn.execute('COMMIT')
+
+    conn.executescript(APP_INDEXES)
+
+    content_rowid = ', content_rowid=id' if fts == 'fts5' else ''
+    conn.execute('BEGIN')
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE bible_verses_fts USING {fts}(
+          book,
+          chapter,
+          verse,
+          text,
+          content=bible_verses{content_rowid}
+        )
+    ''')
+    conn.execute("INSERT INTO bible_verses_fts(bible_verses_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO bible_verses_fts(bible_verses_fts) VALUES ('optimize')")
+    conn.execute('COMMIT')
+    conn.executescript(APP_FTS_TRIGGERS)
+
+    conn.execute('ANALYZE')
+    conn.execute('VACUUM')
+    conn.close()
+
+    return {
+        'verses': next_id - 1,
+        'schedule': len(schedule_rows),
+        'schedule_missing_es': len(schedule) - sum(1 for row in schedule_rows if row[3] == 'es'),
+        'theme_postings': postings['postings'],
+        'chapter_blobs': blobs,
+        'unknown_themes': postings['unknown_themes'],
+    }
+
+
+def check_database(output_path: str) -> List[str]:
+    """Sanity checks on the compiled file; returns a list of problems."""
+    conn = sqlite3.connect(output_path)
+    problems = []
+
+    if conn.execute('PRAGMA integrity_check').fetchone()[0] != 'ok':
+        problems.append('integrity_check failed')
+
+    # Both FTS4 and FTS5 compare the index against bible_verses and raise on mismatch
+    try:
+        conn.execute("INSERT INTO bible_verses_fts(bible_verses_fts) VALUES ('integrity-check')")
+    except sqlite3.DatabaseError as e:
+        problems.append(f'bible_verses_fts integrity-check failed: {e}')
+
+    # Every chapter blob must decode back to exactly the bible_verses rows
+    decoded = Counter(
+        (translation, verse, text)
+        for translation, payload in conn.execute('SELECT translation, payload FROM chapter_blobs')
+        for verse, text in decode_chapter(payload)
+    )
+    if decoded != Counter(conn.execute('SELECT version, verse, text FROM bible_verses')):
+        problems.append('chapter_blobs do not round-trip to bible_verses')
+
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        problems.append('ANALYZE statistics missing')
+
+    conn.close()
+
+    # Gate the build on the app's query plans (and on the saved snapshot, if any)
+    problems.extend(f'query plan: {problem}'
+                    for problem in plan_regressions(output_path, load_snapshot(output_path)))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the Bible assets into the app's bible_verses schema")
+    parser.add_argument('--web', default=WEB_DB_PATH, help=f"WEB database (default: {WEB_DB_PATH})")
+    parser.add_argument('--rvr', default=RVR_DB_PATH, help=f"RVR1909 database (default: {RVR_DB_PATH})")
+    parser.add_argument('--output', default=OUTPUT_PATH, help=f"Output file (default: {OUTPUT_PATH})")
+    parser.add_argument('--fts', choices=FTS_MODULES, default='fts4',
+                        help="FTS module for bible_verses_fts: fts4 (Android, default) or fts5 (iOS)")
+    args = parser.parse_args()
+
+    for path in (args.web, args.rvr):
+        if not os.path.exists(path):
+            print(f"❌ Database not found: {path}")
+            sys.exit(1)
+
+    start_time = time.time()
+
+    print(f"📖 Reading WEB verses from {args.web}...")
+    en_rows, en_ids, en_unmapped = read_source(args.web, 'en')
+    print(f"📖 Reading RVR1909 verses from {args.rvr}...")
+    es_rows, _, es_unmapped = read_source(args.rvr, 'es')
+
+    for label, unmapped in (('WEB', en_unmapped), ('RVR1909', es_unmapped)):
+        if unmapped:
+            print(f"  ⚠️  Unmapped {label} books: {', '.join(unmapped)}")
+
+    schedule, unresolved = read_schedule(args.web, en_ids)
+    if unresolved:
+        print(f"  ⚠️  {unresolved} schedule entries point at unmapped verses")
+
+    print(f"🔨 Compiling {args.output} ({args.fts})...")
+    stats = compile_database(args.output, {'en': en_rows, 'es': es_rows}, schedule, args.fts)
+
+    problems = check_database(args.output)
+    for problem in problems:
+        print(f"  ❌ {problem}")
+
+    print(f"\n✅ Compiled {stats['verses']} verses in {time.time() - start_time:.2f}s")
+    print(f"   - English (WEB): {len(en_rows)}")
+    print(f"   - Spanish (RVR1909): {len(es_rows)}")
+    print(f"   - daily_verse_schedule rows: {stats['schedule']}")
+    print(f"   - theme_postings rows: {stats['theme_postings']}")
+    blobs = stats['chapter_blobs']
+    print(f"   - chapter_blobs: {blobs['chapters']} chapters, {blobs['bytes'] / (1024 * 1024):.2f} MB "
+          f"(largest {blobs['largest'][0]:,} bytes)")
+    if stats['unknown_themes']:
+        print(f"  ⚠️  Themes not in theme_ids.THEMES (skipped): {', '.join(stats['unknown_themes'])}")
+    if stats['schedule_missing_es']:
+        print(f"  ⚠️  {stats['schedule_missing_es']} scheduled verses have no RVR1909 equivalent")
+    print(f"\n📄 {CHAPTER_BLOB_SPEC}\n")
+    print(f"📍 Location: {args.output}")
+    print(f"💾 Size: {os.path.getsize(args.output) / (1024 * 1024):.2f} MB")
+
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,141 +2,357 @@
 """
 Create World English Bible (WEB) SQLite database from raw text
 Downloads from ebible.org (official WEB source)
+
+Usage:
+    python3 create_web_bible_db.py                  # download and build
+    python3 create_web_bible_db.py --zip web.zip    # build from a local USFM zip
+    python3 create_web_bible_db.py --rebuild-fts    # re-sync verses_fts from verses
+    python3 create_web_bible_db.py --optimize-fts   # merge FTS b-tree segments
 """
 
+import argparse
+import io
+import os
+import re
+import shutil
 import sqlite3
+import sys
+import tempfile
+import time
 import urllib.request
-import re
+import zipfile
+from itertools import islice
+from typing import Iterable, Iterator, Tuple
 
-print("📖 Downloading World English Bible (WEB) from ebible.org...")
+from clean_bible_verses import clean_verse_text
+from verse_ids import assign_verse_ids
 
 # Download WEB Bible in USFM format (most parseable)
-url = "https://ebible.org/Scriptures/engwebp_usfm.zip"
+URL = "https://ebible.org/Scriptures/engwebp_usfm.zip"
+DB_PATH = "../assets/bible.db"
 
-try:
-    import zipfile
-    import io
+# Rows per executemany() call while loading
+BATCH_SIZE = 2000
+
+VERSE_PATTERN = re.compile(r'\\v (\d+)(.+)')
+USFM_MARKER_PATTERN = re.compile(r'\\[a-z]+\*?')
+
+VerseRow = Tuple[str, int, int, str]
+
+
+def iter_usfm_verses(z: zipfile.ZipFile) -> Iterator[VerseRow]:
+    """
+    Stream (book, chapter, verse, text) tuples from the USFM members of a zip.
+    Each member is decoded line by line, so no book is held in memory.
+    """
+    usfm_files = sorted(f for f in z.namelist() if f.endswith('.usfm'))
+
+    for usfm_file in usfm_files:
+        # Book name comes from the \h tag in the header, before any \c
+        book_name = usfm_file.replace('.usfm', '')
+        current_chapter = 0
+
+        with z.open(usfm_file) as raw:
+            for line in io.TextIOWrapper(raw, encoding='utf-8'):
+                # Header marker
+                if line.startswith('\\h ') and current_chapter == 0:
+                    book_name = line[3:].strip()
 
-    print("⬇️  Downloading ZIP file...")
-    with urllib.request.urlopen(url) as response:
-        zip_data = response.read()
-
-    print("📦 Extracting USFM files...")
-    with zipfile.ZipFile(io.BytesIO(zip_data)) as z:
-        # Find all USFM files
-        usfm_files = [f for f in z.namelist() if f.endswith('.usfm')]
-        print(f"Found {len(usfm_files)} Bible books")
-
-        # Create database
-        db_path = "../assets/bible.db"
-        print(f"\n💾 Creating SQLite database at {db_path}...")
-
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Drop existing tables
-        cursor.execute('DROP TABLE IF EXISTS verses')
-        cursor.execute('DROP TABLE IF EXISTS verses_fts')
-
-        # Create verses table
-        cursor.execute('''
-            CREATE TABLE verses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book TEXT NOT NULL,
-                chapter INTEGER NOT NULL,
-                verse_number INTEGER NOT NULL,
-                text TEXT NOT NULL,
-                translation TEXT DEFAULT 'WEB',
-                reference TEXT NOT NULL,
-                themes TEXT
-            )
-        ''')
-
-        # Create FTS table for search
-        cursor.execute('''
-            CREATE VIRTUAL TABLE verses_fts USING fts5(
-                text,
-                content=verses,
-                tokenize='porter ascii'
-            )
-        ''')
-
-        print("📝 Parsing and inserting verses...\n")
-
-        verse_count = 0
-        for usfm_file in sorted(usfm_files):
-            content = z.read(usfm_file).decode('utf-8')
-
-            # Extract book name from \h tag
-            book_match = re.search(r'\\h (.+)', content)
-            book_name = book_match.group(1).strip() if book_match else usfm_file.replace('.usfm', '')
-
-            # Parse chapters and verses
-            current_chapter = 0
-            for line in content.split('\n'):
                 # Chapter marker
-                if line.startswith('\\c '):
+                elif line.startswith('\\c '):
                     current_chapter = int(line.split()[1])
 
                 # Verse marker
                 elif line.startswith('\\v '):
-                    # Extract verse number and text
-                    match = re.match(r'\\v (\d+)(.+)', line)
-                    if match:
-                        verse_num = int(match.group(1))
-                        verse_text = match.group(2).strip()
+                    match = VERSE_PATTERN.match(line)
+                    if not match:
+                        continue
+
+                    verse_num = int(match.group(1))
+
+                    # Clean up USFM markers
+                    verse_text = USFM_MARKER_PATTERN.sub('', match.group(2))
+                    verse_text = ' '.join(verse_text.split())
+
+                    if verse_text and current_chapter > 0:
+                        yield book_name, current_chapter, verse_num, verse_text
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most `size` items."""
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def download_zip(url: str, dest) -> None:
+    """Stream the USFM zip to a file object without buffering it in memory."""
+    with urllib.request.urlopen(url) as response:
+        shutil.copyfileobj(response, dest)
+    dest.flush()
+    dest.seek(0)
+
+
+def create_schema(cursor):
+    """Drop and recreate the verses and verses_fts tables."""
+    cursor.execute('DROP TABLE IF EXISTS verses_fts')
+    cursor.execute('DROP TABLE IF EXISTS verses')
+
+    # Create verses table
+    cursor.execute('''
+        CREATE TABLE verses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book TEXT NOT NULL,
+            chapter INTEGER NOT NULL,
+            verse_number INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            translation TEXT DEFAULT 'WEB',
+            reference TEXT NOT NULL,
+            themes TEXT,
+            clean_text TEXT,
+            vid INTEGER
+        )
+    ''')
+
+
+def create_fts_index(conn):
+    """
+    Create verses_fts as an external-content FTS5 index over verses.clean_text.
+
+    The index is rowid-aligned with verses.id and populated with 'rebuild',
+    then kept in sync by triggers. The update trigger only fires on
+    clean_text, so tagging passes that rewrite `themes` don't touch the index.
+    """
+    conn.execute('DROP TRIGGER IF EXISTS verses_fts_ai')
+    conn.execute('DROP TRIGGER IF EXISTS verses_fts_ad')
+    conn.execute('DROP TRIGGER IF EXISTS verses_fts_au')
+    conn.execute('DROP TABLE IF EXISTS verses_fts')
+
+    # Create FTS table for search (Strong's markup stripped via clean_text)
+    conn.execute('''
+        CREATE VIRTUAL TABLE verses_fts USING fts5(
+            clean_text,
+            content=verses,
+            content_rowid=id,
+            tokenize='porter ascii'
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER verses_fts_ai AFTER INSERT ON verses BEGIN
+            INSERT INTO verses_fts(rowid, clean_text) VALUES (new.id, new.clean_text);
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER verses_fts_ad AFTER DELETE ON verses BEGIN
+            INSERT INTO verses_fts(verses_fts, rowid, clean_text)
+            VALUES ('delete', old.id, old.clean_text);
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER verses_fts_au AFTER UPDATE OF clean_text ON verses BEGIN
+            INSERT INTO verses_fts(verses_fts, rowid, clean_text)
+            VALUES ('delete', old.id, old.clean_text);
+            INSERT INTO verses_fts(rowid, clean_text) VALUES (new.id, new.clean_text);
+        END
+    ''')
+
+    rebuild_fts_index(conn)
 
-                        # Clean up USFM markers
-                        verse_text = re.sub(r'\\[a-z]+\*?', '', verse_text)
-                        verse_text = ' '.join(verse_text.split())
 
-                        if verse_text and current_chapter > 0:
-                            reference = f"{book_name} {current_chapter}:{verse_num}"
+def rebuild_fts_index(conn):
+    """Repopulate verses_fts from the verses table (rowid = verses.id)."""
+    conn.execute("INSERT INTO verses_fts(verses_fts) VALUES ('rebuild')")
 
-                            cursor.execute('''
-                                INSERT INTO verses (book, chapter, verse_number, text, translation, reference)
-                                VALUES (?, ?, ?, ?, 'WEB', ?)
-                            ''', (book_name, current_chapter, verse_num, verse_text, reference))
 
-                            verse_count += 1
+def optimize_fts_index(conn):
+    """Merge all FTS b-tree segments into one for the fastest MATCH queries."""
+    conn.execute("INSERT INTO verses_fts(verses_fts) VALUES ('optimize')")
 
-            print(f"  ✅ {book_name}: {verse_count} total verses so far")
 
-        # Populate FTS index
+def has_current_fts_index(conn) -> bool:
+    """True if verses_fts is the clean_text external-content index with triggers."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'verses_fts'"
+    ).fetchone()
+    if not row or 'content_rowid=id' not in row[0]:
+        return False
+
+    triggers = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'verses'"
+    )}
+    return {'verses_fts_ai', 'verses_fts_ad', 'verses_fts_au'} <= triggers
+
+
+def load_verses(conn, verses: Iterable[VerseRow], batch_size: int = BATCH_SIZE) -> int:
+    """
+    Bulk-insert verses with chunked executemany() inside one transaction.
+    The rollback journal is kept in memory and fsync is switched off for the
+    duration of the load, then both are restored; ROLLBACK still works on
+    error, and a crash mid-build just means rebuilding from the zip.
+    """
+    conn.execute('PRAGMA journal_mode=MEMORY')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    verse_count = 0
+    current_book = None
+    start_time = time.time()
+
+    try:
+        conn.execute('BEGIN')
+        for chunk in chunked(verses, batch_size):
+            conn.executemany('''
+                INSERT INTO verses (book, chapter, verse_number, text, translation, reference, clean_text)
+                VALUES (?, ?, ?, ?, 'WEB', ?, ?)
+            ''', [(book, chapter, verse, text, f"{book} {chapter}:{verse}", clean_verse_text(text))
+                  for book, chapter, verse, text in chunk])
+
+            # Report once per book, at the row where the next book starts
+            for book, _, _, _ in chunk:
+                if book != current_book:
+                    if current_book is not None:
+                        print(f"  ✅ {current_book}: {verse_count} total verses so far")
+                    current_book = book
+                verse_count += 1
+
+        if current_book is not None:
+            print(f"  ✅ {current_book}: {verse_count} total verses so far")
+
+        # Index clean_text in one pass once every row is in place
         print("\n🔍 Building full-text search index...")
-        cursor.execute('INSERT INTO verses_fts(text) SELECT text FROM verses')
+        create_fts_index(conn)
+        optimize_fts_index(conn)
 
         # Create indexes
         print("🔍 Creating indexes...")
-        cursor.execute('CREATE INDEX idx_book_chapter ON verses(book, chapter)')
-        cursor.execute('CREATE INDEX idx_reference ON verses(reference)')
-        cursor.execute('CREATE INDEX idx_book ON verses(book)')
+        conn.execute('CREATE INDEX idx_book_chapter ON verses(book, chapter)')
+        conn.execute('CREATE INDEX idx_reference ON verses(reference)')
+        conn.execute('CREATE INDEX idx_book ON verses(book)')
+
+        unmapped = assign_verse_ids(conn)
+        if unmapped:
+            print(f"  ⚠️  No verse ids for: {', '.join(sorted(unmapped))}")
 
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.execute('PRAGMA journal_mode=DELETE')
+
+    elapsed = time.time() - start_time
+    rate = verse_count / elapsed if elapsed > 0 else 0
+    print(f"⏱️  Loaded {verse_count} verses in {elapsed:.2f}s ({rate:,.0f} verses/sec)")
+
+    return verse_count
+
+
+def build_database(z: zipfile.ZipFile, db_path: str):
+    """Create the WEB database at db_path from an open USFM zip."""
+    print(f"Found {sum(1 for f in z.namelist() if f.endswith('.usfm'))} Bible books")
+
+    print(f"\n💾 Creating SQLite database at {db_path}...")
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+
+    create_schema(cursor)
+
+    print("📝 Parsing and inserting verses...\n")
+    load_verses(conn, iter_usfm_verses(z))
+
+    # Verify
+    cursor.execute('SELECT COUNT(*) FROM verses')
+    total = cursor.fetchone()[0]
+
+    cursor.execute('SELECT COUNT(DISTINCT book) FROM verses')
+    books = cursor.fetchone()[0]
+
+    conn.close()
+
+    print(f"\n✅ Complete!")
+    print(f"📊 Statistics:")
+    print(f"   - Total verses: {total}")
+    print(f"   - Bible books: {books}")
+    print(f"   - Translation: World English Bible (WEB)")
+    print(f"📍 Location: {db_path}")
+
+    # Show database size
+    size_mb = os.path.getsize(db_path) / (1024 * 1024)
+    print(f"💾 Database size: {size_mb:.2f} MB")
+
+
+def maintain_fts_index(db_path: str, rebuild: bool, optimize: bool):
+    """Run FTS maintenance commands against an existing database."""
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(db_path)
+
+    if rebuild:
+        if has_current_fts_index(conn):
+            print("🔍 Rebuilding verses_fts from verses...")
+            rebuild_fts_index(conn)
+        else:
+            # Older builds indexed raw text with misaligned rowids and no triggers
+            print("🔍 Migrating verses_fts to clean_text external-content index...")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(verses)")]
+            if 'clean_text' not in columns:
+                print("❌ verses.clean_text is missing - run clean_bible_verses.py first")
+                conn.close()
+                sys.exit(1)
+            create_fts_index(conn)
+
+    if optimize:
+        print("🔍 Optimizing verses_fts...")
+        optimize_fts_index(conn)
+
+    conn.commit()
+    conn.close()
+    print("✅ Full-text search index is up to date")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the WEB Bible SQLite database from USFM")
+    parser.add_argument('--zip', help="Use a local USFM zip instead of downloading")
+    parser.add_argument('--db', default=DB_PATH, help=f"Output database (default: {DB_PATH})")
+    parser.add_argument('--rebuild-fts', action='store_true',
+                        help="Rebuild verses_fts in an existing database and exit")
+    parser.add_argument('--optimize-fts', action='store_true',
+                        help="Optimize verses_fts in an existing database and exit")
+    args = parser.parse_args()
 
-        # Verify
-        cursor.execute('SELECT COUNT(*) FROM verses')
-        total = cursor.fetchone()[0]
+    if args.rebuild_fts or args.optimize_fts:
+        maintain_fts_index(args.db, args.rebuild_fts, args.optimize_fts)
+        return
 
-        cursor.execute('SELECT COUNT(DISTINCT book) FROM verses')
-        books = cursor.fetchone()[0]
+    try:
+        if args.zip:
+            print(f"📦 Reading USFM files from {args.zip}...")
+            with zipfile.ZipFile(args.zip) as z:
+                build_database(z, args.db)
+        else:
+            print("📖 Downloading World English Bible (WEB) from ebible.org...")
+            with tempfile.TemporaryFile() as tmp:
+                print("⬇️  Downloading ZIP file...")
+                download_zip(URL, tmp)
 
-        conn.close()
+                print("📦 Extracting USFM files...")
+                with zipfile.ZipFile(tmp) as z:
+                    build_database(z, args.db)
 
-        print(f"\n✅ Complete!")
-        print(f"📊 Statistics:")
-        print(f"   - Total verses: {total}")
-        print(f"   - Bible books: {books}")
-        print(f"   - Translation: World English Bible (WEB)")
-        print(f"📍 Location: {db_path}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
 
-        # Show database size
-        import os
-        size_mb = os.path.getsize(db_path) / (1024 * 1024)
-        print(f"💾 Database size: {size_mb:.2f} MB")
 
-except Exception as e:
-    print(f"❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Export the verses table to memory-mapped columnar files.
+
+Each column is a raw little-endian array in its own file, described by
+manifest.json:
+
+    vid.u32             canonical verse id (BBCCCVVV)
+    book.u8             book id (bible_books.json)
+    chapter.u16         chapter
+    verse.u16           verse number
+    text_offsets.u32    count + 1 byte offsets into text.utf8
+    text.utf8           clean_text of every verse, one contiguous buffer
+    themes_lo.u64       theme bitmask, bits 0-63  (theme_ids.THEMES)
+    themes_hi.u64       theme bitmask, bits 64-127
+
+VerseColumns maps the files and exposes each column as a zero-copy
+memoryview (or a NumPy view when NumPy is installed), so downstream tools
+can load the whole Bible in milliseconds instead of re-querying SQLite.
+
+Usage:
+    python3 export_verse_columns.py                              # ../assets/bible.db
+    python3 export_verse_columns.py --db bible.db --output verse_columns
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bible_references import lookup_book, make_vid
+from theme_ids import THEME_IDS, THEMES, join_mask, mask_themes, parse_themes, theme_mask
+
+DB_PATH = "../assets/bible.db"
+OUTPUT_DIR = "../assets/verse_columns"
+
+FORMAT_VERSION = 1
+
+# column name -> (file name, array typecode, dtype in the manifest)
+COLUMNS = {
+    'vid': ('vid.u32', 'I', 'uint32'),
+    'book': ('book.u8', 'B', 'uint8'),
+    'chapter': ('chapter.u16', 'H', 'uint16'),
+    'verse': ('verse.u16', 'H', 'uint16'),
+    'text_offsets': ('text_offsets.u32', 'I', 'uint32'),
+    'themes_lo': ('themes_lo.u64', 'Q', 'uint64'),
+    'themes_hi': ('themes_hi.u64', 'Q', 'uint64'),
+}
+TEXT_FILE = 'text.utf8'
+
+# The files are fixed-width; fail loudly on a platform where a typecode differs
+assert {typecode: array(typecode).itemsize for typecode in 'BHIQ'} == {'B': 1, 'H': 2, 'I': 4, 'Q': 8}
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def write_array(path: Path, values: array):
+    """Write an array in little-endian byte order."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    with open(path, 'wb') as f:
+        values.tofile(f)
+
+
+def export_columns(db_path: str, output_dir: str) -> Dict:
+    """Read verses in vid order and write every column file plus manifest.json."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    text_column = 'COALESCE(clean_text, text)' if 'clean_text' in columns else 'text'
+    themes_column = 'themes' if 'themes' in columns else 'NULL'
+
+    rows = []
+    book_ids: Dict[str, Optional[int]] = {}
+    unmapped = set()
+    for book, chapter, verse, text, themes in conn.execute(
+        f"SELECT book, chapter, verse_number, {text_column}, {themes_column} FROM verses"
+    ):
+        if book not in book_ids:
+            book_ids[book] = lookup_book(book)
+        book_id = book_ids[book]
+        if book_id is None:
+            unmapped.add(book)
+            continue
+        rows.append((make_vid(book_id, chapter, verse), book_id, chapter, verse, text, themes))
+    conn.close()
+
+    rows.sort()
+
+    data = {name: array(typecode) for name, (_, typecode, _) in COLUMNS.items()}
+    text_buffer = bytearray()
+    unknown_themes = set()
+
+    data['text_offsets'].append(0)
+    for vid, book_id, chapter, verse, text, themes in rows:
+        data['vid'].append(vid)
+        data['book'].append(book_id)
+        data['chapter'].append(chapter)
+        data['verse'].append(verse)
+
+        text_buffer += text.encode('utf-8')
+        data['text_offsets'].append(len(text_buffer))
+
+        mask, unknown = theme_mask(parse_themes(themes))
+        unknown_themes.update(unknown)
+        data['themes_lo'].append(mask & MASK_64)
+        data['themes_hi'].append(mask >> 64)
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    for name, (file_name, _, _) in COLUMNS.items():
+        write_array(output / file_name, data[name])
+    with open(output / TEXT_FILE, 'wb') as f:
+        f.write(text_buffer)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'count': len(rows),
+        'byte_order': 'little',
+        'source': os.path.basename(db_path),
+        'text_column': text_column,
+        'text_file': TEXT_FILE,
+        'columns': {name: {'file': file_name, 'dtype': dtype}
+                    for name, (file_name, _, dtype) in COLUMNS.items()},
+        'themes': THEMES,
+    }
+    with open(output / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return {
+        'count': len(rows),
+        'unmapped_books': sorted(unmapped),
+        'unknown_themes': sorted(unknown_themes),
+        'bytes': sum((output / name).stat().st_size for name in os.listdir(output)),
+    }
+
+
+class VerseColumns:
+    """
+    Zero-copy reader for an export_verse_columns.py directory.
+
+    Columns are memoryviews over mmapped files; as_numpy() returns NumPy
+    views of the same memory when NumPy is available.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / 'manifest.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest['byte_order'] != sys.byteorder:
+            raise ValueError(f"{path} is {self.manifest['byte_order']}-endian; this machine is {sys.byteorder}")
+
+        self.count = self.manifest['count']
+        self.themes = self.manifest['themes']
+        self._maps: List[mmap.mmap] = []
+
+        self.columns = {}
+        for name, spec in self.manifest['columns'].items():
+            self.columns[name] = self._map(spec['file']).cast(COLUMNS[name][1])
+        self.text_buffer = self._map(self.manifest['text_file'])
+
+    def _map(self, file_name: str) -> memoryview:
+        with open(self.path / file_name, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b'')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def text(self, index: int) -> str:
+        offsets = self.columns['text_offsets']
+        return bytes(self.text_buffer[offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def themes_at(self, index: int) -> List[str]:
+        mask = join_mask(self.columns['themes_lo'][index], self.columns['themes_hi'][index])
+        return mask_themes(mask)
+
+    def with_theme(self, theme: str) -> List[int]:
+        """Row indexes of verses tagged with a theme."""
+        theme_id = THEME_IDS[theme]
+        column = self.columns['themes_lo' if theme_id < 64 else 'themes_hi']
+        bit = 1 << (theme_id % 64)
+        return [index for index, mask in enumerate(column) if mask & bit]
+
+    def as_numpy(self) -> Dict:
+        """NumPy views of every column (requires numpy), plus the raw text buffer."""
+        import numpy as np
+
+        views = {name: np.frombuffer(column, dtype=self.manifest['columns'][name]['dtype'])
+                 for name, column in self.columns.items()}
+        views['text'] = np.frombuffer(self.text_buffer, dtype=np.uint8)
+        return views
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.text_buffer.release()
+        for mapped in self._maps:
+            mapped.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export verses to memory-mapped columnar files")
+    parser.add_argument('--db', default=DB_PATH, help=f"Bible database (default: {DB_PATH})")
+    parser.add_argument('--output', default=OUTPUT_DIR, help=f"Output directory (default: {OUTPUT_DIR})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    print(f"📦 Exporting {args.db} to {args.output}...")
+    start_time = time.time()
+    stats = export_columns(args.db, args.output)
+    print(f"✅ Exported {stats['count']} verses in {time.time() - start_time:.2f}s "
+          f"({stats['bytes'] / (1024 * 1024):.2f} MB)")
+
+    if stats['unmapped_books']:
+        print(f"  ⚠️  Skipped unmapped books: {', '.join(stats['unmapped_books'])}")
+    if stats['unknown_themes']:
+        print(f"  ⚠️  Themes not in theme_ids.THEMES: {', '.join(stats['unknown_themes'])}")
+
+    # Round-trip check: map the files back and time a cold load
+    start_time = time.time()
+    columns = VerseColumns(args.output)
+    load_ms = (time.time() - start_time) * 1000
+    if columns.count:
+        print(f"🔎 Loaded {columns.count} verses in {load_ms:.1f} ms; first: {columns.text(0)[:60]}")
+    columns.close()
+
+
+if __name__ == '__main__':
+    main()
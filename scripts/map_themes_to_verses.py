@@ -4,13 +4,19 @@ Theme-to-Verse Mapping Script
 Maps 75 themes to 25 relevant Bible verses each (1,875 total mappings)
 
 Uses keyword matching and manual curation for theological accuracy.
+Keywords are matched against an in-memory inverted index built in one pass
+over verses.clean_text, weighted by rarity (IDF), and ranked deterministically.
 """
 
 import sqlite3
 import json
+import math
 import re
+import time
 from collections import defaultdict
 
+from theme_mapping_artifact import ARTIFACT_PATH, write_artifact
+
 # Theme keyword mappings for verse search
 THEME_KEYWORDS = {
     # TIER 1: Critical Spiritual (26 themes)
@@ -111,55 +117,216 @@ THEME_KEYWORDS = {
     'identity_in_christ': ['in christ', 'new creation', 'child of god', 'chosen', 'righteous'],
 }
 
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# A keyword word matches itself and its regular inflections ("sin" -> "sins",
+# "sinned", "sinning"; "love" -> "loved", "loving"; "cry" -> "cries"), plus
+# the forms listed in EXTRA_FORMS. Nothing is matched by prefix, so "go"
+# never matches "god", "hear" never matches "heart", "man" never "manner".
+SIBILANT_ENDINGS = ('s', 'x', 'z', 'ch', 'sh', 'o')
+
+# Irregular and derived forms the regular rules can't produce
+EXTRA_FORMS = {
+    'anger': ['angry', 'angered'],
+    'anxious': ['anxiety', 'anxieties'],
+    'believe': ['belief', 'believer', 'believers'],
+    'bind': ['bound', 'binds'],
+    'bitter': ['bitterness', 'bitterly'],
+    'child': ['children'],
+    'choose': ['chose', 'chosen'],
+    'comfort': ['comforter', 'comforters'],
+    'condemn': ['condemnation'],
+    'confess': ['confession'],
+    'covet': ['covetous', 'covetousness'],
+    'deceive': ['deceit', 'deceitful', 'deceiver'],
+    'depress': ['depression'],
+    'discern': ['discernment'],
+    'drunk': ['drunkard', 'drunkards', 'drunkenness', 'drunken'],
+    'envy': ['envious'],
+    'faith': ['faithful', 'faithfulness'],
+    'fight': ['fought'],
+    'flee': ['fled'],
+    'forget': ['forgot', 'forgotten'],
+    'forgive': ['forgave', 'forgiven', 'forgiveness'],
+    'forsake': ['forsook', 'forsaken'],
+    'free': ['freedom'],
+    'generous': ['generosity'],
+    'give': ['gave', 'given'],
+    'go': ['went', 'gone'],
+    'hear': ['heard'],
+    'holy': ['holiness'],
+    'hospitable': ['hospitality'],
+    'infirm': ['infirmity', 'infirmities'],
+    'jealous': ['jealousy'],
+    'judge': ['judgment', 'judgments'],
+    'know': ['knew', 'known'],
+    'lead': ['led'],
+    'lend': ['lent', 'lender'],
+    'man': ['men'],
+    'meditate': ['meditation'],
+    'oppress': ['oppression', 'oppressor', 'oppressors'],
+    'peace': ['peaceful'],
+    'pure': ['purity'],
+    'reconcile': ['reconciliation'],
+    'remember': ['remembrance'],
+    'repent': ['repentance'],
+    'restore': ['restoration'],
+    'righteous': ['righteousness'],
+    'seek': ['sought'],
+    'sin': ['sinner', 'sinners', 'sinful'],
+    'slave': ['slavery'],
+    'sojourn': ['sojourner', 'sojourners'],
+    'sorrow': ['sorrowful'],
+    'speak': ['spoke', 'spoken'],
+    'strength': ['strengthen', 'strengthened', 'strengthens'],
+    'think': ['thought'],
+    'weep': ['wept'],
+    'wicked': ['wickedness'],
+    'woman': ['women'],
+}
+
+# Words of a multi-word keyword must appear in order, at most this many
+# tokens apart ("cast burden" matches "Cast your burden")
+PHRASE_WINDOW = 3
+
+VERSES_PER_THEME = 25
+
 def normalize_text(text):
     """Normalize text for keyword matching"""
     return text.lower().strip()
 
-def search_verses_for_theme(cursor, theme_name, keywords, limit=50):
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+def inflections(word):
+    """A keyword word, its regular -s/-ed/-ing forms and its EXTRA_FORMS"""
+    forms = {word}
+    if len(word) > 2 and word.endswith('y') and word[-2] not in 'aeiou':
+        forms.update({word[:-1] + 'ies', word[:-1] + 'ied', word + 'ing'})
+    elif word.endswith('e'):
+        forms.update({word + 's', word + 'd', word[:-1] + 'ing'})
+    else:
+        forms.add(word + ('es' if word.endswith(SIBILANT_ENDINGS) else 's'))
+        forms.update({word + 'ed', word + 'ing'})
+        # Consonant-vowel-consonant endings double before -ed/-ing ("sin" -> "sinned")
+        if len(word) > 2 and word[-1] not in 'aeiouwxy' and word[-2] in 'aeiou' and word[-3] not in 'aeiou':
+            forms.update({word + word[-1] + 'ed', word + word[-1] + 'ing'})
+    forms.update(EXTRA_FORMS.get(word, []))
+    return forms
+
+class VerseIndex:
     """
-    Search for verses matching theme keywords
-    Returns list of tuples: (verse_id, reference, clean_text, match_score)
+    In-memory inverted index over verses.clean_text.
+
+    Built in a single pass over the corpus; every theme keyword is then
+    resolved against the postings instead of scanning the table again.
     """
-    results = []
+
+    def __init__(self, rows):
+        self.verses = {}
+        self.postings = defaultdict(lambda: defaultdict(list))  # token -> verse_id -> positions
+
+        for verse_id, reference, clean_text in rows:
+            self.verses[verse_id] = (reference, clean_text or '')
+            for position, token in enumerate(tokenize(clean_text or '')):
+                self.postings[token][verse_id].append(position)
+
+        self._keyword_cache = {}
+
+    def expand(self, word):
+        """Return the indexed tokens a keyword word matches."""
+        return sorted(token for token in inflections(word) if token in self.postings)
+
+    def _positions(self, word):
+        """Merge positions of every token matching word: verse_id -> sorted positions."""
+        merged = defaultdict(list)
+        for token in self.expand(word):
+            for verse_id, positions in self.postings[token].items():
+                merged[verse_id].extend(positions)
+        for positions in merged.values():
+            positions.sort()
+        return merged
+
+    def lookup(self, keyword):
+        """Return the set of verse ids matching a keyword or phrase."""
+        if keyword in self._keyword_cache:
+            return self._keyword_cache[keyword]
+
+        words = tokenize(keyword)
+        if not words:
+            matches = set()
+        elif len(words) == 1:
+            matches = set(self._positions(words[0]))
+        else:
+            word_positions = [self._positions(word) for word in words]
+            candidates = set(word_positions[0]).intersection(*word_positions[1:])
+            matches = {verse_id for verse_id in candidates
+                       if self._has_phrase([wp[verse_id] for wp in word_positions])}
+
+        self._keyword_cache[keyword] = matches
+        return matches
+
+    @staticmethod
+    def _has_phrase(positions_per_word):
+        """True if the words occur in order with gaps of at most PHRASE_WINDOW."""
+        # Carry every position a partial match can end at, not just the first,
+        # so a dead-end occurrence of a middle word can't hide a real match
+        reachable = positions_per_word[0]
+        for positions in positions_per_word[1:]:
+            reachable = [p for p in positions
+                         if any(previous < p <= previous + PHRASE_WINDOW for previous in reachable)]
+            if not reachable:
+                return False
+        return True
+
+    def idf(self, keyword):
+        """Inverse document frequency: rare keywords weigh more than common ones."""
+        df = len(self.lookup(keyword))
+        return math.log(1 + len(self.verses) / df) if df else 0.0
+
+def search_verses_for_theme(index, theme_name, keywords, limit=VERSES_PER_THEME):
+    """
+    Rank verses for a theme by the summed IDF weight of matched keywords.
+    Ties break on number of keywords matched, then verse id, so the output
+    is deterministic. Returns list of dicts with verse_id, reference, text, match_score.
+    """
+    scores = defaultdict(float)
+    matched = defaultdict(int)
 
     for keyword in keywords:
-        # Search in clean_text column
-        query = """
-            SELECT id, reference, clean_text
-            FROM verses
-            WHERE clean_text LIKE ?
-            LIMIT ?
-        """
-
-        # Use wildcards for flexible matching
-        pattern = f'%{keyword}%'
-        cursor.execute(query, (pattern, limit))
-
-        for verse_id, reference, clean_text in cursor.fetchall():
-            # Calculate simple match score (number of keyword matches)
-            score = sum(1 for kw in keywords if kw in normalize_text(clean_text))
-            results.append((verse_id, reference, clean_text, score))
-
-    # Sort by match score (highest first) and deduplicate
-    seen_verses = set()
-    unique_results = []
-    for verse_id, reference, clean_text, score in sorted(results, key=lambda x: x[3], reverse=True):
-        if verse_id not in seen_verses:
-            seen_verses.add(verse_id)
-            unique_results.append({
-                'verse_id': verse_id,
-                'reference': reference,
-                'text': clean_text,
-                'match_score': score
-            })
-
-    return unique_results[:25]  # Return top 25 verses
+        weight = index.idf(keyword)
+        for verse_id in index.lookup(keyword):
+            scores[verse_id] += weight
+            matched[verse_id] += 1
+
+    ranked = sorted(scores, key=lambda verse_id: (-scores[verse_id], -matched[verse_id], verse_id))
+
+    results = []
+    for verse_id in ranked[:limit]:
+        reference, clean_text = index.verses[verse_id]
+        results.append({
+            'verse_id': verse_id,
+            'reference': reference,
+            'text': clean_text,
+            'match_score': round(scores[verse_id], 3)
+        })
+
+    return results
 
 def create_theme_verse_mappings(db_path, output_path):
     """Create mappings for all 75 themes"""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    print("📚 Indexing verses...")
+    start_time = time.time()
+    cursor.execute("SELECT id, reference, clean_text FROM verses ORDER BY id")
+    index = VerseIndex(cursor.fetchall())
+    conn.close()
+    print(f"  ✓ Indexed {len(index.verses)} verses, {len(index.postings)} terms "
+          f"in {time.time() - start_time:.2f}s\n")
+
     all_mappings = {}
 
     print("🔍 Mapping themes to Bible verses...\n")
@@ -167,7 +334,7 @@ def create_theme_verse_mappings(db_path, output_path):
     for theme_name, keywords in THEME_KEYWORDS.items():
         print(f"  Processing: {theme_name} ({len(keywords)} keywords)")
 
-        verses = search_verses_for_theme(cursor, theme_name, keywords)
+        verses = search_verses_for_theme(index, theme_name, keywords)
 
         all_mappings[theme_name] = {
             'theme': theme_name,
@@ -178,8 +345,6 @@ def create_theme_verse_mappings(db_path, output_path):
 
         print(f"    ✓ Found {len(verses)} verses\n")
 
-    conn.close()
-
     # Save to JSON
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(all_mappings, f, indent=2, ensure_ascii=False)
@@ -235,6 +400,12 @@ def main():
     # Create mappings
     mappings = create_theme_verse_mappings(db_path, output_path)
 
+    # Compact copy for app startup: packed vid arrays + deduplicated text
+    stats = write_artifact(mappings, ARTIFACT_PATH)
+    print(f"📦 Artifact: {ARTIFACT_PATH} ({stats['unique_verses']} unique verses)")
+    if stats['skipped']:
+        print(f"  ⚠️  Skipped unparseable references: {', '.join(stats['skipped'])}")
+
     # Verify and show samples
     verify_mappings(mappings)
 
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Normalize verses.themes (JSON) into an indexed verse_themes table and a
+128-bit theme bitmask on verses.
+
+    theme_names(theme_id, name)                  ids from theme_ids.THEMES
+    verse_themes(theme_id, vid, score)           PRIMARY KEY (theme_id, vid)
+    verses.themes_lo / verses.themes_hi          bits 0-63 / 64-127
+
+score is rank-based (1/1, 1/2, 1/3 for a verse's first, second and third
+theme), since the taggers store themes best-first. Triggers on
+verses.themes keep both representations in sync, so Bible_Theme_Tagger.py
+and tag_critical_books.py keep writing JSON unchanged.
+
+"All verses tagged hope AND peace" becomes two index range reads on
+verse_themes instead of a full scan with JSON parsing.
+
+Usage:
+    python3 migrate_verse_themes.py                       # ../assets/bible.db
+    python3 migrate_verse_themes.py --db bible.db --query hope peace
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import List
+
+from theme_ids import THEME_IDS, THEMES, split_mask
+from verse_ids import assign_verse_ids, has_verse_ids
+
+DB_PATH = "../assets/bible.db"
+
+# verse_themes rows derived from one verse's themes JSON
+THEME_ROWS_SQL = '''
+    SELECT {vid}, n.theme_id, 1.0 / (j.key + 1)
+    FROM json_each(CASE WHEN json_valid({themes}) THEN {themes} ELSE '[]' END) AS j
+    JOIN theme_names AS n ON n.name = lower(trim(j.value))
+    WHERE j.type = 'text'
+'''
+
+# OR of distinct bits == SUM; bit 63 wraps to the sign bit, which is fine
+MASK_SQL = '''
+    (SELECT COALESCE(SUM(1 << ({offset_expr})), 0) FROM verse_themes AS t
+     WHERE t.vid = {vid} AND t.theme_id {range_expr})
+'''
+MASK_LO_SQL = MASK_SQL.format(offset_expr='t.theme_id', range_expr='< 64', vid='{vid}')
+MASK_HI_SQL = MASK_SQL.format(offset_expr='t.theme_id - 64', range_expr='>= 64', vid='{vid}')
+
+
+def create_theme_tables(conn: sqlite3.Connection):
+    """Create theme_names, verse_themes and the bitmask columns if missing."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS theme_names (
+            theme_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    conn.executemany('INSERT OR REPLACE INTO theme_names VALUES (?, ?)', list(enumerate(THEMES)))
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS verse_themes (
+            theme_id INTEGER NOT NULL,
+            vid INTEGER NOT NULL,
+            score REAL NOT NULL DEFAULT 1.0,
+            PRIMARY KEY (theme_id, vid)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_verse_themes_vid ON verse_themes(vid)')
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    for column in ('themes_lo', 'themes_hi'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE verses ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+
+
+def create_theme_triggers(conn: sqlite3.Connection):
+    """Re-derive verse_themes and the bitmask whenever verses.themes changes."""
+    conn.execute('DROP TRIGGER IF EXISTS verse_themes_ai')
+    conn.execute('DROP TRIGGER IF EXISTS verse_themes_au')
+    conn.execute('DROP TRIGGER IF EXISTS verse_themes_ad')
+
+    sync_body = f'''
+        DELETE FROM verse_themes WHERE vid = old_vid;
+        INSERT OR IGNORE INTO verse_themes (vid, theme_id, score)
+            {THEME_ROWS_SQL.format(vid='new.vid', themes='new.themes')};
+        UPDATE verses SET
+            themes_lo = {MASK_LO_SQL.format(vid='new.vid')},
+            themes_hi = {MASK_HI_SQL.format(vid='new.vid')}
+        WHERE id = new.id;
+    '''
+
+    conn.execute(f'''
+        CREATE TRIGGER verse_themes_ai AFTER INSERT ON verses
+        WHEN new.vid IS NOT NULL BEGIN
+            {sync_body.replace('old_vid', 'new.vid')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER verse_themes_au AFTER UPDATE OF themes, vid ON verses
+        WHEN new.vid IS NOT NULL BEGIN
+            DELETE FROM verse_themes WHERE vid = old.vid;
+            {sync_body.replace('old_vid', 'new.vid')}
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER verse_themes_ad AFTER DELETE ON verses BEGIN
+            DELETE FROM verse_themes WHERE vid = old.vid;
+        END
+    ''')
+
+
+def migrate_themes(conn: sqlite3.Connection) -> int:
+    """Rebuild verse_themes and the bitmask columns from every verses.themes value."""
+    conn.execute('DELETE FROM verse_themes')
+    conn.execute(f'''
+        INSERT OR IGNORE INTO verse_themes (vid, theme_id, score)
+        SELECT v.vid, n.theme_id, 1.0 / (j.key + 1)
+        FROM verses AS v,
+             json_each(CASE WHEN json_valid(v.themes) THEN v.themes ELSE '[]' END) AS j
+        JOIN theme_names AS n ON n.name = lower(trim(j.value))
+        WHERE v.vid IS NOT NULL AND j.type = 'text'
+    ''')
+
+    # Compute masks in Python from the normalized rows: one pass, one executemany
+    masks = {}
+    for vid, theme_id in conn.execute('SELECT vid, theme_id FROM verse_themes'):
+        masks[vid] = masks.get(vid, 0) | 1 << theme_id
+
+    conn.execute('UPDATE verses SET themes_lo = 0, themes_hi = 0 WHERE themes_lo != 0 OR themes_hi != 0')
+    conn.executemany(
+        'UPDATE verses SET themes_lo = ?, themes_hi = ? WHERE vid = ?',
+        [(*split_mask(mask), vid) for vid, mask in masks.items()]
+    )
+    return conn.execute('SELECT COUNT(*) FROM verse_themes').fetchone()[0]
+
+
+def unknown_themes(conn: sqlite3.Connection) -> List[str]:
+    """Theme names in verses.themes that have no theme id."""
+    return [name for (name,) in conn.execute('''
+        SELECT DISTINCT lower(trim(j.value))
+        FROM verses AS v,
+             json_each(CASE WHEN json_valid(v.themes) THEN v.themes ELSE '[]' END) AS j
+        WHERE j.type = 'text' AND lower(trim(j.value)) NOT IN (SELECT name FROM theme_names)
+        ORDER BY 1
+    ''')]
+
+
+def verses_with_all_themes(conn: sqlite3.Connection, themes: List[str]) -> List[int]:
+    """vids tagged with every theme, via the (theme_id, vid) primary key."""
+    theme_ids = [THEME_IDS[theme] for theme in themes]
+    query = ' INTERSECT '.join('SELECT vid FROM verse_themes WHERE theme_id = ?' for _ in theme_ids)
+    return [vid for (vid,) in conn.execute(f'{query} ORDER BY vid', theme_ids)]
+
+
+def verses_with_any_themes(conn: sqlite3.Connection, themes: List[str]) -> List[int]:
+    """vids tagged with at least one of the themes, using the bitmask columns."""
+    lo, hi = split_mask(sum(1 << THEME_IDS[theme] for theme in set(themes)))
+    return [vid for (vid,) in conn.execute(
+        'SELECT vid FROM verses WHERE (themes_lo & ?) != 0 OR (themes_hi & ?) != 0 ORDER BY vid',
+        (lo, hi)
+    )]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize verse themes into verse_themes + bitmask")
+    parser.add_argument('--db', default=DB_PATH, help=f"Bible database (default: {DB_PATH})")
+    parser.add_argument('--query', nargs='+', metavar='THEME',
+                        help="After migrating, list verses tagged with all of these themes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    unknown = [theme for theme in args.query or [] if theme not in THEME_IDS]
+    if unknown:
+        print(f"❌ Unknown themes: {', '.join(unknown)}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    start_time = time.time()
+
+    if not has_verse_ids(conn):
+        print("🔢 Adding verse ids first...")
+        assign_verse_ids(conn)
+
+    print(f"🏷️  Migrating themes in {args.db}...")
+    create_theme_tables(conn)
+    create_theme_triggers(conn)
+    rows = migrate_themes(conn)
+    conn.commit()
+
+    tagged = conn.execute('SELECT COUNT(DISTINCT vid) FROM verse_themes').fetchone()[0]
+    print(f"✅ {rows} verse_themes rows for {tagged} verses ({time.time() - start_time:.2f}s)")
+
+    skipped = unknown_themes(conn)
+    if skipped:
+        print(f"  ⚠️  Themes not in theme_ids.THEMES (skipped): {', '.join(skipped)}")
+
+    if args.query:
+        start_time = time.time()
+        vids = verses_with_all_themes(conn, args.query)
+        elapsed_ms = (time.time() - start_time) * 1000
+        print(f"\n🔎 {len(vids)} verses tagged {' AND '.join(args.query)} ({elapsed_ms:.1f} ms)")
+        for (reference,) in [] if not vids else conn.execute(
+            f"SELECT reference FROM verses WHERE vid IN ({','.join('?' * len(vids[:10]))}) ORDER BY vid",
+            vids[:10]
+        ):
+            print(f"  - {reference}")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
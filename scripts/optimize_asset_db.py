@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Shrink a bundled Bible database and report the effect on the app's queries.
+
+The app ships assets/bible.db, loads it into memory with rootBundle.load
+and writes it to disk before attaching it, so every byte costs bundle size
+and first-launch copy time. The optimizer rebuilds the database from its
+own schema into a fresh file:
+
+    - indexes whose columns prefix another index are dropped
+      (idx_book is covered by idx_book_chapter); --drop-index drops more
+    - --derive reference stores verses.reference as a VIRTUAL generated
+      column (book || ' ' || chapter || ':' || verse_number) once every row
+      is checked to match; readers and idx_reference keep working
+    - --drop-column removes columns the app doesn't read; the build
+      scripts' source columns (text in bible.db, which clean_bible_verses.py
+      and tag_critical_books.py read) also need --discard-source
+    - tables keyed by a non-integer primary key become WITHOUT ROWID;
+      verses keeps its rowid because verses_fts and daily_verse_schedule use it
+    - FTS indexes are rebuilt and optimized, then ANALYZE and VACUUM
+    - the result must pass the benchmark_bible_db.py plan gate against the
+      original's plans before it is written
+
+Every candidate page size is built and measured; the smallest file wins
+unless --page-size is given. The report compares file size, copy time and
+the benchmark_bible_db.py query shapes before and after. Only builder-schema
+databases (with a verses table) are handled; compile_app_bible_db.py output
+is already built compact.
+
+Generated columns need SQLite 3.31+ (Android 11+, iOS 14+) to open the file.
+
+Usage:
+    python3 optimize_asset_db.py                                 # ../assets/bible.db
+    python3 optimize_asset_db.py --derive reference --apply      # replace the asset
+    python3 optimize_asset_db.py --db ../assets/spanish_bible_rvr1909.db
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from benchmark_bible_db import capture_plans, plan_regressions, query_shapes
+
+DB_PATH = "../assets/bible.db"
+
+VERSES_TABLE = 'verses'
+
+PAGE_SIZES = (1024, 2048, 4096, 8192, 16384)
+
+# Runs per query shape; the report shows the median
+TIMING_RUNS = 15
+
+# Columns the build scripts read to regenerate everything else
+SOURCE_COLUMNS = {
+    'text': "clean_bible_verses.py derives clean_text from it and tag_critical_books.py reads it",
+}
+
+DERIVED_COLUMNS = {
+    'reference': "book || ' ' || chapter || ':' || verse_number",
+}
+
+FTS_CONTENT_PATTERN = re.compile(r"content\s*=\s*['\"]?(\w*)", re.IGNORECASE)
+TABLE_CONSTRAINT_PATTERN = re.compile(r'\b(UNIQUE|CHECK|FOREIGN\s+KEY|CONSTRAINT)\b', re.IGNORECASE)
+
+
+class OptimizeError(Exception):
+    """Raised when a requested change can't be applied safely."""
+
+
+class TablePlan(NamedTuple):
+    name: str
+    sql: str
+    columns: List[str]  # stored columns copied from the source
+
+
+class Plan(NamedTuple):
+    tables: List[TablePlan]
+    indexes: List[str]
+    fts: List[Tuple[str, str, Optional[str], List[str]]]  # (name, sql, content table, columns)
+    views_and_triggers: List[str]
+    dropped_indexes: Dict[str, str]  # index -> reason
+    without_rowid: List[str]
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[Tuple]:
+    """PRAGMA table_xinfo rows: (cid, name, type, notnull, default, pk, hidden)."""
+    return conn.execute(f"PRAGMA table_xinfo('{table}')").fetchall()
+
+
+def stored_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in table_columns(conn, table) if row[6] == 0]
+
+
+def redundant_indexes(conn: sqlite3.Connection) -> Dict[str, str]:
+    """{index: covering index} for plain indexes whose columns prefix another index's."""
+    indexes = {}
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+        for _, name, unique, origin, partial in conn.execute(f"PRAGMA index_list('{table}')"):
+            columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{name}')")]
+            droppable = not unique and origin == 'c' and not partial and None not in columns
+            indexes[name] = (table, columns, droppable)
+
+    redundant = {}
+    for name, (table, columns, droppable) in indexes.items():
+        if not droppable:
+            continue
+        for other, (other_table, other_columns, _) in indexes.items():
+            if other != name and other not in redundant and other_table == table \
+                    and len(other_columns) > len(columns) and other_columns[:len(columns)] == columns:
+                redundant[name] = other
+                break
+    return redundant
+
+
+def rewrite_verses_sql(conn: sqlite3.Connection, sql: str,
+                       drop_columns: List[str], derive: List[str]) -> Tuple[str, List[str]]:
+    """Return (CREATE TABLE sql, stored columns) for verses with columns dropped or derived."""
+    if TABLE_CONSTRAINT_PATTERN.search(sql):
+        raise OptimizeError(f"{VERSES_TABLE} has table constraints; rewrite its columns by hand")
+
+    definitions = []
+    stored = []
+    for _, name, type_, notnull, default, pk, hidden in table_columns(conn, VERSES_TABLE):
+        if name in drop_columns:
+            continue
+        if name in derive:
+            definitions.append(f"{name} {type_} GENERATED ALWAYS AS ({DERIVED_COLUMNS[name]}) VIRTUAL")
+            continue
+
+        definition = f"{name} {type_}".strip()
+        if pk:
+            definition += ' PRIMARY KEY' + (' AUTOINCREMENT' if 'AUTOINCREMENT' in sql.upper() else '')
+        if notnull:
+            definition += ' NOT NULL'
+        if default is not None:
+            definition += f' DEFAULT {default}'
+        definitions.append(definition)
+        stored.append(name)
+
+    body = ',\n    '.join(definitions)
+    return f"CREATE TABLE {VERSES_TABLE} (\n    {body}\n)", stored
+
+
+def plan_rebuild(conn: sqlite3.Connection, drop_columns: List[str], derive: List[str],
+                 drop_indexes: List[str]) -> Plan:
+    """Work out every statement of the rebuild from the source schema."""
+    schema = conn.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY rowid"
+    ).fetchall()
+    virtual = {name: sql for type_, name, _, sql in schema
+               if type_ == 'table' and sql.upper().startswith('CREATE VIRTUAL TABLE')}
+
+    def is_shadow(name: str) -> bool:
+        return any(name.startswith(f'{vt}_') for vt in virtual)
+
+    fts = []
+    for name, sql in virtual.items():
+        match = FTS_CONTENT_PATTERN.search(sql)
+        content = match.group(1) if match else None
+        if content == '':
+            raise OptimizeError(f"{name} is contentless and can't be rebuilt")
+        fts.append((name, sql, content, [row[1] for row in conn.execute(f"PRAGMA table_info('{name}')")]))
+
+    verses_columns = {row[1] for row in table_columns(conn, VERSES_TABLE)}
+    for column in drop_columns + derive:
+        if column not in verses_columns:
+            raise OptimizeError(f"{VERSES_TABLE} has no column {column}")
+
+    for column in derive:
+        if column not in DERIVED_COLUMNS:
+            raise OptimizeError(f"Don't know how to derive {column} (known: {', '.join(DERIVED_COLUMNS)})")
+        mismatches = conn.execute(
+            f"SELECT COUNT(*) FROM {VERSES_TABLE} WHERE {column} IS NOT ({DERIVED_COLUMNS[column]})"
+        ).fetchone()[0]
+        if mismatches:
+            raise OptimizeError(f"{mismatches} rows of {VERSES_TABLE}.{column} differ from {DERIVED_COLUMNS[column]}")
+
+    dropped = {name: f"prefix of {covering}" for name, covering in redundant_indexes(conn).items()}
+    dropped.update({name: 'requested' for name in drop_indexes})
+
+    # A dropped column must not be needed by anything that stays
+    for column in drop_columns:
+        for (index,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (VERSES_TABLE,)
+        ):
+            if index not in dropped and column in [row[2] for row in conn.execute(f"PRAGMA index_info('{index}')")]:
+                raise OptimizeError(f"Cannot drop {VERSES_TABLE}.{column}: used by index {index} (add --drop-index)")
+        for name, _, content, columns in fts:
+            if content == VERSES_TABLE and column in columns:
+                raise OptimizeError(f"Cannot drop {VERSES_TABLE}.{column}: indexed by {name}")
+        for type_, name, _, sql in schema:
+            if type_ in ('view', 'trigger') and VERSES_TABLE in sql and re.search(rf'\b{column}\b', sql):
+                raise OptimizeError(f"Cannot drop {VERSES_TABLE}.{column}: used by {type_} {name}")
+
+    fts_contents = {content for _, _, content, _ in fts}
+    tables = []
+    without_rowid = []
+    for type_, name, _, sql in schema:
+        if type_ != 'table' or name in virtual or is_shadow(name) or name.startswith('sqlite_'):
+            continue
+
+        if name == VERSES_TABLE and (drop_columns or derive):
+            sql, columns = rewrite_verses_sql(conn, sql, drop_columns, derive)
+        else:
+            columns = stored_columns(conn, name)
+
+        pk_types = [(row[2] or '').upper() for row in table_columns(conn, name) if row[5]]
+        if pk_types and pk_types != ['INTEGER'] and name not in fts_contents \
+                and 'WITHOUT ROWID' not in sql.upper() and 'AUTOINCREMENT' not in sql.upper():
+            sql += ' WITHOUT ROWID'
+            without_rowid.append(name)
+
+        tables.append(TablePlan(name, sql, columns))
+
+    return Plan(
+        tables=tables,
+        indexes=[sql for type_, name, _, sql in schema if type_ == 'index' and name not in dropped],
+        fts=fts,
+        views_and_triggers=[sql for type_, _, _, sql in schema if type_ in ('view', 'trigger')],
+        dropped_indexes=dropped,
+        without_rowid=without_rowid,
+    )
+
+
+def build_database(source_path: str, output_path: str, plan: Plan, page_size: int):
+    """Rebuild source_path into output_path following plan."""
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    conn = sqlite3.connect(output_path, isolation_level=None)
+    conn.execute(f'PRAGMA page_size = {page_size}')
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('ATTACH DATABASE ? AS src', (f'file:{source_path}?mode=ro',))
+
+    conn.execute('BEGIN')
+    for table in plan.tables:
+        conn.execute(table.sql)
+        column_list = ', '.join(table.columns)
+        conn.execute(f'INSERT INTO main.{table.name} ({column_list}) SELECT {column_list} FROM src.{table.name}')
+
+    if conn.execute("SELECT 1 FROM src.sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+        conn.execute('DELETE FROM main.sqlite_sequence')
+        conn.execute('INSERT INTO main.sqlite_sequence SELECT * FROM src.sqlite_sequence')
+
+    # Indexes, FTS and triggers after the data, so each is built in one pass
+    for sql in plan.indexes:
+        conn.execute(sql)
+
+    for name, sql, content, columns in plan.fts:
+        conn.execute(sql)
+        if content:
+            conn.execute(f"INSERT INTO main.{name}({name}) VALUES ('rebuild')")
+        else:
+            column_list = ', '.join(columns)
+            conn.execute(f'INSERT INTO main.{name} (rowid, {column_list}) '
+                         f'SELECT rowid, {column_list} FROM src.{name}')
+        conn.execute(f"INSERT INTO main.{name}({name}) VALUES ('optimize')")
+
+    for sql in plan.views_and_triggers:
+        conn.execute(sql)
+    conn.execute('COMMIT')
+
+    conn.execute('DETACH DATABASE src')
+    conn.execute('ANALYZE')
+    conn.execute('VACUUM')
+
+    result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    conn.close()
+    if result != 'ok':
+        raise OptimizeError(f"integrity_check failed on {output_path}: {result}")
+
+
+def time_copy(path: str) -> float:
+    """ms to read the file and write it back out, like the first-launch asset copy."""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path))) as out:
+        start_time = time.perf_counter()
+        with open(path, 'rb') as f:
+            out.write(f.read())
+        out.flush()
+        os.fsync(out.fileno())
+        return (time.perf_counter() - start_time) * 1000
+
+
+def measure(path: str) -> Dict[str, float]:
+    """Median ms per benchmark_bible_db.py query shape, plus file size and copy time."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    results = {}
+    for shape in query_shapes(conn):
+        timings = []
+        for _ in range(TIMING_RUNS):
+            start_time = time.perf_counter()
+            conn.execute(shape.sql, shape.params).fetchall()
+            timings.append((time.perf_counter() - start_time) * 1000)
+        results[shape.name] = statistics.median(timings)
+    conn.close()
+
+    results['copy'] = statistics.median(time_copy(path) for _ in range(3))
+    results['size'] = os.path.getsize(path)
+    return results
+
+
+def column_payload(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Bytes of stored data per verses column, to show what --drop-column would save."""
+    columns = stored_columns(conn, VERSES_TABLE)
+    totals = conn.execute(
+        f"SELECT {', '.join(f'COALESCE(SUM(LENGTH({column})), 0)' for column in columns)} FROM {VERSES_TABLE}"
+    ).fetchone()
+    return dict(zip(columns, totals))
+
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+
+def print_report(db_path: str, page_size_before: int, page_size_after: int,
+                 before: Dict[str, float], after: Dict[str, float]):
+    print(f"\n📊 {db_path}")
+    print(f"   {'':22} {'before':>12} {'after':>12} {'change':>8}")
+    print(f"   {'file size':22} {format_size(before['size']):>12} {format_size(after['size']):>12} "
+          f"{(after['size'] / before['size'] - 1) * 100:>+7.0f}%")
+    print(f"   {'page size':22} {page_size_before:>12} {page_size_after:>12}")
+    for label in before:
+        if label == 'size' or label not in after:
+            continue
+        change = (after[label] / before[label] - 1) * 100 if before[label] else 0.0
+        name = 'copy (read + write)' if label == 'copy' else label
+        print(f"   {name:22} {before[label]:>9.2f} ms {after[label]:>9.2f} ms {change:>+7.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink a bundled Bible database and report query timings")
+    parser.add_argument('--db', default=DB_PATH, help=f"Database to optimize (default: {DB_PATH})")
+    parser.add_argument('--output', help="Optimized file (default: <db>.optimized.db next to the input)")
+    parser.add_argument('--page-size', type=int, choices=PAGE_SIZES, help="Use this page size instead of trying all")
+    parser.add_argument('--derive', action='append', default=[], choices=sorted(DERIVED_COLUMNS),
+                        help="Store a verses column as a generated column")
+    parser.add_argument('--drop-column', action='append', default=[], metavar='COLUMN',
+                        help="Remove a verses column the app doesn't read")
+    parser.add_argument('--discard-source', action='store_true',
+                        help=f"Allow dropping the build scripts' source columns ({', '.join(SOURCE_COLUMNS)}); "
+                             "the result is ship-only and can't be re-cleaned or re-tagged")
+    parser.add_argument('--drop-index', action='append', default=[], metavar='INDEX',
+                        help="Drop an index beyond the redundant ones found automatically")
+    parser.add_argument('--apply', action='store_true', help="Replace --db with the optimized file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    output = args.output or f"{os.path.splitext(args.db)[0]}.optimized.db"
+
+    for column in args.drop_column:
+        if column in SOURCE_COLUMNS and not args.discard_source:
+            print(f"❌ Not dropping {VERSES_TABLE}.{column}: {SOURCE_COLUMNS[column]}. "
+                  "Add --discard-source if this copy only ships and is never rebuilt from")
+            sys.exit(1)
+
+    source = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+    if not source.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                          (VERSES_TABLE,)).fetchone():
+        print(f"❌ {args.db} has no {VERSES_TABLE} table: only builder-schema assets can be optimized "
+              "(compile_app_bible_db.py output is already compact)")
+        sys.exit(1)
+    try:
+        plan = plan_rebuild(source, args.drop_column, args.derive, args.drop_index)
+    except OptimizeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    payload = column_payload(source)
+    page_size_before = source.execute('PRAGMA page_size').fetchone()[0]
+    source.close()
+
+    print(f"🔧 Optimizing {args.db}")
+    for name, reason in plan.dropped_indexes.items():
+        print(f"   - drop index {name} ({reason})")
+    for column in args.derive:
+        print(f"   - derive {VERSES_TABLE}.{column} = {DERIVED_COLUMNS[column]}")
+    for column in args.drop_column:
+        print(f"   - drop column {VERSES_TABLE}.{column}")
+    for table in plan.without_rowid:
+        print(f"   - {table} WITHOUT ROWID")
+
+    print(f"\n📦 Stored bytes per {VERSES_TABLE} column:")
+    for column, size in sorted(payload.items(), key=lambda item: -item[1]):
+        print(f"   {column:14} {format_size(size):>10}")
+
+    before = measure(args.db)
+
+    print("\n📐 Page sizes:")
+    candidates = []
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output))) as work_dir:
+        for page_size in [args.page_size] if args.page_size else PAGE_SIZES:
+            path = os.path.join(work_dir, f'candidate_{page_size}.db')
+            try:
+                build_database(args.db, path, plan, page_size)
+            except (OptimizeError, sqlite3.DatabaseError) as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            results = measure(path)
+            query_ms = sum(ms for label, ms in results.items() if label not in ('size', 'copy'))
+            candidates.append((results['size'], query_ms, page_size, path, results))
+            print(f"   {page_size:>6}  {format_size(results['size']):>10}  queries {query_ms:7.2f} ms")
+
+        size, _, page_size, path, after = min(candidates)
+
+        # No query may fall back to a scan it didn't need before
+        problems = plan_regressions(path, capture_plans(args.db))
+        if problems:
+            print("\n❌ Query plan regressions, nothing written:")
+            for problem in problems:
+                print(f"   - {problem}")
+            sys.exit(1)
+        shutil.move(path, output)
+
+    print_report(args.db, page_size_before, page_size, before, after)
+
+    if args.apply:
+        os.replace(output, args.db)
+        print(f"\n✅ Replaced {args.db} (page size {page_size}, {format_size(size)})")
+    else:
+        print(f"\n✅ Wrote {output} (page size {page_size}, {format_size(size)})")
+        print("   Re-run with --apply to replace the asset")
+
+
+if __name__ == '__main__':
+    main()
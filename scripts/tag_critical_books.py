@@ -1,18 +1,36 @@
 #!/usr/bin/env python3
 """
 Fast Bible Theme Tagger - Tags critical books (Psalms + NT) using Claude API
-Uses batch processing and parallel requests for maximum speed.
+Uses an asyncio pipeline with a token-bucket rate limiter, adaptive
+concurrency and retry/split of failed batches for maximum safe throughput.
+
+Model answers are cached in a SQLite sidecar keyed on (model, prompt
+template, verse ids), next to a journal of in-flight/completed batches, so
+an interrupted or repeated run replays cached answers instead of paying
+for them again.
+
+Usage:
+    python3 scripts/tag_critical_books.py                 # tag with Claude
+    python3 scripts/tag_critical_books.py --offline       # local stand-in client, no API calls
+    python3 scripts/tag_critical_books.py --no-cache      # always call the model
 """
 
+import argparse
+import asyncio
+import hashlib
 import sqlite3
 import json
 import os
+import random
 import sys
-from anthropic import Anthropic
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Tuple
+import threading
+from queue import Empty, Queue
+from typing import List, Dict, Optional, Tuple
 import time
 
+from theme_postings import build_theme_postings
+from verse_ids import verse_text_sql
+
 # Available themes (from your app)
 AVAILABLE_THEMES = [
     "hope", "faith", "love", "grace", "mercy", "forgiveness", "redemption",
@@ -28,20 +46,365 @@ AVAILABLE_THEMES = [
     "spiritual warfare", "holy spirit", "creator", "sovereignty", "power", "presence"
 ]
 
+MODEL = "claude-3-5-sonnet-20241022"
+
+PROMPT_TEMPLATE = """Analyze these Bible verses and assign 1-3 relevant themes from this list:
+{themes}
+
+Return ONLY a JSON array of objects with this format:
+[{{"id": verse_id, "themes": ["theme1", "theme2"]}}, ...]
+
+Be concise - pick the most relevant 1-3 themes per verse.
+
+Verses:
+{verses}"""
+
+CACHE_PATH = "assets/bible_tagging_cache.db"
+
+# Retry policy: errors other than rate limits are retried this many times
+# before the batch is split in half; a single verse that still fails is reported.
+# Rate-limit waits are counted separately and don't use up error retries.
+MAX_RETRIES = 2
+MAX_RATE_LIMIT_RETRIES = 8
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+Verse = Tuple[int, str, str]
+
+
+class RateLimitedError(Exception):
+    """Raised by a tagging client when the API answers 429 or overloaded."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AnthropicTaggingClient:
+    """Tagging client backed by the Claude Messages API."""
+
+    def __init__(self, model: str = MODEL):
+        from anthropic import AsyncAnthropic
+
+        self.model = model
+        # Retries are handled by the pipeline so it can adapt concurrency
+        self.client = AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"), max_retries=0)
+
+    async def complete(self, prompt: str) -> str:
+        from anthropic import APIStatusError
+
+        try:
+            message = await self.client.messages.create(
+                model=self.model,
+                max_tokens=4000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        except APIStatusError as e:
+            # 429 = rate limited, 529 = overloaded
+            if e.status_code in (429, 529):
+                retry_after = e.response.headers.get("retry-after")
+                raise RateLimitedError(str(e), float(retry_after) if retry_after else None) from e
+            raise
+
+        return message.content[0].text
+
+
+class OfflineTaggingClient:
+    """
+    Local stand-in for the Claude client, for running the pipeline offline.
+    Tags each verse with the themes whose names appear in its text, and can
+    simulate rate limiting and failures to exercise the retry paths.
+    """
+
+    def __init__(self, rate_limit_rate: float = 0.0, failure_rate: float = 0.0,
+                 latency: float = 0.0, seed: Optional[int] = None):
+        self.model = "offline"
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+
+    async def complete(self, prompt: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.random.random() < self.rate_limit_rate:
+            raise RateLimitedError("simulated 429")
+        if self.random.random() < self.failure_rate:
+            return "not json"
+
+        results = []
+        verses = prompt.split("Verses:\n", 1)[1].split("\n\n")
+        for block in verses:
+            header, _, text = block.partition("\n")
+            verse_id = int(header[1:header.index("]")])
+            themes = [t for t in AVAILABLE_THEMES if t in text.lower()][:3] or ["faith"]
+            results.append({"id": verse_id, "themes": themes})
+
+        return json.dumps(results)
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` requests/sec with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by one slot after a full window of
+    successes, halves whenever the API reports rate limiting or overload.
+    """
+
+    def __init__(self, initial: int, maximum: int):
+        self.limit = initial
+        self.maximum = maximum
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self):
+        self._successes += 1
+        if self._successes >= self.limit:
+            self.limit = min(self.maximum, self.limit + 1)
+            self._successes = 0
+
+    def record_overload(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class TaggingCache:
+    """
+    SQLite sidecar with a content-addressed response cache and a batch journal.
+
+    responses:     raw model answer per batch, keyed on hash(model, template, ids)
+    verse_results: parsed themes per verse, so regrouped batches still hit
+    journal:       status of every batch sent (in_flight, done, partial, split, failed)
+    """
+
+    def __init__(self, path: str, model: str, template: str = PROMPT_TEMPLATE):
+        self.model = model
+        self.template_hash = hashlib.sha256(template.encode('utf-8')).hexdigest()
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                batch_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                template_hash TEXT NOT NULL,
+                verse_ids TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS verse_results (
+                model TEXT NOT NULL,
+                template_hash TEXT NOT NULL,
+                verse_id INTEGER NOT NULL,
+                themes TEXT NOT NULL,
+                PRIMARY KEY (model, template_hash, verse_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS journal (
+                batch_key TEXT PRIMARY KEY,
+                verse_ids TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def batch_key(self, verse_ids: List[int]) -> str:
+        payload = json.dumps([self.model, self.template_hash, sorted(verse_ids)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_response(self, batch_key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT response FROM responses WHERE batch_key = ?", (batch_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_response(self, batch_key: str, verse_ids: List[int], response: str,
+                     results: List[Tuple[int, str]]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (batch_key, self.model, self.template_hash, json.dumps(sorted(verse_ids)),
+             response, time.time())
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO verse_results VALUES (?, ?, ?, ?)",
+            [(self.model, self.template_hash, vid, themes) for vid, themes in results]
+        )
+        self.conn.commit()
+
+    def cached_results(self, verse_ids: List[int]) -> Dict[int, str]:
+        """Return {verse_id: themes_json} for verses already answered under this model/template."""
+        placeholders = ','.join('?' * len(verse_ids))
+        rows = self.conn.execute(f"""
+            SELECT verse_id, themes FROM verse_results
+            WHERE model = ? AND template_hash = ? AND verse_id IN ({placeholders})
+        """, [self.model, self.template_hash, *verse_ids]).fetchall()
+        return dict(rows)
+
+    def mark(self, batch_key: str, verse_ids: List[int], status: str, error: Optional[str] = None):
+        self.conn.execute("""
+            INSERT INTO journal (batch_key, verse_ids, status, attempts, error, updated_at)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT(batch_key) DO UPDATE SET
+                status = excluded.status,
+                attempts = journal.attempts + (excluded.status = 'in_flight'),
+                error = excluded.error,
+                updated_at = excluded.updated_at
+        """, (batch_key, json.dumps(sorted(verse_ids)), status, error, time.time()))
+        self.conn.commit()
+
+    def recover_interrupted(self) -> int:
+        """Flag batches left in flight by a previous run; returns how many there were."""
+        cursor = self.conn.execute(
+            "UPDATE journal SET status = 'interrupted' WHERE status = 'in_flight'"
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+class ThemeWriter:
+    """
+    Dedicated writer thread that owns the only write connection to the Bible DB.
+
+    Tagged batches are submitted to a queue and applied with executemany(),
+    grouping up to `group_size` batches per transaction. close() drains the
+    queue, commits and joins the thread, so nothing submitted is lost on exit.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path: str, group_size: int = 8):
+        self.db_path = db_path
+        self.group_size = group_size
+        self.written = 0
+        self.error: Optional[BaseException] = None
+        self._queue: Queue = Queue()
+        self._thread = threading.Thread(target=self._run, name="theme-writer", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, tagged_verses: List[Tuple[int, str]]):
+        if self.error:
+            raise RuntimeError("Theme writer stopped") from self.error
+        self._queue.put(tagged_verses)
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        if self.error:
+            raise RuntimeError("Theme writer failed") from self.error
+
+    def _run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+
+                # Group-commit whatever else is already waiting
+                group = []
+                while True:
+                    if item is self._STOP:
+                        stopping = True
+                    else:
+                        group.append(item)
+                    if stopping or len(group) >= self.group_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except Empty:
+                        break
+
+                if group:
+                    with conn:
+                        for tagged_verses in group:
+                            conn.executemany(
+                                "UPDATE verses SET themes = ? WHERE id = ?",
+                                [(themes, vid) for vid, themes in tagged_verses]
+                            )
+                    self.written += sum(len(tagged_verses) for tagged_verses in group)
+        except BaseException as e:
+            self.error = e
+        finally:
+            if conn is not None:
+                # Leave the shipped asset in rollback-journal mode
+                try:
+                    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                    conn.execute('PRAGMA journal_mode=DELETE')
+                except sqlite3.Error as e:
+                    self.error = self.error or e
+                conn.close()
+
+
 class BibleThemeTagger:
-    def __init__(self, db_path: str, batch_size: int = 50):
+    def __init__(self, db_path: str, batch_size: int = 50, client=None,
+                 requests_per_minute: float = 50, cache_path: Optional[str] = CACHE_PATH):
         self.db_path = db_path
         self.batch_size = batch_size
-        self.client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        self.client = client or AnthropicTaggingClient()
+        self.requests_per_minute = requests_per_minute
+        self.cache = TaggingCache(cache_path, self.client.model) if cache_path else None
 
-    def get_untagged_verses(self, books: List[str]) -> List[Tuple[int, str, str]]:
+    def get_untagged_verses(self, books: List[str]) -> List[Verse]:
         """Get all untagged verses from specified books"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         placeholders = ','.join('?' * len(books))
         query = f"""
-            SELECT id, reference, text
+            SELECT id, reference, {verse_text_sql(conn)}
             FROM verses
             WHERE book IN ({placeholders})
             AND (themes IS NULL OR themes = '' OR LENGTH(themes) <= 2)
@@ -54,145 +417,275 @@ class BibleThemeTagger:
 
         return verses
 
-    def tag_batch(self, verses: List[Tuple[int, str, str]]) -> List[Tuple[int, str]]:
-        """Tag a batch of verses using Claude API"""
-        # Format batch for Claude
+    def build_prompt(self, verses: List[Verse]) -> str:
+        """Format a batch of verses into the tagging prompt"""
         verse_text = "\n\n".join([
             f"[{v[0]}] {v[1]}\n{v[2][:200]}..." if len(v[2]) > 200 else f"[{v[0]}] {v[1]}\n{v[2]}"
             for v in verses
         ])
 
-        prompt = f"""Analyze these Bible verses and assign 1-3 relevant themes from this list:
-{', '.join(AVAILABLE_THEMES)}
+        return PROMPT_TEMPLATE.format(themes=', '.join(AVAILABLE_THEMES), verses=verse_text)
 
-Return ONLY a JSON array of objects with this format:
-[{{"id": verse_id, "themes": ["theme1", "theme2"]}}, ...]
+    @staticmethod
+    def parse_response(response_text: str) -> List[Tuple[int, str]]:
+        """Parse the model's JSON answer into (id, json_themes) tuples"""
+        response_text = response_text.strip()
 
-Be concise - pick the most relevant 1-3 themes per verse.
+        # Extract JSON (might be wrapped in markdown)
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
 
-Verses:
-{verse_text}"""
+        results = json.loads(response_text)
 
-        try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+        return [(int(r["id"]), json.dumps(r["themes"])) for r in results]
 
-            # Parse response
-            response_text = message.content[0].text.strip()
+    async def tag_batch(self, verses: List[Verse]) -> List[Tuple[int, str]]:
+        """
+        Tag a batch of verses using Claude API.
+        Raises on API or parse errors so the pipeline can retry or split.
+        Answers are replayed from / written to the response cache.
+        """
+        verse_ids = [v[0] for v in verses]
+        batch_key = self.cache.batch_key(verse_ids) if self.cache else None
 
-            # Extract JSON (might be wrapped in markdown)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
+        if self.cache:
+            cached = self.cache.get_response(batch_key)
+            if cached is not None:
+                return self.parse_response(cached)
 
-            results = json.loads(response_text)
+        response_text = await self.client.complete(self.build_prompt(verses))
+        results = self.parse_response(response_text)
 
-            # Convert to (id, json_themes) tuples
-            return [(r["id"], json.dumps(r["themes"])) for r in results]
+        if self.cache:
+            self.cache.put_response(batch_key, verse_ids, response_text, results)
 
-        except Exception as e:
-            print(f"Error tagging batch: {e}")
-            return []
+        return results
 
     def update_themes(self, tagged_verses: List[Tuple[int, str]]):
-        """Update database with tagged themes"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.executemany(
-            "UPDATE verses SET themes = ? WHERE id = ?",
-            [(themes, vid) for vid, themes in tagged_verses]
-        )
+        """Queue tagged themes for the writer thread"""
+        self.writer.submit(tagged_verses)
 
-        conn.commit()
-        conn.close()
+    async def _process_batch(self, batch: List[Verse], attempt: int, throttled: int, queue: asyncio.Queue,
+                             bucket: TokenBucket, limiter: AdaptiveConcurrency, stats: Dict):
+        """
+        Tag one batch; on failure requeue it, split it, or record it as failed.
+        `attempt` counts error retries and `throttled` counts rate-limit waits.
+        """
+        if self.cache:
+            # Replay verses already answered under this model/template for free
+            cached = self.cache.cached_results([v[0] for v in batch])
+            if cached:
+                self.update_themes(list(cached.items()))
+                stats['completed'] += len(cached)
+                stats['cached'] += len(cached)
+                batch = [v for v in batch if v[0] not in cached]
+                if not batch:
+                    return
+
+            batch_ids = [v[0] for v in batch]
+            batch_key = self.cache.batch_key(batch_ids)
+            self.cache.mark(batch_key, batch_ids, 'in_flight')
+
+        await bucket.acquire()
+
+        delay = None
+        error = None
+        async with limiter:
+            try:
+                tagged = await self.tag_batch(batch)
+            except RateLimitedError as e:
+                limiter.record_overload()
+                stats['rate_limited'] += 1
+                if throttled < MAX_RATE_LIMIT_RETRIES:
+                    delay = e.retry_after or backoff_delay(throttled)
+                else:
+                    error = e
+            except Exception as e:
+                error = e
+            else:
+                limiter.record_success()
+
+        if delay is not None:
+            await asyncio.sleep(delay)
+            queue.put_nowait((batch, attempt, throttled + 1))
+            return
 
-    def tag_books(self, books: List[str], max_workers: int = 3):
-        """Tag all verses in specified books"""
+        if error is None:
+            # Any verse the model skipped is retried like a failed batch
+            expected = {v[0] for v in batch}
+            tagged = [(vid, themes) for vid, themes in tagged if vid in expected]
+            missing = [v for v in batch if v[0] not in {vid for vid, _ in tagged}]
+
+            if tagged:
+                self.update_themes(tagged)
+                stats['completed'] += len(tagged)
+                self._report_progress(stats, limiter)
+
+            if not missing:
+                if self.cache:
+                    self.cache.mark(batch_key, batch_ids, 'done')
+                return
+
+            batch = missing
+            error = ValueError(f"{len(missing)} verses missing from response")
+
+            if self.cache:
+                # The answered part is done; journal the remainder as its own batch
+                self.cache.mark(batch_key, batch_ids, 'partial', str(error))
+                batch_ids = [v[0] for v in batch]
+                batch_key = self.cache.batch_key(batch_ids)
+                self.cache.mark(batch_key, batch_ids, 'in_flight')
+
+        if attempt < MAX_RETRIES:
+            stats['retried'] += 1
+            await asyncio.sleep(backoff_delay(attempt))
+            queue.put_nowait((batch, attempt + 1, throttled))
+        elif len(batch) > 1:
+            # Isolate the bad input: retry each half as its own batch
+            stats['split'] += 1
+            if self.cache:
+                self.cache.mark(batch_key, batch_ids, 'split', str(error))
+            middle = len(batch) // 2
+            queue.put_nowait((batch[:middle], 0, 0))
+            queue.put_nowait((batch[middle:], 0, 0))
+        else:
+            stats['failed'].append(batch[0][1])
+            if self.cache:
+                self.cache.mark(batch_key, batch_ids, 'failed', str(error))
+            print(f"✗ {batch[0][1]} failed after retries: {error}")
+
+    def _report_progress(self, stats: Dict, limiter: AdaptiveConcurrency):
+        completed = stats['completed']
+        total = stats['total']
+        elapsed = time.time() - stats['start_time']
+        rate = completed / elapsed if elapsed > 0 else 0
+        remaining = total - completed
+        eta = remaining / rate if rate > 0 else 0
+
+        print(f"✓ {completed}/{total} verses "
+              f"({100*completed/total:.1f}%) | "
+              f"Rate: {rate:.1f} verses/sec | "
+              f"Concurrency: {limiter.limit} | "
+              f"ETA: {eta/60:.1f} min")
+
+    async def tag_books_async(self, books: List[str], max_workers: int = 8) -> Dict:
+        """Tag all verses in specified books with the async pipeline"""
         print(f"\n🔍 Finding untagged verses in: {', '.join(books)}")
         verses = self.get_untagged_verses(books)
         total = len(verses)
 
+        stats = {'total': total, 'completed': 0, 'cached': 0, 'retried': 0, 'split': 0,
+                 'rate_limited': 0, 'failed': [], 'start_time': time.time()}
+
+        if self.cache:
+            interrupted = self.cache.recover_interrupted()
+            if interrupted:
+                print(f"♻️  Resuming: {interrupted} batches were in flight when the last run stopped")
+
         if total == 0:
             print("✅ All verses already tagged!")
-            return
+            return stats
 
         print(f"📊 Found {total} untagged verses")
-        print(f"🚀 Processing in batches of {self.batch_size} with {max_workers} parallel workers\n")
-
-        # Split into batches
-        batches = [verses[i:i + self.batch_size] for i in range(0, len(verses), self.batch_size)]
+        print(f"🚀 Processing in batches of {self.batch_size} with up to {max_workers} "
+              f"concurrent requests ({self.requests_per_minute:g} req/min)\n")
 
-        completed = 0
-        start_time = time.time()
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(0, total, self.batch_size):
+            queue.put_nowait((verses[i:i + self.batch_size], 0, 0))
 
-        # Process batches in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_batch = {executor.submit(self.tag_batch, batch): i
-                             for i, batch in enumerate(batches)}
+        rate = self.requests_per_minute / 60
+        bucket = TokenBucket(rate, capacity=max(1.0, min(rate * 5, max_workers)))
+        limiter = AdaptiveConcurrency(initial=min(2, max_workers), maximum=max_workers)
 
-            for future in as_completed(future_to_batch):
-                batch_num = future_to_batch[future]
+        async def worker():
+            while True:
+                batch, attempt, throttled = await queue.get()
                 try:
-                    tagged = future.result()
-                    if tagged:
-                        self.update_themes(tagged)
-                        completed += len(tagged)
-
-                        elapsed = time.time() - start_time
-                        rate = completed / elapsed if elapsed > 0 else 0
-                        remaining = total - completed
-                        eta = remaining / rate if rate > 0 else 0
-
-                        print(f"✓ Batch {batch_num + 1}/{len(batches)}: {completed}/{total} verses "
-                              f"({100*completed/total:.1f}%) | "
-                              f"Rate: {rate:.1f} verses/sec | "
-                              f"ETA: {eta/60:.1f} min")
+                    await self._process_batch(batch, attempt, throttled, queue, bucket, limiter, stats)
                 except Exception as e:
-                    print(f"✗ Batch {batch_num + 1} failed: {e}")
-
-        elapsed = time.time() - start_time
-        print(f"\n✅ Completed {completed}/{total} verses in {elapsed/60:.1f} minutes")
-        print(f"📈 Average rate: {completed/elapsed:.1f} verses/second")
+                    # Never let a worker die with batches still queued
+                    stats['failed'].extend(v[1] for v in batch)
+                    print(f"✗ Batch of {len(batch)} verses failed: {e}")
+                finally:
+                    queue.task_done()
+
+        with ThemeWriter(self.db_path) as self.writer:
+            workers = [asyncio.create_task(worker()) for _ in range(max_workers)]
+            try:
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        elapsed = time.time() - stats['start_time']
+        print(f"\n✅ Completed {stats['completed']}/{total} verses in {elapsed/60:.1f} minutes")
+        print(f"📈 Average rate: {stats['completed']/elapsed:.1f} verses/second")
+        print(f"🔁 Retries: {stats['retried']} | Splits: {stats['split']} | "
+              f"Rate limited: {stats['rate_limited']} | From cache: {stats['cached']}")
+        if stats['failed']:
+            print(f"⚠️  {len(stats['failed'])} verses failed: {', '.join(stats['failed'])}")
+
+        return stats
+
+    def tag_books(self, books: List[str], max_workers: int = 8) -> Dict:
+        """Tag all verses in specified books"""
+        return asyncio.run(self.tag_books_async(books, max_workers))
 
 def main():
+    parser = argparse.ArgumentParser(description="Tag Psalms and the NT with Claude")
+    parser.add_argument('--db', default="assets/bible.db", help="Database path (default: assets/bible.db)")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Maximum concurrent requests (default: 8)")
+    parser.add_argument('--rpm', type=float, default=50,
+                        help="Request rate limit per minute (default: 50)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Use the local stand-in client instead of the API")
+    parser.add_argument('--cache', default=CACHE_PATH,
+                        help=f"Response cache and journal sidecar (default: {CACHE_PATH})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Disable the response cache and journal")
+    args = parser.parse_args()
+
     # Check for API key
-    if not os.environ.get("ANTHROPIC_API_KEY"):
+    if not args.offline and not os.environ.get("ANTHROPIC_API_KEY"):
         print("❌ Error: ANTHROPIC_API_KEY environment variable not set")
         print("\nSet it with:")
         print('  export ANTHROPIC_API_KEY="your-key-here"')
         sys.exit(1)
 
-    db_path = "assets/bible.db"
+    db_path = args.db
 
     if not os.path.exists(db_path):
         print(f"❌ Error: Database not found at {db_path}")
         sys.exit(1)
 
-    tagger = BibleThemeTagger(db_path, batch_size=50)
+    client = OfflineTaggingClient() if args.offline else None
+    tagger = BibleThemeTagger(db_path, batch_size=50, client=client,
+                              requests_per_minute=args.rpm,
+                              cache_path=None if args.no_cache else args.cache)
 
     # Priority 1: Psalms (most important comfort book)
     print("=" * 70)
     print("PHASE 1: PSALMS (2,461 verses)")
     print("=" * 70)
-    tagger.tag_books(["Psalms"], max_workers=4)
+    tagger.tag_books(["Psalms"], max_workers=args.concurrency)
 
     # Priority 2: Gospels
     print("\n" + "=" * 70)
     print("PHASE 2: GOSPELS (3,779 verses)")
     print("=" * 70)
-    tagger.tag_books(["Matthew", "Mark", "Luke", "John"], max_workers=4)
+    tagger.tag_books(["Matthew", "Mark", "Luke", "John"], max_workers=args.concurrency)
 
     # Priority 3: Key Epistles
     print("\n" + "=" * 70)
     print("PHASE 3: KEY EPISTLES (788 verses)")
     print("=" * 70)
     tagger.tag_books(["Romans", "Ephesians", "Philippians", "Colossians",
-                      "1 Corinthians", "2 Corinthians", "Galatians"], max_workers=4)
+                      "1 Corinthians", "2 Corinthians", "Galatians"], max_workers=args.concurrency)
 
     # Final stats
     conn = sqlite3.connect(db_path)
@@ -201,6 +694,10 @@ def main():
     total = cursor.fetchone()[0]
     cursor.execute("SELECT COUNT(*) FROM verses WHERE themes IS NOT NULL AND LENGTH(themes) > 2")
     tagged = cursor.fetchone()[0]
+
+    # Keep the random/ranked theme lookup table in step with the new tags
+    postings = build_theme_postings(conn)
+    conn.commit()
     conn.close()
 
     print("\n" + "=" * 70)
@@ -209,6 +706,7 @@ def main():
     print(f"Total verses: {total:,}")
     print(f"Tagged verses: {tagged:,}")
     print(f"Coverage: {100*tagged/total:.1f}%")
+    print(f"Theme postings: {postings['postings']:,}")
 
 if __name__ == "__main__":
     main()
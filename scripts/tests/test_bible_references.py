@@ -0,0 +1,17 @@
+from bible_references import make_vid, parse_reference
+
+
+def test_single_chapter_books_take_bare_verse_numbers():
+    for reference, book_id in (("Jude 3", 65), ("Judas 3", 65), ("Philemon 4", 57), ("Filemón 4", 57)):
+        verse = int(reference.split()[-1])
+        parsed = parse_reference(reference)
+        assert parsed.book_id == book_id
+        assert parsed.ranges == ((make_vid(book_id, 1, verse),) * 2,)
+
+    assert parse_reference("Jude 3-5").ranges == ((make_vid(65, 1, 3), make_vid(65, 1, 5)),)
+    assert parse_reference("Jude 1:3").ranges == ((make_vid(65, 1, 3),) * 2,)
+    assert parse_reference("Jude 2:1") is None
+
+
+def test_bare_numbers_are_chapters_elsewhere():
+    assert parse_reference("Salmos 23").ranges == ((make_vid(19, 23, 1), make_vid(19, 23, 999)),)
@@ -0,0 +1,38 @@
+from map_themes_to_verses import VerseIndex, inflections
+
+VERSES = [
+    (1, 'Genesis 1:1', 'In the beginning, God created the heavens and the earth.'),
+    (2, 'Psalm 4:4', 'Search your own heart on your bed, and be still.'),
+    (3, 'Romans 3:23', 'For all have sinned, and fall short of the glory of God.'),
+    (4, 'James 4:1', 'Where do wars and fightings among you come from?'),
+    (5, 'Mark 4:9', 'He said, "Whoever has ears to hear, let him hear."'),
+    (6, 'Matthew 6:19', 'where moth and rust consume, and where thieves break through'),
+    (7, 'Exodus 20:12', 'Honor your father and your mother.'),
+    (8, '1 Peter 5:7', 'casting all your worries on him, because he cares for you.'),
+]
+
+
+def test_keywords_do_not_match_unrelated_words():
+    index = VerseIndex(VERSES)
+    assert 'god' not in inflections('go')
+    assert index.lookup('go') == set()
+    assert 'heart' not in inflections('hear')
+    assert index.lookup('hear') == {5}
+    assert index.lookup('moth') == {6}
+    assert 'manner' not in inflections('man')
+    assert 'ward' not in inflections('war')
+
+
+def test_keywords_match_inflections():
+    index = VerseIndex(VERSES)
+    assert index.lookup('sin') == {3}
+    assert index.lookup('war') == {4}
+    assert index.lookup('worry') == {8}
+    assert index.lookup('care') == {8}
+
+
+def test_phrase_backtracks_past_dead_end_positions():
+    assert VerseIndex._has_phrase([[0], [1, 3], [5]])
+    assert not VerseIndex._has_phrase([[0], [1], [9]])
+    index = VerseIndex(VERSES)
+    assert index.lookup('cast worry') == {8}
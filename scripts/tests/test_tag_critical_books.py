@@ -0,0 +1,97 @@
+import json
+import sqlite3
+
+import pytest
+
+import tag_critical_books
+from tag_critical_books import BibleThemeTagger, OfflineTaggingClient, RateLimitedError
+
+POISON_ID = 3
+
+
+class ScriptedClient(OfflineTaggingClient):
+    """Offline client that is throttled once, then never answers for POISON_ID."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    async def complete(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            raise RateLimitedError("simulated 429", retry_after=0.001)
+        if f"[{POISON_ID}]" in prompt:
+            return "not json"
+        return await super().complete(prompt)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(tag_critical_books, 'BACKOFF_BASE', 0.0)
+
+
+@pytest.fixture
+def bible_db(tmp_path):
+    path = tmp_path / 'bible.db'
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE verses (
+            id INTEGER PRIMARY KEY, book TEXT, reference TEXT,
+            text TEXT, clean_text TEXT, themes TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO verses (id, book, reference, text, clean_text) VALUES (?, 'Psalms', ?, ?, ?)",
+        [(i, f"Psalms 1:{i}", f'\\+w hope|strong="H{i}"\\+w* and peace {i}', f"hope and peace {i}")
+         for i in range(1, 5)]
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def tagged_themes(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = dict(conn.execute("SELECT id, themes FROM verses WHERE themes IS NOT NULL"))
+    conn.close()
+    return rows
+
+
+def run_tagger(db_path, cache_path, client):
+    tagger = BibleThemeTagger(db_path, batch_size=4, client=client,
+                              requests_per_minute=60_000, cache_path=cache_path)
+    return tagger.tag_books(["Psalms"], max_workers=2)
+
+
+def test_retry_split_and_cache_resume(bible_db, tmp_path):
+    cache_path = str(tmp_path / 'cache.db')
+    client = ScriptedClient()
+    stats = run_tagger(bible_db, cache_path, client)
+
+    # Prompts carry clean_text, never the Strong's markup
+    assert all('strong=' not in prompt for prompt in client.prompts)
+
+    # A throttle doesn't use up error retries: 1 throttled + (MAX_RETRIES + 1) failed calls
+    full_batch = [p for p in client.prompts if all(f"[{i}]" in p for i in range(1, 5))]
+    assert len(full_batch) == 1 + tag_critical_books.MAX_RETRIES + 1
+    assert stats['rate_limited'] == 1
+
+    # [1-4] splits into [1, 2] and [3, 4]; [3, 4] splits again and only verse 3 fails
+    assert stats['split'] == 2
+    assert stats['retried'] >= tag_critical_books.MAX_RETRIES
+    assert stats['failed'] == [f"Psalms 1:{POISON_ID}"]
+    themes = tagged_themes(bible_db)
+    assert sorted(themes) == [1, 2, 4]
+    assert json.loads(themes[1]) == ["hope", "peace"]
+
+    # A second run replays every answered verse from the cache and only asks about verse 3
+    conn = sqlite3.connect(bible_db)
+    conn.execute("UPDATE verses SET themes = NULL")
+    conn.commit()
+    conn.close()
+
+    client = ScriptedClient()
+    stats = run_tagger(bible_db, cache_path, client)
+    assert stats['cached'] == 3
+    assert client.prompts and all(f"[{POISON_ID}]" in prompt for prompt in client.prompts)
+    assert sorted(tagged_themes(bible_db)) == [1, 2, 4]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Stable integer ids for verse themes.
+
+A theme's id is its position in THEMES, which is the tag_critical_books.py
+vocabulary plus the extra themes Bible_Theme_Tagger.py assigns. Ids are
+stored in exported files and tables, so only ever append to this list.
+
+A set of themes packs into a 128-bit mask (bit i = THEMES[i]), stored as
+two signed 64-bit halves where SQLite or fixed-width columns need it.
+"""
+
+import json
+from typing import Iterable, List, Optional, Tuple
+
+THEMES = [
+    "hope", "faith", "love", "grace", "mercy", "forgiveness", "redemption",
+    "salvation", "peace", "joy", "comfort", "strength", "courage", "wisdom",
+    "guidance", "protection", "provision", "healing", "restoration", "patience",
+    "perseverance", "humility", "obedience", "repentance", "prayer", "worship",
+    "praise", "thanksgiving", "trust", "fear", "anxiety", "depression", "grief",
+    "suffering", "trials", "temptation", "sin", "justice", "righteousness",
+    "holiness", "truth", "faithfulness", "compassion", "kindness", "gentleness",
+    "self-control", "family", "marriage", "relationships", "friendship", "leadership",
+    "service", "stewardship", "generosity", "evangelism", "discipleship", "unity",
+    "church", "kingdom", "eternal life", "heaven", "resurrection", "second coming",
+    "spiritual warfare", "holy spirit", "creator", "sovereignty", "power", "presence",
+    # Bible_Theme_Tagger.py
+    "freedom",
+]
+
+MAX_THEMES = 128
+
+THEME_IDS = {theme: theme_id for theme_id, theme in enumerate(THEMES)}
+
+assert len(THEMES) <= MAX_THEMES and len(THEME_IDS) == len(THEMES)
+
+
+def parse_themes(value: Optional[str]) -> List[str]:
+    """Themes from a verses.themes JSON value; None, '' and bad JSON give []."""
+    if not value:
+        return []
+    try:
+        themes = json.loads(value)
+    except ValueError:
+        return []
+    return [theme for theme in themes if isinstance(theme, str)] if isinstance(themes, list) else []
+
+
+def theme_mask(themes: Iterable[str]) -> Tuple[int, List[str]]:
+    """Return (mask, unknown_themes) for a list of theme names."""
+    mask = 0
+    unknown = []
+    for theme in themes:
+        theme_id = THEME_IDS.get(theme.strip().lower())
+        if theme_id is None:
+            unknown.append(theme)
+        else:
+            mask |= 1 << theme_id
+    return mask, unknown
+
+
+def mask_themes(mask: int) -> List[str]:
+    """Theme names set in a mask, in id order."""
+    return [theme for theme_id, theme in enumerate(THEMES) if mask >> theme_id & 1]
+
+
+def _signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def split_mask(mask: int) -> Tuple[int, int]:
+    """Split a 128-bit mask into signed 64-bit (lo, hi) halves for SQLite."""
+    return _signed64(mask & 0xFFFFFFFFFFFFFFFF), _signed64(mask >> 64)
+
+
+def join_mask(lo: int, hi: int) -> int:
+    """Inverse of split_mask()."""
+    return (hi & 0xFFFFFFFFFFFFFFFF) << 64 | (lo & 0xFFFFFFFFFFFFFFFF)
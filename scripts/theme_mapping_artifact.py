@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Compact artifact for the theme -> verse mappings from map_themes_to_verses.py.
+
+theme_verse_mappings.json repeats every verse's text inside every theme
+that uses it. The artifact stores each verse once and each theme as packed
+arrays, so startup only needs the ids:
+
+    mapping_themes(mapping_theme_id, name, keywords, verse_count, vids, scores)
+        vids    sorted uint32 little-endian verse ids (BBCCCVVV)
+        scores  float32 little-endian match scores, aligned with vids
+    mapping_verses(vid, reference, text)     deduplicated verse text
+
+mapping_theme_id is the theme's position in THEME_KEYWORDS, not a
+theme_ids.THEMES id; join on name when combining the two. References that
+don't parse to a single verse are left out and reported.
+
+ThemeMappings loads every theme's ids in one query and fetches verse text
+lazily by primary key.
+
+Usage:
+    python3 theme_mapping_artifact.py --report     # compare against the JSON
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bible_references import parse_reference
+
+JSON_PATH = "../assets/training_data/theme_verse_mappings.json"
+ARTIFACT_PATH = "../assets/training_data/theme_verse_mappings.db"
+
+
+def _pack(typecode: str, values: Iterable) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(typecode: str, blob: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(blob)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def reference_vid(reference: str) -> Optional[int]:
+    """vid of a single-verse reference like "John 3:16", or None."""
+    parsed = parse_reference(reference)
+    if not parsed or not parsed.is_single_verse:
+        return None
+    return parsed.ranges[0][0]
+
+
+def mapped_vids(mapping: Dict) -> List[Tuple[int, Dict]]:
+    """(vid, verse) for every verse of a theme mapping whose reference parses."""
+    vids = ((reference_vid(verse['reference']), verse) for verse in mapping['verses'])
+    return [(vid, verse) for vid, verse in vids if vid is not None]
+
+
+def write_artifact(mappings: Dict, output_path: str) -> Dict:
+    """
+    Write the artifact from create_theme_verse_mappings() output
+    ({theme: {'keywords', 'verses': [{'reference', 'text', 'match_score'}]}}).
+    """
+    verse_rows = {}
+    theme_rows = []
+    skipped = set()
+    for mapping_theme_id, (name, mapping) in enumerate(mappings.items()):
+        verses = mapped_vids(mapping)
+        skipped.update(verse['reference'] for verse in mapping['verses']
+                       if reference_vid(verse['reference']) is None)
+        scored = sorted((vid, verse['match_score']) for vid, verse in verses)
+        for vid, verse in verses:
+            verse_rows[vid] = (verse['reference'], verse['text'])
+
+        theme_rows.append((
+            mapping_theme_id, name, json.dumps(mapping['keywords'], ensure_ascii=False), len(scored),
+            _pack('I', (vid for vid, _ in scored)), _pack('f', (score for _, score in scored))
+        ))
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    conn = sqlite3.connect(output_path)
+    conn.execute('''
+        CREATE TABLE mapping_themes (
+            mapping_theme_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            keywords TEXT NOT NULL,
+            verse_count INTEGER NOT NULL,
+            vids BLOB NOT NULL,
+            scores BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE mapping_verses (
+            vid INTEGER PRIMARY KEY,
+            reference TEXT NOT NULL,
+            text TEXT NOT NULL
+        )
+    ''')
+    conn.executemany('INSERT INTO mapping_themes VALUES (?, ?, ?, ?, ?, ?)', theme_rows)
+    conn.executemany('INSERT INTO mapping_verses VALUES (?, ?, ?)',
+                     [(vid, reference, text) for vid, (reference, text) in sorted(verse_rows.items())])
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+
+    return {
+        'themes': len(theme_rows),
+        'mappings': sum(row[3] for row in theme_rows),
+        'unique_verses': len(verse_rows),
+        'skipped': sorted(skipped),
+    }
+
+
+class ThemeMappings:
+    """Loader for the artifact: ids up front, verse text on demand."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.vids: Dict[str, array] = {}
+        self._scores: Dict[str, bytes] = {}
+
+        for name, vids, scores in self.conn.execute('SELECT name, vids, scores FROM mapping_themes'):
+            self.vids[name] = _unpack('I', vids)
+            self._scores[name] = scores
+
+    def themes(self) -> List[str]:
+        return list(self.vids)
+
+    def verse_ids(self, theme: str) -> array:
+        """Sorted vids mapped to a theme."""
+        return self.vids[theme]
+
+    def scores(self, theme: str) -> array:
+        """Match scores aligned with verse_ids(theme)."""
+        return _unpack('f', self._scores[theme])
+
+    def ranked(self, theme: str) -> List[Tuple[int, float]]:
+        """(vid, score) best-first, ties broken by vid."""
+        return sorted(zip(self.verse_ids(theme), self.scores(theme)), key=lambda item: (-item[1], item[0]))
+
+    def text(self, vid: int) -> Tuple[str, str]:
+        """(reference, text) for one verse."""
+        row = self.conn.execute('SELECT reference, text FROM mapping_verses WHERE vid = ?', (vid,)).fetchone()
+        if row is None:
+            raise KeyError(vid)
+        return row
+
+    def texts(self, vids: List[int]) -> Dict[int, Tuple[str, str]]:
+        """{vid: (reference, text)} for several verses in one query."""
+        rows = self.conn.execute(
+            f"SELECT vid, reference, text FROM mapping_verses WHERE vid IN ({','.join('?' * len(vids))})",
+            list(vids)
+        ) if vids else []
+        return {vid: (reference, text) for vid, reference, text in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+def report(json_path: str, artifact_path: str):
+    """Print size and load-latency of the JSON mappings against the artifact."""
+    start_time = time.time()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        mappings = json.load(f)
+    json_ms = (time.time() - start_time) * 1000
+
+    start_time = time.time()
+    loader = ThemeMappings(artifact_path)
+    ids_ms = (time.time() - start_time) * 1000
+
+    theme = next(iter(mappings))
+    start_time = time.time()
+    top = [vid for vid, _ in loader.ranked(theme)[:5]]
+    loader.texts(top)
+    lazy_ms = (time.time() - start_time) * 1000
+
+    # The artifact must carry exactly the same theme -> verse assignments
+    for name, mapping in mappings.items():
+        expected = sorted(vid for vid, _ in mapped_vids(mapping))
+        if list(loader.verse_ids(name)) != expected:
+            raise ValueError(f"Artifact differs from JSON for theme {name}")
+    loader.close()
+
+    json_size = os.path.getsize(json_path)
+    artifact_size = os.path.getsize(artifact_path)
+
+    print("\n📊 Theme mapping artifact report")
+    print(f"   JSON:      {json_size / 1024:8.1f} KB, full parse {json_ms:7.2f} ms")
+    print(f"   Artifact:  {artifact_size / 1024:8.1f} KB, all theme ids {ids_ms:7.2f} ms")
+    print(f"   Lazy text: top 5 verses of '{theme}' in {lazy_ms:.2f} ms")
+    print(f"   Size: {artifact_size / json_size * 100:.0f}% of the JSON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the compact theme mapping artifact")
+    parser.add_argument('--json', default=JSON_PATH, help=f"Mappings JSON (default: {JSON_PATH})")
+    parser.add_argument('--output', default=ARTIFACT_PATH, help=f"Artifact path (default: {ARTIFACT_PATH})")
+    parser.add_argument('--report', action='store_true', help="Only print the size/latency report")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        print(f"❌ Mappings not found: {args.json} - run map_themes_to_verses.py first")
+        sys.exit(1)
+
+    if not args.report:
+        with open(args.json, 'r', encoding='utf-8') as f:
+            stats = write_artifact(json.load(f), args.output)
+        print(f"✅ Wrote {stats['themes']} themes, {stats['mappings']} mappings, "
+              f"{stats['unique_verses']} unique verses to {args.output}")
+        if stats['skipped']:
+            print(f"  ⚠️  Skipped unparseable references: {', '.join(stats['skipped'])}")
+
+    report(args.json, args.output)
+
+
+if __name__ == '__main__':
+    main()
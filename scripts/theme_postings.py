@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Precomputed theme -> verse postings for O(log n) theme browsing.
+
+UnifiedVerseService.searchByTheme finds themed verses with
+`themes LIKE '%"hope"%' ... ORDER BY RANDOM()`, a full scan and sort per
+call. The postings give every (theme, language) a dense rank 0..count-1:
+
+    theme_postings(theme_id, language, rank, verse_id)   PRIMARY KEY (theme_id, language, rank)
+    theme_counts(name, language, theme_id, count)        PRIMARY KEY (name, language)
+
+Ranks follow the taggers' best-first order (a verse's first theme before
+its second), then verse id, so `rank < k` is the top k and a random verse
+is one primary-key probe:
+
+    rank = abs(random()) % count
+
+theme_id comes from theme_ids.THEMES. verse_id is the row id of the table
+the postings were built from (verses.id in the builder databases,
+bible_verses.id in the compiled app database).
+
+Usage:
+    python3 theme_postings.py                          # ../assets/bible.db
+    python3 theme_postings.py --db app_bible.db --pick hope
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from theme_ids import THEME_IDS, THEMES, parse_themes
+
+DB_PATH = "../assets/bible.db"
+
+# Builder databases have no language column
+TRANSLATION_LANGUAGES = {'WEB': 'en', 'RVR1909': 'es'}
+
+# One random themed verse: the scalar subquery draws the rank once from
+# theme_counts, then theme_postings is probed by its full primary key
+RANDOM_PICK_SQL = '''
+    SELECT p.verse_id
+    FROM theme_postings AS p
+    WHERE (p.theme_id, p.language, p.rank) = (
+        SELECT c.theme_id, c.language, abs(random()) % c.count
+        FROM theme_counts AS c
+        WHERE c.name = ? AND c.language = ?
+    )
+'''
+
+
+def create_posting_tables(conn: sqlite3.Connection):
+    conn.execute('DROP TABLE IF EXISTS theme_postings')
+    conn.execute('DROP TABLE IF EXISTS theme_counts')
+    conn.execute('''
+        CREATE TABLE theme_postings (
+            theme_id INTEGER NOT NULL,
+            language TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            verse_id INTEGER NOT NULL,
+            PRIMARY KEY (theme_id, language, rank)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE theme_counts (
+            name TEXT NOT NULL,
+            language TEXT NOT NULL,
+            theme_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (name, language)
+        ) WITHOUT ROWID
+    ''')
+
+
+def read_themed_rows(conn: sqlite3.Connection) -> List[Tuple[int, str, Optional[str]]]:
+    """(verse_id, language, themes JSON) from bible_verses, or from verses in a builder database."""
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'bible_verses' in tables:
+        return conn.execute(
+            "SELECT id, language, themes FROM bible_verses WHERE themes IS NOT NULL"
+        ).fetchall()
+
+    return [(verse_id, TRANSLATION_LANGUAGES.get(translation, 'en'), themes)
+            for verse_id, translation, themes in conn.execute(
+                "SELECT id, translation, themes FROM verses WHERE themes IS NOT NULL"
+            )]
+
+
+def build_theme_postings(conn: sqlite3.Connection) -> Dict:
+    """Rebuild theme_postings and theme_counts from the themes JSON column."""
+    postings: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
+    unknown = set()
+    for verse_id, language, themes in read_themed_rows(conn):
+        seen = set()
+        for position, theme in enumerate(parse_themes(themes)):
+            theme_id = THEME_IDS.get(theme.strip().lower())
+            if theme_id is None:
+                unknown.add(theme)
+            elif theme_id not in seen:
+                seen.add(theme_id)
+                postings.setdefault((theme_id, language), []).append((position, verse_id))
+
+    create_posting_tables(conn)
+    rows = []
+    counts = []
+    for (theme_id, language), entries in sorted(postings.items()):
+        entries.sort()
+        rows.extend((theme_id, language, rank, verse_id) for rank, (_, verse_id) in enumerate(entries))
+        counts.append((THEMES[theme_id], language, theme_id, len(entries)))
+
+    conn.executemany('INSERT INTO theme_postings VALUES (?, ?, ?, ?)', rows)
+    conn.executemany('INSERT INTO theme_counts VALUES (?, ?, ?, ?)', counts)
+
+    return {'postings': len(rows), 'themes': len(counts), 'unknown_themes': sorted(unknown)}
+
+
+def random_verse_ids(conn: sqlite3.Connection, theme: str, language: str = 'en', limit: int = 1) -> List[int]:
+    """Up to `limit` distinct random verse ids for a theme, one primary-key probe each."""
+    row = conn.execute(
+        "SELECT theme_id, count FROM theme_counts WHERE name = ? AND language = ?", (theme, language)
+    ).fetchone()
+    if row is None:
+        return []
+
+    theme_id, count = row
+    picked: List[int] = []
+    for rank in random.sample(range(count), min(limit, count)):
+        posting = conn.execute(
+            "SELECT verse_id FROM theme_postings WHERE theme_id = ? AND language = ? AND rank = ?",
+            (theme_id, language, rank)
+        ).fetchone()
+        if posting is not None:
+            picked.append(posting[0])
+    return picked
+
+
+def top_verse_ids(conn: sqlite3.Connection, theme: str, language: str = 'en', limit: int = 20) -> List[int]:
+    """The first `limit` postings of a theme (best-tagged verses first)."""
+    return [verse_id for (verse_id,) in conn.execute('''
+        SELECT p.verse_id FROM theme_counts AS c
+        JOIN theme_postings AS p ON p.theme_id = c.theme_id AND p.language = c.language
+        WHERE c.name = ? AND c.language = ? AND p.rank < ?
+        ORDER BY p.rank
+    ''', (theme, language, limit))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build theme_postings for random and ranked theme lookups")
+    parser.add_argument('--db', default=DB_PATH, help=f"Bible database (default: {DB_PATH})")
+    parser.add_argument('--pick', metavar='THEME', help="After building, print 5 random verses for a theme")
+    parser.add_argument('--language', default='en', help="Language for --pick (default: en)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    start_time = time.time()
+    stats = build_theme_postings(conn)
+    conn.commit()
+    print(f"✅ {stats['postings']} postings for {stats['themes']} theme/language pairs "
+          f"({time.time() - start_time:.2f}s)")
+    if stats['unknown_themes']:
+        print(f"  ⚠️  Themes not in theme_ids.THEMES (skipped): {', '.join(stats['unknown_themes'])}")
+
+    if args.pick:
+        plan = conn.execute(f'EXPLAIN QUERY PLAN {RANDOM_PICK_SQL}', (args.pick, args.language)).fetchall()
+        start_time = time.time()
+        verse_ids = random_verse_ids(conn, args.pick, args.language, limit=5)
+        elapsed_ms = (time.time() - start_time) * 1000
+        print(f"\n🎲 {len(verse_ids)} random '{args.pick}' verses in {elapsed_ms:.2f} ms: {verse_ids}")
+        for row in plan:
+            print(f"   {row[3]}")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
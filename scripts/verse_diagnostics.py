@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Fuzzy diagnostics for devotional verse text that doesn't match the database.
+
+diagnose() classifies a mismatch with the cheapest check that explains it:
+
+    placeholder  the devotional text is a "[...]" placeholder
+    unicode      equal after NFC + whitespace normalization
+    case         ...and case folding
+    accents      ...and accent stripping
+    punctuation  ...and punctuation removal
+    partial      one text contains the other (a verse fragment)
+    minor        similarity >= MINOR_RATIO
+    different    anything else
+
+Only pairs that survive a length bound and a trigram (q-gram) Dice
+prefilter are aligned with difflib, so triaging thousands of mismatches
+stays fast. suggest_reference() ranks nearby verses (1-3 verse windows)
+the same way to propose the reference the text was actually taken from.
+
+Usage:
+    python3 verse_diagnostics.py "devotional text" "database text"
+"""
+
+import difflib
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Trigram signatures for the prefilter
+QGRAM_SIZE = 3
+
+# Below this Dice coefficient two texts are "different" without alignment
+PREFILTER_DICE = 0.35
+
+# Similarity at or above which a mismatch is "minor"
+MINOR_RATIO = 0.85
+
+# Only look for a better reference when similarity is below this
+SUGGEST_BELOW = 0.6
+
+# A suggested reference must be at least this similar
+SUGGEST_MIN_RATIO = 0.75
+
+# Consecutive verses a devotional text may span
+MAX_WINDOW = 3
+
+# Cap on diff segments kept per mismatch in the report
+MAX_DIFF_SEGMENTS = 20
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+PLACEHOLDER_PATTERN = re.compile(r'^\s*\[.*\]\s*$', re.DOTALL)
+
+
+def normalize_nfc(text: str) -> str:
+    """NFC-normalize and collapse whitespace."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text)
+    return unicodedata.normalize('NFC', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+@lru_cache(maxsize=65536)
+def fold(text: str) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive form of a text."""
+    folded = PUNCTUATION_PATTERN.sub(' ', strip_accents(text.casefold()))
+    return ' '.join(folded.split())
+
+
+@lru_cache(maxsize=65536)
+def qgrams(folded: str) -> FrozenSet[str]:
+    """Trigram signature of a folded text."""
+    padded = f" {folded} "
+    return frozenset(padded[i:i + QGRAM_SIZE] for i in range(len(padded) - QGRAM_SIZE + 1))
+
+
+def dice(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def length_bound(a: str, b: str) -> float:
+    """Upper bound on SequenceMatcher.ratio() from the lengths alone."""
+    total = len(a) + len(b)
+    return 2 * min(len(a), len(b)) / total if total else 1.0
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Punctuation-, case- and accent-insensitive similarity in [0, 1].
+    Returns the cheap Dice estimate when the prefilter rules out alignment.
+    """
+    folded_a, folded_b = fold(a), fold(b)
+    if folded_a == folded_b:
+        return 1.0
+
+    estimate = dice(qgrams(folded_a), qgrams(folded_b))
+    if estimate < PREFILTER_DICE or length_bound(folded_a, folded_b) < PREFILTER_DICE:
+        return estimate
+
+    return difflib.SequenceMatcher(None, folded_a, folded_b, autojunk=False).ratio()
+
+
+def char_diff(devotional: str, database: str) -> List[Dict]:
+    """Character-level differences between the NFC forms of two texts."""
+    a, b = normalize_nfc(devotional), normalize_nfc(database)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+
+    segments = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            continue
+        segments.append({'op': op, 'position': i1, 'devotional': a[i1:i2], 'database': b[j1:j2]})
+        if len(segments) == MAX_DIFF_SEGMENTS:
+            break
+    return segments
+
+
+def render_diff(devotional: str, database: str, context: int = 12) -> str:
+    """One-line wdiff-style rendering: ...context[-devotional-]{+database+}context..."""
+    a, b = normalize_nfc(devotional), normalize_nfc(database)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+
+    parts = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            chunk = a[i1:i2]
+            if len(chunk) > 2 * context:
+                chunk = (chunk[:context] if parts else '') + '…' + chunk[-context:]
+            parts.append(chunk)
+            continue
+        if i2 > i1:
+            parts.append(f"[-{a[i1:i2]}-]")
+        if j2 > j1:
+            parts.append(f"{{+{b[j1:j2]}+}}")
+    return ''.join(parts)
+
+
+def diagnose(devotional: str, database: str) -> Dict:
+    """Classify a mismatch and attach a similarity score and character diff."""
+    if PLACEHOLDER_PATTERN.match(devotional):
+        return {'category': 'placeholder', 'similarity': 0.0}
+
+    a, b = normalize_nfc(devotional), normalize_nfc(database)
+
+    if a == b:
+        category = 'unicode'
+    elif a.casefold() == b.casefold():
+        category = 'case'
+    elif strip_accents(a.casefold()) == strip_accents(b.casefold()):
+        category = 'accents'
+    elif fold(a) == fold(b):
+        category = 'punctuation'
+    else:
+        category = None
+
+    if category:
+        return {'category': category, 'similarity': 1.0, 'diff': char_diff(a, b)}
+
+    folded_a, folded_b = fold(a), fold(b)
+    if folded_a and folded_b and (folded_a in folded_b or folded_b in folded_a):
+        ratio = similarity(a, b)
+        return {'category': 'partial', 'similarity': round(ratio, 3), 'diff': char_diff(a, b)}
+
+    ratio = similarity(a, b)
+    diagnosis = {
+        'category': 'minor' if ratio >= MINOR_RATIO else 'different',
+        'similarity': round(ratio, 3),
+    }
+    # A diff of two unrelated verses is noise for reviewers
+    if ratio >= SUGGEST_BELOW:
+        diagnosis['diff'] = char_diff(a, b)
+    return diagnosis
+
+
+def verse_windows(verses: Dict[int, str], max_window: int = MAX_WINDOW) -> Iterable[Tuple[int, int, str]]:
+    """Yield (first, last, joined_text) for every run of 1..max_window consecutive verses."""
+    numbers = sorted(verses)
+    for i, first in enumerate(numbers):
+        text = verses[first]
+        yield first, first, text
+        last = first
+        for number in numbers[i + 1:i + max_window]:
+            if number != last + 1:
+                break
+            last = number
+            text = f"{text} {verses[number]}"
+            yield first, last, text
+
+
+def suggest_reference(devotional: str, book: str, chapters: Dict[int, Dict[int, str]],
+                      current_ratio: float = 0.0) -> Optional[Dict]:
+    """
+    Find the verse window in `chapters` ({chapter: {verse: text}}) that best
+    matches the devotional text. Returns {'reference', 'similarity'} or None.
+    """
+    folded = fold(devotional)
+    signature = qgrams(folded)
+
+    best = None
+    best_ratio = max(current_ratio, SUGGEST_MIN_RATIO)
+    for chapter, verses in sorted(chapters.items()):
+        for first, last, text in verse_windows(verses):
+            candidate = fold(text)
+            # Prefilter: length bound, then trigram Dice, then alignment
+            if length_bound(folded, candidate) <= best_ratio:
+                continue
+            if dice(signature, qgrams(candidate)) < PREFILTER_DICE:
+                continue
+
+            ratio = difflib.SequenceMatcher(None, folded, candidate, autojunk=False).ratio()
+            if ratio > best_ratio:
+                verse_part = f"{first}-{last}" if last != first else str(first)
+                best = {'reference': f"{book} {chapter}:{verse_part}", 'similarity': round(ratio, 3)}
+                best_ratio = ratio
+
+    return best
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    devotional, database = sys.argv[1], sys.argv[2]
+    diagnosis = diagnose(devotional, database)
+    print(f"🔎 {diagnosis['category']} (similarity {diagnosis['similarity']})")
+    if diagnosis.get('diff'):
+        print(f"   {render_diff(devotional, database)}")
+
+
+if __name__ == '__main__':
+    main()
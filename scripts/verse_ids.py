@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Add canonical integer verse ids to a Bible database's verses table.
+
+    vid = book_id * 1_000_000 + chapter * 1_000 + verse_number   (BBCCCVVV)
+
+Book ids come from assets/data/bible_books.json, so the same verse has the
+same vid in the WEB (English names) and RVR1909 (Spanish names) databases.
+A UNIQUE index on vid backs the tables keyed by it (verse_themes) and
+lets a passage be read as one `vid BETWEEN ? AND ?` range. PassageFetcher reads chapters by book name
+for the devotional scripts.
+
+Usage:
+    python3 verse_ids.py ../assets/bible.db ../assets/spanish_bible_rvr1909.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bible_references import lookup_book
+
+
+def verse_text_sql(conn: sqlite3.Connection) -> str:
+    """
+    SQL for a verse's readable text. WEB's verses.text still carries
+    Strong's markup, so clean_text is used wherever the database has it.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    return 'COALESCE(clean_text, text)' if 'clean_text' in columns else 'text'
+
+
+def has_verse_ids(conn: sqlite3.Connection) -> bool:
+    """True if verses has a vid column backed by the unique index."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    if 'vid' not in columns:
+        return False
+
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_vid'"
+    ).fetchone()
+    return row is not None
+
+
+def assign_verse_ids(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add (if needed) and fill verses.vid, then create the unique index.
+    Runs one UPDATE per book. Returns the book names that could not be mapped.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(verses)")}
+    if 'vid' not in columns:
+        conn.execute("ALTER TABLE verses ADD COLUMN vid INTEGER")
+
+    book_ids = []
+    unmapped = []
+    for (book,) in conn.execute("SELECT DISTINCT book FROM verses"):
+        book_id = lookup_book(book)
+        if book_id is None:
+            unmapped.append(book)
+        else:
+            book_ids.append((book_id * 1_000_000, book))
+
+    conn.executemany(
+        "UPDATE verses SET vid = ? + chapter * 1000 + verse_number WHERE book = ?",
+        book_ids
+    )
+
+    duplicates = conn.execute(
+        "SELECT vid, COUNT(*) FROM verses WHERE vid IS NOT NULL GROUP BY vid HAVING COUNT(*) > 1 LIMIT 5"
+    ).fetchall()
+    if duplicates:
+        raise ValueError(f"Duplicate verse ids (vid, count): {duplicates}")
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_vid ON verses(vid)")
+    return unmapped
+
+
+class PassageFetcher:
+    """
+    Read passages a chapter at a time, memoizing every chapter for the run.
+
+    Works on book names, so it needs no vid column: each chapter is read
+    once with an `ORDER BY verse_number` scan of idx_book_chapter, and every
+    later verse or range from that chapter is served from memory. Texts
+    come from verse_text_sql() unless text_sql names another expression.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, text_sql: Optional[str] = None):
+        self.conn = conn
+        self.text_sql = text_sql or verse_text_sql(conn)
+        self.chapters: Dict[Tuple[str, int], Dict[int, str]] = {}
+        self.queries = 0
+
+    def chapter(self, book: str, chapter: int) -> Dict[int, str]:
+        """Return {verse_number: text} for one chapter."""
+        key = (book, chapter)
+        if key not in self.chapters:
+            self.chapters[key] = dict(self.conn.execute(
+                f"SELECT verse_number, {self.text_sql} FROM verses "
+                "WHERE book = ? AND chapter = ? ORDER BY verse_number",
+                (book, chapter)
+            ).fetchall())
+            self.queries += 1
+        return self.chapters[key]
+
+    def verses(self, book: str, chapter: int, verse_numbers: List[int]) -> List[Optional[str]]:
+        """Texts for the given verses of one chapter, None where a verse is missing."""
+        texts = self.chapter(book, chapter)
+        return [texts.get(verse) for verse in verse_numbers]
+
+    def verse_range(self, book: str, chapter: int, start: int, end: int) -> List[Optional[str]]:
+        """Texts for verses start..end (inclusive) of one chapter."""
+        return self.verses(book, chapter, list(range(start, end + 1)))
+
+
+def migrate(db_path: str):
+    """Add verse ids to one database file."""
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}")
+        sys.exit(1)
+
+    print(f"\n🔢 Adding verse ids to {db_path}...")
+    start_time = time.time()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        unmapped = assign_verse_ids(conn)
+        conn.commit()
+    except ValueError as e:
+        conn.rollback()
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    total, with_vid = conn.execute("SELECT COUNT(*), COUNT(vid) FROM verses").fetchone()
+    conn.close()
+
+    print(f"  ✅ {with_vid}/{total} verses have a vid ({time.time() - start_time:.2f}s)")
+    if unmapped:
+        print(f"  ⚠️  Unmapped books: {', '.join(sorted(unmapped))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add integer verse ids (vid) to Bible databases")
+    parser.add_argument('db_paths', nargs='*', default=['../assets/bible.db'],
+                        help="Databases with a verses table (default: ../assets/bible.db)")
+    args = parser.parse_args()
+
+    for db_path in args.db_paths:
+        migrate(db_path)
+
+
+if __name__ == '__main__':
+    main()
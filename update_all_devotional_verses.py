@@ -2,125 +2,140 @@
 """
 Comprehensive script to replace ALL devotional Bible verses with authentic RVR1909 text.
 This handles both single verses and multi-verse references.
+
+Batch files are processed in parallel, one file per worker. Each changed
+file is written to a temp file and swapped in with os.replace(), so a crash
+never leaves a half-written batch; files whose content is unchanged are
+not rewritten.
+
+Usage:
+    python3 update_all_devotional_verses.py                 # Spanish vs RVR1909
+    python3 update_all_devotional_verses.py --lang all      # Spanish and English (WEB)
+    python3 update_all_devotional_verses.py --dry-run       # print a unified diff only
 """
 
+import argparse
+import difflib
 import json
 import sqlite3
 import os
-import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
-# Spanish book name mappings
-BOOK_MAPPINGS = {
-    'génesis': 'Génesis', 'éxodo': 'Éxodo', 'levítico': 'Levítico',
-    'números': 'Números', 'deuteronomio': 'Deuteronomio', 'josué': 'Josué',
-    'jueces': 'Jueces', 'rut': 'Rut', '1 samuel': '1 Samuel', '2 samuel': '2 Samuel',
-    '1 reyes': '1 Reyes', '2 reyes': '2 Reyes', '1 crónicas': '1 Crónicas',
-    '2 crónicas': '2 Crónicas', 'esdras': 'Esdras', 'nehemías': 'Nehemías',
-    'ester': 'Ester', 'job': 'Job', 'salmos': 'Salmos', 'salmo': 'Salmos',
-    'proverbios': 'Proverbios', 'eclesiastés': 'Eclesiastés',
-    'cantares': 'Cantares', 'isaías': 'Isaías', 'jeremías': 'Jeremías',
-    'lamentaciones': 'Lamentaciones', 'ezequiel': 'Ezequiel', 'daniel': 'Daniel',
-    'oseas': 'Oseas', 'joel': 'Joel', 'amós': 'Amós', 'abdías': 'Abdías',
-    'jonás': 'Jonás', 'miqueas': 'Miqueas', 'nahúm': 'Nahúm', 'habacuc': 'Habacuc',
-    'sofonías': 'Sofonías', 'hageo': 'Hageo', 'zacarías': 'Zacarías',
-    'malaquías': 'Malaquías', 'mateo': 'Mateo', 'marcos': 'Marcos', 'lucas': 'Lucas',
-    'juan': 'Juan', 'hechos': 'Hechos', 'romanos': 'Romanos', '1 corintios': '1 Corintios',
-    '2 corintios': '2 Corintios', 'gálatas': 'Gálatas', 'efesios': 'Efesios',
-    'filipenses': 'Filipenses', 'colosenses': 'Colosenses', '1 tesalonicenses': '1 Tesalonicenses',
-    '2 tesalonicenses': '2 Tesalonicenses', '1 timoteo': '1 Timoteo', '2 timoteo': '2 Timoteo',
-    'tito': 'Tito', 'filemón': 'Filemón', 'hebreos': 'Hebreos', 'santiago': 'Santiago',
-    '1 pedro': '1 Pedro', '2 pedro': '2 Pedro', '1 juan': '1 Juan', '2 juan': '2 Juan',
-    '3 juan': '3 Juan', 'judas': 'Judas', 'apocalipsis': 'Apocalipsis'
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+from bible_references import MAX_VERSE, book_name, parse_reference, split_vid
+from verse_ids import PassageFetcher
+
+# Per-language defaults: (database, devotionals directory)
+LANGUAGES = {
+    'es': ('assets/spanish_bible_rvr1909.db', 'assets/devotionals/es'),
+    'en': ('assets/bible.db', 'assets/devotionals/en'),
 }
 
+def serialize_devotionals(devotionals: List[Dict]) -> str:
+    """Serialize a batch exactly as the files are stored (indent=2, UTF-8)."""
+    return json.dumps(devotionals, indent=2, ensure_ascii=False)
+
+def write_atomic(file_path: Path, content: str):
+    """
+    Write content to a temp file in the same directory, then swap it in.
+    The original's permission bits are kept (mkstemp creates files 0600),
+    and the directory is fsynced so the rename itself survives a crash.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'.{file_path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if file_path.exists():
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    # Directories can't be opened for fsync on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+# One updater (connection + chapter cache) per worker process and language
+_worker_updaters: Dict[str, 'DevotionalUpdater'] = {}
+
+def _update_file_in_worker(db_path: str, devotionals_dir: str, language: str,
+                           file_path: str, dry_run: bool) -> Dict:
+    updater = _worker_updaters.get(language)
+    if updater is None:
+        updater = DevotionalUpdater(db_path, devotionals_dir, language, dry_run)
+        updater.connect_db()
+        _worker_updaters[language] = updater
+    return updater.update_devotional_file(Path(file_path))
+
 class DevotionalUpdater:
-    def __init__(self, db_path: str, devotionals_dir: str):
+    def __init__(self, db_path: str, devotionals_dir: str, language: str = 'es',
+                 dry_run: bool = False):
         self.db_path = db_path
         self.devotionals_dir = devotionals_dir
+        self.language = language
+        self.dry_run = dry_run
         self.conn = None
+        self.fetcher = None
         self.updates_made = 0
         self.errors = []
 
     def connect_db(self):
-        """Connect to RVR1909 database."""
+        """Connect to the Bible database (RVR1909 or WEB)."""
         self.conn = sqlite3.connect(self.db_path)
         self.conn.row_factory = sqlite3.Row
+        self.fetcher = PassageFetcher(self.conn)
 
     def close_db(self):
         """Close database connection."""
         if self.conn:
             self.conn.close()
 
-    def parse_verse_range(self, verse_part: str) -> List[int]:
-        """Parse verse range like '1-3' or single verse '5'."""
-        if '-' in verse_part:
-            start, end = verse_part.split('-')
-            return list(range(int(start), int(end) + 1))
-        else:
-            return [int(verse_part)]
-
     def parse_reference(self, reference: str) -> Optional[Tuple[str, int, List[int]]]:
         """
         Parse Bible reference into (book, chapter, verse_list).
         Handles: "Salmos 107:1", "Mateo 2:1-2", "Mateo 2:1-2, 9-10"
         """
-        reference = reference.strip()
-
-        # Pattern: Book Chapter:Verses (e.g., "Mateo 2:1-2, 9-10")
-        pattern = r'^([0-9]?\s*[A-Za-zá-úÁ-Ú]+)\s+(\d+):(.+)$'
-        match = re.match(pattern, reference)
-
-        if not match:
+        parsed = parse_reference(reference.strip())
+        if not parsed:
             return None
 
-        book_raw, chapter, verses_part = match.groups()
-        book_normalized = self._normalize_book_name(book_raw)
-
-        if not book_normalized:
+        # Whole chapters and cross-chapter ranges aren't devotional verse texts
+        chapter_verses = parsed.chapter_verses()
+        if not chapter_verses or any(split_vid(end)[2] == MAX_VERSE for _, end in parsed.ranges):
             return None
 
-        # Parse verse parts (e.g., "1-2, 9-10")
-        verse_numbers = []
-        for part in verses_part.split(','):
-            part = part.strip()
-            verse_numbers.extend(self.parse_verse_range(part))
-
-        return (book_normalized, int(chapter), verse_numbers)
-
-    def _normalize_book_name(self, book_raw: str) -> Optional[str]:
-        """Normalize book name to database format."""
-        book_lower = book_raw.strip().lower()
-        return BOOK_MAPPINGS.get(book_lower)
+        chapter, verse_numbers = chapter_verses
+        return (book_name(parsed.book_id, self.language), chapter, verse_numbers)
 
     def get_verses_from_db(self, book: str, chapter: int, verses: List[int]) -> Optional[str]:
-        """Retrieve multiple verses from RVR1909 database and combine them."""
-        cursor = self.conn.cursor()
-        verse_texts = []
-
-        for verse_num in verses:
-            cursor.execute(
-                "SELECT text FROM verses WHERE book = ? AND chapter = ? AND verse_number = ?",
-                (book, chapter, verse_num)
-            )
-            row = cursor.fetchone()
-            if row:
-                verse_texts.append(row['text'].strip())
-            else:
-                return None
-
-        if not verse_texts:
+        """Retrieve multiple verses from the database and combine them."""
+        verse_texts = self.fetcher.verses(book, chapter, verses)
+
+        if not verse_texts or None in verse_texts:
             return None
 
         # Combine verses with space
-        return ' '.join(verse_texts)
+        return ' '.join(text.strip() for text in verse_texts)
 
     def update_devotional_file(self, file_path: Path) -> Dict:
         """Update all verses in a single devotional file."""
         with open(file_path, 'r', encoding='utf-8') as f:
-            devotionals = json.load(f)
+            original = f.read()
+        devotionals = json.loads(original)
 
+        chapters_before = self.fetcher.queries
         file_updates = 0
         file_errors = []
 
@@ -143,15 +158,28 @@ class DevotionalUpdater:
                 elif error:
                     file_errors.append(f"{dev_id}/keyVerseSpotlight: {error}")
 
-        # Write updated file
+        # Write updated file, unless the serialized content is unchanged
+        written = False
+        diff = ''
         if file_updates > 0:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(devotionals, f, indent=2, ensure_ascii=False)
+            content = serialize_devotionals(devotionals)
+            if content != original:
+                if self.dry_run:
+                    diff = ''.join(difflib.unified_diff(
+                        original.splitlines(keepends=True), content.splitlines(keepends=True),
+                        fromfile=f'a/{file_path}', tofile=f'b/{file_path}'
+                    ))
+                else:
+                    write_atomic(file_path, content)
+                    written = True
 
         return {
             'file': file_path.name,
             'updates': file_updates,
-            'errors': file_errors
+            'errors': file_errors,
+            'written': written,
+            'diff': diff,
+            'chapters_read': self.fetcher.queries - chapters_before
         }
 
     def _update_verse(self, verse_obj: Dict) -> Tuple[bool, Optional[str]]:
@@ -188,37 +216,58 @@ class DevotionalUpdater:
 
         return False, None
 
-    def run_full_update(self):
-        """Run complete update on all devotional files."""
-        self.connect_db()
-
+    def run_full_update(self, workers: Optional[int] = None):
+        """Run complete update on all devotional files, one file per worker."""
         print("=" * 70)
-        print("🔄 UPDATING ALL DEVOTIONALS TO AUTHENTIC RVR1909")
+        print(f"🔄 UPDATING ALL {self.language.upper()} DEVOTIONALS FROM {self.db_path}")
         print("=" * 70)
 
         devotional_files = sorted(Path(self.devotionals_dir).glob('*.json'))
+        if not devotional_files:
+            print("No devotional files found")
+            return
+
+        workers = min(workers or os.cpu_count() or 1, len(devotional_files))
+        files_written = 0
+        chapters_read = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_update_file_in_worker, self.db_path, self.devotionals_dir,
+                                       self.language, str(file_path), self.dry_run)
+                       for file_path in devotional_files]
 
-        for file_path in devotional_files:
-            print(f"\n📖 Processing: {file_path.name}")
-            result = self.update_devotional_file(file_path)
+            # Report in file order so the log and diff are stable
+            for future in futures:
+                result = future.result()
+                print(f"\n📖 Processing: {result['file']}")
+                chapters_read += result['chapters_read']
 
-            if result['updates'] > 0:
-                print(f"  ✅ Made {result['updates']} updates")
-                self.updates_made += result['updates']
+                if result['updates'] > 0:
+                    print(f"  ✅ Made {result['updates']} updates")
+                    self.updates_made += result['updates']
 
-            if result['errors']:
-                print(f"  ⚠️  {len(result['errors'])} errors:")
-                for error in result['errors']:
-                    print(f"    - {error}")
-                self.errors.extend(result['errors'])
+                if result['written']:
+                    files_written += 1
 
-        self.close_db()
+                if result['diff']:
+                    print(result['diff'], end='' if result['diff'].endswith('\n') else '\n')
+
+                if result['errors']:
+                    print(f"  ⚠️  {len(result['errors'])} errors:")
+                    for error in result['errors']:
+                        print(f"    - {error}")
+                    self.errors.extend(result['errors'])
 
         print("\n" + "=" * 70)
         print("📊 SUMMARY")
         print("=" * 70)
         print(f"✅ Total verse updates: {self.updates_made}")
+        if self.dry_run:
+            print("📝 Dry run: no files were written")
+        else:
+            print(f"💾 Files rewritten: {files_written}/{len(devotional_files)}")
         print(f"⚠️  Total errors: {len(self.errors)}")
+        print(f"🔎 Chapters read: {chapters_read} (workers: {workers})")
 
         if self.errors:
             print("\n⚠️  ERRORS:")
@@ -228,19 +277,30 @@ class DevotionalUpdater:
         print("\n✅ Done!")
 
 def main():
-    db_path = 'assets/spanish_bible_rvr1909.db'
-    devotionals_dir = 'assets/devotionals/es'
-
-    if not os.path.exists(db_path):
-        print(f"❌ Database not found: {db_path}")
-        return
-
-    if not os.path.exists(devotionals_dir):
-        print(f"❌ Devotionals directory not found: {devotionals_dir}")
-        return
-
-    updater = DevotionalUpdater(db_path, devotionals_dir)
-    updater.run_full_update()
+    parser = argparse.ArgumentParser(description="Replace devotional verse texts with the Bible database text")
+    parser.add_argument('--lang', choices=sorted(LANGUAGES) + ['all'], default='es',
+                        help="Devotional language to update (default: es)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print a unified diff instead of writing files")
+    args = parser.parse_args()
+
+    languages = sorted(LANGUAGES) if args.lang == 'all' else [args.lang]
+
+    for language in languages:
+        db_path, devotionals_dir = LANGUAGES[language]
+
+        if not os.path.exists(db_path):
+            print(f"❌ Database not found: {db_path}")
+            continue
+
+        if not os.path.exists(devotionals_dir):
+            print(f"❌ Devotionals directory not found: {devotionals_dir}")
+            continue
+
+        updater = DevotionalUpdater(db_path, devotionals_dir, language, args.dry_run)
+        updater.run_full_update(args.workers)
 
 if __name__ == '__main__':
     main()
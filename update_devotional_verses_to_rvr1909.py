@@ -11,83 +11,47 @@ This script:
 
 import json
 import sqlite3
-import re
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+import bible_references
+from verse_ids import PassageFetcher
+
 # Database path
 DB_PATH = "assets/spanish_bible_rvr1909.db"
 
 # Devotionals directory
 DEVOTIONALS_DIR = "assets/devotionals/es"
 
-# Spanish book name mapping (for parsing references)
-SPANISH_BOOK_NAMES = {
-    "génesis": "Génesis", "éxodo": "Éxodo", "levítico": "Levítico",
-    "números": "Números", "deuteronomio": "Deuteronomio", "josué": "Josué",
-    "jueces": "Jueces", "rut": "Rut", "1 samuel": "1 Samuel", "2 samuel": "2 Samuel",
-    "1 reyes": "1 Reyes", "2 reyes": "2 Reyes", "1 crónicas": "1 Crónicas",
-    "2 crónicas": "2 Crónicas", "esdras": "Esdras", "nehemías": "Nehemías",
-    "ester": "Ester", "job": "Job", "salmos": "Salmos", "proverbios": "Proverbios",
-    "eclesiastés": "Eclesiastés", "cantares": "Cantares", "isaías": "Isaías",
-    "jeremías": "Jeremías", "lamentaciones": "Lamentaciones", "ezequiel": "Ezequiel",
-    "daniel": "Daniel", "oseas": "Oseas", "joel": "Joel", "amós": "Amós",
-    "abdías": "Abdías", "jonás": "Jonás", "miqueas": "Miqueas", "nahúm": "Nahúm",
-    "habacuc": "Habacuc", "sofonías": "Sofonías", "hageo": "Hageo", "zacarías": "Zacarías",
-    "malaquías": "Malaquías", "mateo": "Mateo", "marcos": "Marcos", "lucas": "Lucas",
-    "juan": "Juan", "hechos": "Hechos", "romanos": "Romanos", "1 corintios": "1 Corintios",
-    "2 corintios": "2 Corintios", "gálatas": "Gálatas", "efesios": "Efesios",
-    "filipenses": "Filipenses", "colosenses": "Colosenses", "1 tesalonicenses": "1 Tesalonicenses",
-    "2 tesalonicenses": "2 Tesalonicenses", "1 timoteo": "1 Timoteo", "2 timoteo": "2 Timoteo",
-    "tito": "Tito", "filemón": "Filemón", "hebreos": "Hebreos", "santiago": "Santiago",
-    "1 pedro": "1 Pedro", "2 pedro": "2 Pedro", "1 juan": "1 Juan", "2 juan": "2 Juan",
-    "3 juan": "3 Juan", "judas": "Judas", "apocalipsis": "Apocalipsis"
-}
-
 def parse_reference(reference):
     """
     Parse a Bible reference like 'Salmos 107:1' or 'Santiago 1:17' or '1 Timoteo 4:4-5'
     Returns (book, chapter, verse_start, verse_end) or None if parsing fails
     """
-    # Pattern: Book Chapter:Verse or Book Chapter:Verse-Verse
-    pattern = r'^(.+?)\s+(\d+):(\d+)(?:-(\d+))?$'
-    match = re.match(pattern, reference.strip())
-
-    if not match:
+    parsed = bible_references.parse_reference(reference.strip())
+    if not parsed or len(parsed.ranges) != 1 or not parsed.is_single_chapter:
         return None
 
-    book = match.group(1).strip()
-    chapter = int(match.group(2))
-    verse_start = int(match.group(3))
-    verse_end = int(match.group(4)) if match.group(4) else verse_start
+    start, end = parsed.ranges[0]
+    book_id, chapter, verse_start = bible_references.split_vid(start)
+    verse_end = bible_references.split_vid(end)[2]
+    if verse_end == bible_references.MAX_VERSE:
+        return None
 
-    return (book, chapter, verse_start, verse_end)
+    return (bible_references.book_name(book_id, 'es'), chapter, verse_start, verse_end)
 
-def get_rvr1909_verse(db_conn, book, chapter, verse_number):
-    """
-    Retrieve the RVR1909 verse text from the database
-    """
-    cursor = db_conn.cursor()
-    cursor.execute(
-        "SELECT text FROM verses WHERE book = ? AND chapter = ? AND verse_number = ?",
-        (book, chapter, verse_number)
-    )
-    result = cursor.fetchone()
-    return result[0] if result else None
-
-def get_verse_range_text(db_conn, book, chapter, verse_start, verse_end):
+def get_verse_range_text(fetcher, book, chapter, verse_start, verse_end):
     """
     Get text for a range of verses (e.g., verses 4-5)
+    The chapter is read once per run and reused for every later range in it.
     """
-    verses = []
-    for verse_num in range(verse_start, verse_end + 1):
-        text = get_rvr1909_verse(db_conn, book, chapter, verse_num)
-        if text:
-            verses.append(text)
+    verses = [text for text in fetcher.verse_range(book, chapter, verse_start, verse_end) if text]
 
     return " ".join(verses) if verses else None
 
-def update_devotional_file(db_conn, file_path):
+def update_devotional_file(fetcher, file_path):
     """
     Update a single devotional JSON file with RVR1909 verse texts
     """
@@ -109,7 +73,7 @@ def update_devotional_file(db_conn, file_path):
 
             if parsed:
                 book, chapter, verse_start, verse_end = parsed
-                new_text = get_verse_range_text(db_conn, book, chapter, verse_start, verse_end)
+                new_text = get_verse_range_text(fetcher, book, chapter, verse_start, verse_end)
 
                 if new_text:
                     old_text = dev['openingScripture']['text']
@@ -129,7 +93,7 @@ def update_devotional_file(db_conn, file_path):
 
             if parsed:
                 book, chapter, verse_start, verse_end = parsed
-                new_text = get_verse_range_text(db_conn, book, chapter, verse_start, verse_end)
+                new_text = get_verse_range_text(fetcher, book, chapter, verse_start, verse_end)
 
                 if new_text:
                     old_text = dev['keyVerseSpotlight']['text']
@@ -169,6 +133,7 @@ def main():
         return
 
     db_conn = sqlite3.connect(DB_PATH)
+    fetcher = PassageFetcher(db_conn)
     print(f"✅ Connected to database: {DB_PATH}")
 
     # Get all devotional files
@@ -180,7 +145,7 @@ def main():
 
     # Process each file
     for file_path in devotional_files:
-        updates, errors = update_devotional_file(db_conn, file_path)
+        updates, errors = update_devotional_file(fetcher, file_path)
         total_updates += updates
         all_errors.extend(errors)
 
@@ -193,6 +158,7 @@ def main():
     print("=" * 70)
     print(f"✅ Total verse updates: {total_updates}")
     print(f"⚠️  Total errors: {len(all_errors)}")
+    print(f"🔎 Chapters read: {fetcher.queries}")
 
     if all_errors:
         print("\n⚠️  ERRORS FOUND:")